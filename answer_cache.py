@@ -0,0 +1,85 @@
+import os
+import json
+import hashlib
+import threading
+
+import redis
+
+import auth_manager
+from date_range_cache import normalize_query
+from metrics import record_upstream_error
+
+# GPT 응답 캐시 설정 (환경 변수 또는 기본값 사용)
+ANSWER_CACHE_ENABLED = os.getenv('ANSWER_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 일정이 바뀌면 키가 달라지므로 TTL은 "오늘" 같은 상대 표현이 어긋나지 않을 정도로만 짧게 둠
+ANSWER_CACHE_TTL = int(os.getenv('ANSWER_CACHE_TTL', '300'))
+
+
+def fingerprint(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+class AnswerCache:
+    """
+    최종 GPT 응답 캐시 (Redis)
+    키: 사용자 + 정규화된 질문 + 날짜 범위 + 일정 목록 fingerprint + 프롬프트 버전
+    일정이 바뀌면 fingerprint가 달라져 자연스럽게 새 응답을 생성함
+    """
+
+    def __init__(self, ttl=ANSWER_CACHE_TTL, enabled=ANSWER_CACHE_ENABLED):
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def make_key(self, user_id: str, query: str, start_time: str, end_time: str,
+                 events_prompt: str, prompt_version: str, today: str) -> str:
+        """events_prompt는 GPT에 전달하는 일정 목록 (원본 일정이 바뀌면 함께 바뀜)"""
+        digest = fingerprint('\n'.join([
+            prompt_version, today, normalize_query(query), start_time, end_time, fingerprint(events_prompt)
+        ]))
+        return f"answer:{user_id}:{digest}"
+
+    def get(self, key: str):
+        """캐시된 응답 문자열 반환 (없거나 Redis 오류면 None)"""
+        if not self.enabled:
+            return None
+        try:
+            cached = auth_manager.get_redis_client().get(key)
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 응답 캐시 조회 실패: {str(e)}")
+            record_upstream_error('redis', e)
+            cached = None
+        with self._lock:
+            if cached:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return json.loads(cached)['response'] if cached else None
+
+    def set(self, key: str, response: str):
+        if not self.enabled or not response:
+            return
+        try:
+            auth_manager.get_redis_client().set(key, json.dumps({'response': response}, ensure_ascii=False), ex=self.ttl)
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 응답 캐시 저장 실패: {str(e)}")
+            record_upstream_error('redis', e)
+            return
+        with self._lock:
+            self.stores += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stores': self.stores
+            }
+
+
+answer_cache = AnswerCache()
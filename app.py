@@ -1,84 +1,85 @@
-from flask import Flask, request, jsonify, redirect, session, url_for
+from dotenv import load_dotenv
+
+# 다른 모듈이 import 시점에 설정을 읽으므로 가장 먼저 .env 로드
+load_dotenv()
+
+from flask import Flask, Blueprint, current_app, Response, request, jsonify, redirect, session, url_for, stream_with_context
 from datetime import datetime
-from main import check_google_calendar, get_calendar_service, create_flow, credentials_to_dict
-from gpt_calendar import process_calendar_query
+from main import check_google_calendar, get_request_calendar_service, route_calendar_service, create_flow, credentials_to_dict
+from gpt_calendar import process_calendar_query, stream_calendar_query
 import os
 import json
+import itertools
 import traceback
-from dotenv import load_dotenv
 from werkzeug.middleware.proxy_fix import ProxyFix
-from auth_manager import AuthManager, redis_client
-
-print("🔥 Flask 서버 실행 시작됨!")
-
-
-# 환경 변수 로딩 디버깅
-print("현재 작업 디렉토리:", os.getcwd())
-print(".env 파일 존재 여부:", os.path.exists('.env'))
-
-# .env 파일 내용 확인
-try:
-    with open('.env', 'r', encoding='utf-8') as f:
-        env_content = f.read()
-    print("\n.env 파일 구조:")
-    for line in env_content.splitlines():
-        if line.strip() and not line.startswith('#'):
-            key = line.split('=')[0]
-            print(f"- {key}: {'값이 있음' if '=' in line else '값이 없음'}")
-except Exception as e:
-    print(".env 파일 읽기 실패:", str(e))
-
-# .env 파일 로드
-load_dotenv(verbose=True)
-
-app = Flask(__name__)
-app.secret_key = os.urandom(24)  # 세션을 위한 비밀키 설정
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
-
-def check_env_vars():
-    """환경 변수 체크"""
-    required_vars = [
-        'GOOGLE_CLIENT_ID',
-        'GOOGLE_PROJECT_ID',
-        'GOOGLE_CLIENT_SECRET',
-        'OPENAI_API_KEY'
-    ]
-    missing_vars = []
-    for var in required_vars:
-        value = os.getenv(var)
-        print(f"환경 변수 {var}: {'설정됨' if value else '설정되지 않음'}")
-        if not value:
-            missing_vars.append(var)
-    return missing_vars
-
-@app.route('/')
+from auth_manager import AuthManager
+from service_cache import service_cache
+from token_cache import token_cache
+from date_parser import date_parse_stats, parse_datetime
+from date_range_cache import date_range_cache
+from event_store import EventStore
+from calendar_list import calendar_list_cache
+from free_busy import find_free_slots, parse_clock, busy_index_cache, FREE_SLOT_MIN_MINUTES
+from google_http import pool_stats
+from token_refresher import token_refresher, start_token_refresher
+from answer_cache import answer_cache
+from rate_limiter import openai_limiter
+import metrics
+import response_encoding
+from config import AppConfig, load_config
+
+bp = Blueprint('api', __name__)
+
+def create_app(config: AppConfig = None, start_background: bool = True):
+    """
+    앱 팩토리 (WSGI 서버 워커마다 한 번 호출, 설정은 여기서 한 번만 읽어 검증)
+    start_background=False면 백그라운드 토큰 갱신을 시작하지 않음 (gunicorn preload 시 마스터 프로세스)
+    """
+    config = config or load_config()
+    app = Flask(__name__)
+    app.config['APP_CONFIG'] = config
+    # 세션을 위한 비밀키 설정 (여러 워커가 같은 키를 쓰도록 환경 변수 우선)
+    app.secret_key = config.secret_key or os.urandom(24)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    app.register_blueprint(bp)
+    # 엔드포인트별 응답 시간은 /metrics로 노출 (after_request는 역순으로 실행되므로 압축 시간까지 포함)
+    metrics.init_app(app)
+    # 빠른 JSON 직렬화, ETag(304), gzip/brotli 압축
+    response_encoding.init_app(app)
+    # 요청 경로에서 토큰 갱신을 기다리지 않도록 만료 전에 미리 갱신
+    if start_background:
+        start_token_refresher()
+    return app
+
+def wants_event_stream():
+    """SSE 스트리밍 요청 여부 (Accept: text/event-stream 또는 ?stream=1)"""
+    if request.args.get('stream') == '1':
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+def format_sse(event, data):
+    """Server-Sent Events 메시지 포맷"""
+    return f"event: {event}\ndata: {current_app.json.dumps(data)}\n\n"
+
+@bp.route('/')
 def index():
     return "AI Secretary API Server"
 
-@app.route('/auth_status')
+@bp.route('/readyz')
+def readyz():
+    """readiness 확인: 필수 설정이 빠진 인스턴스는 트래픽을 받지 않도록 503 반환"""
+    config = current_app.config['APP_CONFIG']
+    if config.missing:
+        return jsonify({
+            "status": "error",
+            "message": f"Missing environment variables: {', '.join(config.missing)}"
+        }), 503
+    return jsonify({"status": "ok"})
+
+@bp.route('/auth_status')
 def auth_status():
     """Google Calendar 인증 상태 확인"""
     try:
-        # 환경 변수 직접 확인
-        env_vars = {
-            'GOOGLE_CLIENT_ID': os.getenv('GOOGLE_CLIENT_ID'),
-            'GOOGLE_PROJECT_ID': os.getenv('GOOGLE_PROJECT_ID'),
-            'GOOGLE_CLIENT_SECRET': os.getenv('GOOGLE_CLIENT_SECRET'),
-            'OPENAI_API_KEY': os.getenv('OPENAI_API_KEY')
-        }
-        
-        print("\n환경 변수 상태:")
-        for key, value in env_vars.items():
-            print(f"{key}: {'설정됨 (길이: ' + str(len(value)) + ')' if value else '설정되지 않음'}")
-
-        # 환경 변수 체크
-        missing_vars = check_env_vars()
-        if missing_vars:
-            return jsonify({
-                "status": "error",
-                "message": f"Missing environment variables: {', '.join(missing_vars)}"
-            }), 400
-
         user_id = request.args.get('user_id')
         platform = request.args.get('platform', 'google')
         if not user_id:
@@ -87,7 +88,7 @@ def auth_status():
                 "message": "user_id가 필요합니다. 인증 상태 확인 불가"
             }), 400
 
-        service = get_calendar_service(user_id, platform)
+        service = get_request_calendar_service(user_id, platform)
         if service:
             return jsonify({"status": "ok", "message": "Authentication successful"})
         return jsonify({"status": "error", "message": "Authentication failed"}), 401
@@ -100,17 +101,9 @@ def auth_status():
         print(traceback.format_exc())
         return jsonify({"error": str(e), "type": type(e).__name__}), 500
 
-@app.route('/calendar', methods=['GET'])
+@bp.route('/calendar', methods=['GET'])
 def calendar():
     try:
-        # 환경 변수 체크
-        missing_vars = check_env_vars()
-        if missing_vars:
-            return jsonify({
-                "status": "error",
-                "message": f"Missing environment variables: {', '.join(missing_vars)}"
-            }), 400
-
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         user_id = request.args.get('user_id')
@@ -120,13 +113,13 @@ def calendar():
             return jsonify({'error': 'start_date, end_date, user_id are required'}), 400
 
         # 서비스 객체가 있는지 확인
-        service = get_calendar_service(user_id, platform)
+        service = get_request_calendar_service(user_id, platform)
         if not service:
             return jsonify({'error': 'Calendar service not authenticated'}), 401
 
         start = datetime.fromisoformat(start_date)
         end = datetime.fromisoformat(end_date)
-        events = route_calendar_service(user_id, start, end, platform)
+        events = route_calendar_service(user_id, start, end, platform, service=service)
         return jsonify({
             'status': 'ok',
             'events': events
@@ -140,17 +133,9 @@ def calendar():
         print(traceback.format_exc())
         return jsonify({"error": str(e), "type": type(e).__name__}), 500
 
-@app.route('/query_calendar', methods=['POST'])
+@bp.route('/query_calendar', methods=['POST'])
 def query_calendar():
     try:
-        # 환경 변수 체크
-        missing_vars = check_env_vars()
-        if missing_vars:
-            return jsonify({
-                "status": "error",
-                "message": f"Missing environment variables: {', '.join(missing_vars)}"
-            }), 400
-
         data = request.get_json()
         if not data or 'start_time' not in data or 'end_time' not in data or 'user_id' not in data:
             return jsonify({
@@ -170,7 +155,7 @@ def query_calendar():
 
         platform = data.get('platform', 'google')
         # 서비스 객체 가져오기
-        service = get_calendar_service(data['user_id'], platform)
+        service = get_request_calendar_service(data['user_id'], platform)
         if not service:
             return jsonify({
                 'status': 'error',
@@ -178,7 +163,7 @@ def query_calendar():
             }), 401
 
         # 캘린더 이벤트 조회
-        events = route_calendar_service(data['user_id'], start_time, end_time, platform)
+        events = route_calendar_service(data['user_id'], start_time, end_time, platform, service=service)
         
         return jsonify({
             'status': 'success',
@@ -193,7 +178,47 @@ def query_calendar():
             'message': str(e)
         }), 500
 
-@app.route('/login')
+@bp.route('/free_slots', methods=['GET'])
+def free_slots():
+    """기간 안의 min_minutes 이상 빈 시간 조회 (하루 중 day_start ~ day_end 시간대)"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
+        user_id = request.args.get('user_id')
+        platform = request.args.get('platform', 'google')
+
+        if not start_date or not end_date or not user_id:
+            return jsonify({'error': 'start_date, end_date, user_id are required'}), 400
+        try:
+            start = parse_datetime(start_date)
+            end = parse_datetime(end_date)
+            min_minutes = int(request.args.get('min_minutes', FREE_SLOT_MIN_MINUTES))
+            if min_minutes <= 0:
+                raise ValueError('min_minutes must be a positive integer')
+            day_start = request.args.get('day_start')
+            day_end = request.args.get('day_end')
+            for value in (day_start, day_end):
+                if value:
+                    parse_clock(value)
+        except ValueError as e:
+            return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+
+        service = get_request_calendar_service(user_id, platform)
+        if not service:
+            return jsonify({'error': 'Calendar service not authenticated'}), 401
+
+        slots = find_free_slots(service, user_id, platform, start, end, min_minutes, day_start, day_end)
+        return jsonify({
+            'status': 'ok',
+            'min_minutes': min_minutes,
+            'free_slots': slots
+        })
+    except Exception as e:
+        print(f"Error in free_slots endpoint: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e), "type": type(e).__name__}), 500
+
+@bp.route('/login')
 def login():
     """Google OAuth 로그인 (플랫폼/사용자 ID 지원)"""
     platform = request.args.get('platform', 'google')
@@ -207,7 +232,7 @@ def login():
     # state는 필요시 Redis에 저장 가능 (여기선 생략)
     return redirect(authorization_url)
 
-@app.route('/oauth2callback')
+@bp.route('/oauth2callback')
 def oauth2callback():
     """OAuth 콜백 처리 (세션 대신 Redis 사용)"""
     platform = request.args.get('platform', 'google')
@@ -221,31 +246,36 @@ def oauth2callback():
         return jsonify({'status': 'error', 'message': '사용자 이메일 추출 실패'}), 400
     # Redis에 토큰 저장
     auth.save_tokens(user_id, credentials)
+    auth.touch(user_id)
     print(f"✅ Redis에 토큰 저장 완료! user_id={user_id}")
-    return redirect(url_for('index'))
+    return redirect(url_for('.index'))
 
-@app.route('/logout')
+@bp.route('/logout')
 def logout():
     """로그아웃 (Redis에서 토큰 삭제)"""
     platform = request.args.get('platform', 'google')
     user_id = request.args.get('user_id')
     if user_id:
-        key = f"tokens:{platform}:{user_id}"
-        redis_client.delete(key)
+        key = AuthManager(platform).delete_tokens(user_id)
+        for calendar_id in calendar_list_cache.forget(platform, user_id):
+            EventStore(platform, user_id, calendar_id).clear()
         print(f"🧹 Redis 로그아웃 완료: {key}")
-    return redirect(url_for('index'))
-
-@app.route('/ask_gpt', methods=['POST'])
+    return redirect(url_for('.index'))
+
+def rate_limited_response(result):
+    """OpenAI 호출 한도 초과: 429 + Retry-After"""
+    response = jsonify({
+        'status': 'error',
+        'message': result.get('message'),
+        'retry_after': result.get('retry_after')
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(result.get('retry_after'))
+    return response
+
+@bp.route('/ask_gpt', methods=['POST'])
 def ask_gpt():
     try:
-        # 환경 변수 체크
-        missing_vars = check_env_vars()
-        if missing_vars:
-            return jsonify({
-                "status": "error",
-                "message": f"Missing environment variables: {', '.join(missing_vars)}"
-            }), 400
-
         # 요청 데이터 확인
         data = request.get_json()
         if not data or 'query' not in data or 'user_id' not in data:
@@ -255,16 +285,35 @@ def ask_gpt():
             }), 400
 
         platform = data.get('platform', 'google')
+        if wants_event_stream():
+            # 조회 결과를 먼저 보내고 GPT 응답은 생성되는 대로 전송
+            events = stream_calendar_query(data['query'], user_id=data['user_id'], platform=platform)
+            # 첫 이벤트 전에 호출 한도를 넘으면 스트림 대신 429로 응답
+            first_event, first_payload = next(events)
+            if first_event == 'error' and first_payload.get('error_type') == 'rate_limited':
+                return rate_limited_response(first_payload)
+            events = itertools.chain([(first_event, first_payload)], events)
+            return Response(
+                stream_with_context(format_sse(event, payload) for event, payload in events),
+                mimetype='text/event-stream',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+
         # GPT 처리 및 캘린더 조회 (user_id, platform 전달)
         result = process_calendar_query(data['query'], user_id=data['user_id'], platform=platform)
+        if result.get('error_type') == 'rate_limited':
+            return rate_limited_response(result)
 
         # 최종 응답 포맷 별도 구성
-        return jsonify({
+        response = {
             'status': 'success',
             'message': result.get("response"),
             'events': result.get("events", []),
             'query_info': result.get("query_info", {})
-        })
+        }
+        if 'free_slots' in result:
+            response['free_slots'] = result['free_slots']
+        return jsonify(response)
 
     except Exception as e:
         print(f"Error in ask_gpt endpoint: {str(e)}")
@@ -274,8 +323,30 @@ def ask_gpt():
             'message': str(e)
         }), 500
 
+@bp.route('/stats')
+def stats():
+    """프로세스 캐시 히트/미스 및 날짜 해석 경로 통계"""
+    return jsonify({
+        'service_cache': service_cache.stats(),
+        'token_cache': token_cache.stats(),
+        'date_parser': date_parse_stats.stats(),
+        'date_range_cache': date_range_cache.stats(),
+        'google_http': pool_stats.stats(),
+        'token_refresher': token_refresher.stats(),
+        'answer_cache': answer_cache.stats(),
+        'calendar_list': calendar_list_cache.stats(),
+        'busy_index': busy_index_cache.stats(),
+        'rate_limiter': openai_limiter.stats()
+    })
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape 엔드포인트 (단계별/엔드포인트별 지연, 캐시, 외부 오류, 토큰 사용량)"""
+    body, content_type = metrics.render_metrics()
+    return Response(body, content_type=content_type)
+
 # 디버그 모드에서만 세션 상태를 확인할 수 있는 라우트
-@app.route('/debug_session')
+@bp.route('/debug_session')
 def debug_session():
     from flask import session
     return {
@@ -284,7 +355,6 @@ def debug_session():
     }
 
 if __name__ == '__main__':
-    # Cloud Run은 PORT 환경 변수를 사용
+    # 로컬 개발용 서버 (운영 환경은 gunicorn.conf.py + wsgi.py 사용)
     port = int(os.environ.get('PORT', 8080))
-    # 모든 인터페이스에서 수신 대기
-    app.run(host='0.0.0.0', port=port, debug=False)
+    create_app().run(host='0.0.0.0', port=port, debug=False)
@@ -1,13 +1,106 @@
 import os
 import redis
 import json
-from google_auth_oauthlib.flow import Flow
+import time
+import uuid
+import datetime
+import threading
 from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
+from service_cache import service_cache
+from token_cache import token_cache, TOKEN_INVALIDATION_CHANNEL
+from config import get_config
+from google_http import create_auth_request
 
 # Redis 연결 (환경 변수 또는 기본값 사용)
 REDIS_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-redis_client = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+# 연결 풀 크기: 다 쓰면 REDIS_POOL_TIMEOUT초 동안 반납을 기다림 (무한정 연결을 늘리지 않음)
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '50'))
+REDIS_POOL_TIMEOUT = float(os.getenv('REDIS_POOL_TIMEOUT', '5'))
+# 이 시간 이상 쓰지 않은 연결은 사용 전에 PING으로 확인 (끊긴 keep-alive 연결 재사용 방지)
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', '30'))
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', '5'))
+REDIS_CONNECT_TIMEOUT = float(os.getenv('REDIS_CONNECT_TIMEOUT', '2'))
+# import 시점에는 만들지 않고 처음 사용할 때 생성 (콜드 스타트 단축)
+redis_client = None
+_redis_client_lock = threading.Lock()
+
+def get_redis_client():
+    """프로세스 공유 Redis 클라이언트 반환 (처음 호출 시 생성)"""
+    global redis_client
+    client = redis_client
+    if client is not None:
+        return client
+    with _redis_client_lock:
+        if redis_client is None:
+            pool = redis.BlockingConnectionPool.from_url(
+                REDIS_URL,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_POOL_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+                socket_keepalive=True
+            )
+            redis_client = redis.Redis(connection_pool=pool)
+        return redis_client
+
+# 등록한 Lua 스크립트 (스크립트 원문 → (클라이언트, Script))
+_scripts = {}
+
+def get_script(source: str):
+    """Lua 스크립트 객체 반환 (한 번만 등록해 SHA를 매번 계산하지 않음, 클라이언트가 바뀌면 다시 등록)"""
+    client = get_redis_client()
+    cached = _scripts.get(source)
+    if cached is None or cached[0] is not client:
+        cached = _scripts[source] = (client, client.register_script(source))
+    return cached[1]
+
+# google-auth가 from_authorized_user_info에서 읽는 만료 시각 형식 (UTC)
+EXPIRY_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+def parse_expiry(value):
+    """저장된 만료 시각 문자열을 aware datetime(UTC)으로 변환"""
+    if not value:
+        return None
+    expiry = datetime.datetime.strptime(value.rstrip('Z').split('.')[0], '%Y-%m-%dT%H:%M:%S')
+    return expiry.replace(tzinfo=datetime.timezone.utc)
+
+# 토큰 갱신 single-flight 설정 (환경 변수 또는 기본값 사용)
+TOKEN_REFRESH_LOCK_TTL_MS = int(os.getenv('TOKEN_REFRESH_LOCK_TTL_MS', '10000'))
+TOKEN_REFRESH_WAIT_SECONDS = float(os.getenv('TOKEN_REFRESH_WAIT_SECONDS', '5'))
+
+# 사용자 활동 기록 설정 (환경 변수 또는 기본값 사용)
+# 마지막 사용 시각은 사용자당 이 간격(초)에 한 번만 Redis에 기록 (요청마다 쓰지 않음)
+TOKEN_LAST_USED_WRITE_INTERVAL = float(os.getenv('TOKEN_LAST_USED_WRITE_INTERVAL', '600'))
+_LAST_USED_MAX_ENTRIES = 10000
+_last_used_written = {}
+_last_used_lock = threading.Lock()
+
+# 저장된 토큰의 fence보다 작은 fence로는 덮어쓰지 않음 (늦게 끝난 갱신이 새 토큰을 덮어쓰는 것 방지)
+# ARGV[3] == '1'이면 토큰이 남아 있을 때만 저장 (로그아웃 후 갱신 결과로 되살아나지 않도록)
+SAVE_TOKENS_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if not current and ARGV[3] == '1' then
+    return 0
+end
+if current then
+    local ok, decoded = pcall(cjson.decode, current)
+    if ok and type(decoded) == 'table' and tonumber(decoded['fence']) and tonumber(decoded['fence']) > tonumber(ARGV[2]) then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1])
+return 1
+"""
+
+# 자신이 잡은 락일 때만 해제
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
 
 SCOPES = {
     'google': ['https://www.googleapis.com/auth/calendar.readonly'],
@@ -22,17 +115,18 @@ class AuthManager:
     def create_flow(self):
         """플랫폼별 OAuth Flow 객체 생성 (Google 예시)"""
         if self.platform == 'google':
+            # OAuth 라이브러리는 로그인 흐름에서만 필요하므로 지연 import
+            from google_auth_oauthlib.flow import Flow
+            config = get_config()
             client_config = {
                 "web": {
-                    "client_id": os.getenv("GOOGLE_CLIENT_ID"),
-                    "project_id": os.getenv("GOOGLE_PROJECT_ID"),
+                    "client_id": config.google_client_id,
+                    "project_id": config.google_project_id,
                     "auth_uri": "https://accounts.google.com/o/oauth2/auth",
                     "token_uri": "https://oauth2.googleapis.com/token",
                     "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                    "client_secret": os.getenv("GOOGLE_CLIENT_SECRET"),
-                    "redirect_uris": [
-                        os.getenv("GOOGLE_REDIRECT_URI", "https://ai-secretary-148126309509.asia-northeast3.run.app/oauth2callback")
-                    ]
+                    "client_secret": config.google_client_secret,
+                    "redirect_uris": [config.google_redirect_uri]
                 }
             }
             return Flow.from_client_config(
@@ -43,23 +137,164 @@ class AuthManager:
         # TODO: Notion, Slack 등 추가
         raise NotImplementedError(f"플랫폼 {self.platform}의 OAuth는 아직 지원되지 않습니다.")
 
-    def save_tokens(self, user_id: str, credentials):
-        """토큰을 Redis에 저장 (credentials는 dict 또는 Credentials 객체)"""
+    @property
+    def expiry_key(self):
+        """토큰 만료 시각 정렬 집합 키 (백그라운드 갱신 스케줄)"""
+        return f"token_expiry:{self.platform}"
+
+    @property
+    def last_used_key(self):
+        """사용자별 마지막 사용 시각 정렬 집합 키 (오래 쓰지 않은 사용자는 백그라운드 갱신에서 제외)"""
+        return f"token_last_used:{self.platform}"
+
+    def touch(self, user_id: str, now: float = None):
+        """요청 경로에서 사용자의 마지막 사용 시각 기록 (TOKEN_LAST_USED_WRITE_INTERVAL마다 한 번)"""
+        now = now or time.time()
+        key = (self.platform, user_id)
+        with _last_used_lock:
+            if now - _last_used_written.get(key, 0) < TOKEN_LAST_USED_WRITE_INTERVAL:
+                return
+            if len(_last_used_written) >= _LAST_USED_MAX_ENTRIES:
+                _last_used_written.clear()
+            _last_used_written[key] = now
+        try:
+            get_redis_client().zadd(self.last_used_key, {user_id: now})
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 마지막 사용 시각 기록 실패: {str(e)}")
+
+    def save_tokens(self, user_id: str, credentials, fence: int = None, require_existing: bool = False):
+        """
+        토큰을 Redis에 저장 (credentials는 dict 또는 Credentials 객체)
+        fence가 이미 저장된 토큰의 fence보다 작으면 저장하지 않고 False 반환
+        require_existing이면 저장된 토큰이 있을 때만 저장 (갱신 결과 저장용)
+        """
         if isinstance(credentials, Credentials):
             data = self.credentials_to_dict(credentials)
         else:
-            data = credentials
+            data = dict(credentials)
         key = f"tokens:{self.platform}:{user_id}"
-        redis_client.set(key, json.dumps(data))
+        if fence is None:
+            fence = get_redis_client().incr(self.fence_key(user_id))
+        data['fence'] = fence
+        saved = get_script(SAVE_TOKENS_SCRIPT)(keys=[key], args=[json.dumps(data), fence, '1' if require_existing else '0'])
+        if not saved:
+            print(f"[TOKEN] 더 새로운 토큰이 있거나 로그아웃되어 저장 생략: user_id={user_id}, fence={fence}")
+            return False
+
+        expiry = parse_expiry(data.get('expiry'))
+        pipe = get_redis_client().pipeline()
+        # 만료 시각을 기록해 두면 백그라운드 갱신기가 만료 전에 미리 갱신함
+        if expiry and data.get('refresh_token'):
+            pipe.zadd(self.expiry_key, {user_id: expiry.timestamp()})
+        else:
+            pipe.zrem(self.expiry_key, user_id)
+        self._publish_invalidation(pipe, user_id)
+        pipe.execute()
+        # 이전 토큰으로 만든 서비스 객체는 더 이상 사용하지 않음
+        self._invalidate_local(user_id)
+        return True
+
+    def _publish_invalidation(self, pipe, user_id: str):
+        """다른 인스턴스의 토큰 캐시 / 서비스 객체 무효화 메시지 발행"""
+        pipe.publish(TOKEN_INVALIDATION_CHANNEL, f"{self.platform}:{user_id}")
+
+    def _invalidate_local(self, user_id: str):
+        """이 인스턴스의 캐시는 메시지를 기다리지 않고 바로 무효화"""
+        token_cache.invalidate(self.platform, user_id)
+        service_cache.invalidate(self.platform, user_id)
+
+    def fence_key(self, user_id: str):
+        """토큰 저장 순서를 정하는 단조 증가 카운터 키"""
+        return f"token_fence:{self.platform}:{user_id}"
 
-    def load_tokens(self, user_id: str):
-        """Redis에서 토큰 로드 (딕셔너리 반환, 없으면 None)"""
+    def refresh_credentials(self, user_id: str, credentials, request=None, min_remaining: float = 0,
+                            reject_current: bool = False):
+        """
+        만료된 자격 증명 갱신 (여러 인스턴스에 걸친 single-flight)
+        한 곳만 짧은 임대 락을 잡고 갱신하며, 나머지는 기다렸다가 새로 저장된 토큰을 재사용
+        min_remaining: 저장된 토큰이 이 시간(초)보다 오래 유효할 때만 재사용 (미리 갱신할 때 사용)
+        reject_current: credentials의 토큰이 401로 거절됨 (저장된 토큰이 같은 토큰이면 재사용하지 않음)
+        """
+        rejected_token = credentials.token if reject_current else None
+        lock_key = f"lock:token_refresh:{self.platform}:{user_id}"
+        lock_token = uuid.uuid4().hex
+        deadline = time.monotonic() + TOKEN_REFRESH_WAIT_SECONDS
+        delay = 0.05
+        while True:
+            if get_redis_client().set(lock_key, lock_token, nx=True, px=TOKEN_REFRESH_LOCK_TTL_MS):
+                try:
+                    # 락을 잡은 순서대로 fence 발급 (임대가 끝난 뒤 늦게 저장하려 하면 거절됨)
+                    fence = get_redis_client().incr(self.fence_key(user_id))
+                    fresh = self._load_valid_credentials(user_id, min_remaining, rejected_token)
+                    if fresh:
+                        return fresh
+                    credentials.refresh(request or create_auth_request())
+                    self.save_tokens(user_id, credentials, fence=fence, require_existing=True)
+                    return credentials
+                finally:
+                    get_script(RELEASE_LOCK_SCRIPT)(keys=[lock_key], args=[lock_token])
+
+            # 다른 요청이 갱신 중: 새 토큰이 저장되기를 기다림
+            fresh = self._load_valid_credentials(user_id, min_remaining, rejected_token)
+            if fresh:
+                return fresh
+            if time.monotonic() >= deadline:
+                break
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+        # 기다려도 갱신되지 않으면 직접 갱신 (fence로 더 새 토큰은 덮어쓰지 않음)
+        print(f"[TOKEN] 갱신 대기 시간 초과, 직접 갱신: user_id={user_id}")
+        fence = get_redis_client().incr(self.fence_key(user_id))
+        credentials.refresh(request or create_auth_request())
+        self.save_tokens(user_id, credentials, fence=fence, require_existing=True)
+        return credentials
+
+    def _load_valid_credentials(self, user_id: str, min_remaining: float = 0, rejected_token: str = None):
+        """저장된 토큰이 유효하고 min_remaining초 이상 남아 있으면 Credentials 반환 (rejected_token과 같으면 None)"""
+        tokens = self.load_tokens(user_id, use_cache=False)
+        if not tokens or (rejected_token and tokens.get('token') == rejected_token):
+            return None
+        credentials = Credentials.from_authorized_user_info(tokens, self.scopes)
+        if not credentials.valid:
+            return None
+        if min_remaining and credentials.expiry:
+            # Credentials.expiry는 naive UTC
+            remaining = credentials.expiry - datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+            if remaining.total_seconds() <= min_remaining:
+                return None
+        return credentials
+
+    def load_tokens(self, user_id: str, use_cache: bool = True):
+        """
+        토큰 로드 (딕셔너리 반환, 없으면 None)
+        프로세스 캐시에 있으면 Redis를 조회하지 않음 (갱신 대기처럼 최신 값이 필요하면 use_cache=False)
+        """
+        generation = None
+        if use_cache:
+            tokens, generation = token_cache.get(self.platform, user_id)
+            if tokens:
+                return tokens
         key = f"tokens:{self.platform}:{user_id}"
-        value = redis_client.get(key)
+        value = get_redis_client().get(key)
         if value:
-            return json.loads(value)
+            tokens = json.loads(value)
+            token_cache.put(self.platform, user_id, tokens, generation)
+            return tokens
         return None
 
+    def delete_tokens(self, user_id: str):
+        """Redis에서 토큰 삭제 (로그아웃)"""
+        key = f"tokens:{self.platform}:{user_id}"
+        pipe = get_redis_client().pipeline()
+        pipe.delete(key)
+        pipe.zrem(self.expiry_key, user_id)
+        pipe.zrem(self.last_used_key, user_id)
+        self._publish_invalidation(pipe, user_id)
+        pipe.execute()
+        self._invalidate_local(user_id)
+        return key
+
     def credentials_to_dict(self, credentials):
         """Credentials 객체를 딕셔너리로 변환"""
         return {
@@ -68,7 +303,8 @@ class AuthManager:
             'token_uri': credentials.token_uri,
             'client_id': credentials.client_id,
             'client_secret': credentials.client_secret,
-            'scopes': credentials.scopes
+            'scopes': credentials.scopes,
+            'expiry': credentials.expiry.strftime(EXPIRY_FORMAT) if credentials.expiry else None
         }
 
     def get_user_id_from_credentials(self, credentials):
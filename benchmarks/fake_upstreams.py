@@ -0,0 +1,303 @@
+"""
+벤치마크용 가짜 외부 서비스 (Google Calendar API, OpenAI API, Redis)
+
+실제 서비스 대신 지연 시간과 응답 크기를 조절할 수 있는 로컬 서버를 띄움
+    python benchmarks/fake_upstreams.py --events 200 --google-latency-ms 80 --openai-latency-ms 400
+
+가짜 Redis는 Lua 스크립트 실행을 위해 fakeredis와 lupa가 필요함
+    pip install -r benchmarks/requirements.txt
+
+시작되면 각 서버 주소를 JSON 한 줄로 stdout에 출력하고 종료 신호를 받을 때까지 실행됨
+"""
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import datetime
+import threading
+from urllib.parse import urlparse, parse_qs, unquote
+from zoneinfo import ZoneInfo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 가짜 Calendar API가 반환하는 syncToken (증분 동기화 요청에는 항상 변경 없음으로 응답)
+SYNC_TOKEN = 'fake-sync-token'
+
+
+def parse_time(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def generate_events(count: int, days: int, summary_bytes: int, timezone: str, seed: int = 0, prefix: str = ''):
+    """오늘을 가운데 두고 days일에 걸쳐 고르게 퍼진 일정 생성 (일부는 반복 일정)"""
+    tz = ZoneInfo(timezone)
+    rng = random.Random(seed)
+    today = datetime.datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+    first = today - datetime.timedelta(days=days // 2)
+    step = datetime.timedelta(days=days) / max(count, 1)
+    events = []
+    for i in range(count):
+        start = first + step * i
+        end = start + datetime.timedelta(minutes=rng.choice((30, 60, 90)))
+        summary = f"일정 {i}"
+        summary += ' ' + 'x' * max(0, summary_bytes - len(summary.encode('utf-8')) - 1)
+        event = {
+            'id': f"{prefix}event{i}",
+            'status': 'confirmed',
+            'summary': summary,
+            'start': {'dateTime': start.isoformat(), 'timeZone': timezone},
+            'end': {'dateTime': end.isoformat(), 'timeZone': timezone}
+        }
+        if i % 10 == 0:
+            event['recurringEventId'] = f"{prefix}series{i % 3}"
+        events.append(event)
+    return events
+
+
+class FakeServerHandler(BaseHTTPRequestHandler):
+    """공통: keep-alive 유지, 설정된 지연 후 JSON 응답"""
+
+    protocol_version = 'HTTP/1.1'
+    config = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def sleep(self, latency_ms: float):
+        if latency_ms > 0:
+            jitter = self.config.jitter_ms * random.random() if self.config.jitter_ms else 0
+            time.sleep((latency_ms + jitter) / 1000)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        if not body:
+            return {}
+        if self.headers.get('Content-Type', '').startswith('application/x-www-form-urlencoded'):
+            return {key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()}
+        return json.loads(body)
+
+    def send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def calendar_ids(count: int):
+    """가짜 사용자의 캘린더 ID (기본 캘린더 + 공유 캘린더)"""
+    return ['primary'] + [f"team{i}@group.calendar.google.com" for i in range(1, count)]
+
+
+class FakeCalendarHandler(FakeServerHandler):
+    """Calendar v3 events.list / calendarList.list와 OAuth 토큰 갱신 엔드포인트"""
+
+    # {캘린더 ID: 일정 목록}
+    calendars = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+        # /calendar/v3/calendars/{calendarId}/events
+        if len(parts) == 5 and parts[:3] == ['calendar', 'v3', 'calendars'] and parts[4] == 'events':
+            events = self.calendars.get(unquote(parts[3]))
+            self.sleep(self.config.google_latency_ms)
+            if events is None:
+                self.send_json(404, {'error': {'code': 404, 'message': 'Not Found'}})
+                return
+            self.send_json(200, self.list_events(events, params))
+            return
+        # /calendar/v3/users/me/calendarList
+        if parts == ['calendar', 'v3', 'users', 'me', 'calendarList']:
+            self.sleep(self.config.google_latency_ms)
+            self.send_json(200, {'items': [
+                {'id': 'bench@example.com' if calendar_id == 'primary' else calendar_id,
+                 'primary': calendar_id == 'primary', 'selected': True}
+                for calendar_id in self.calendars
+            ]})
+            return
+        self.send_json(404, {'error': {'code': 404, 'message': 'Not Found'}})
+
+    def do_POST(self):
+        # google-auth 토큰 갱신 요청 (저장된 token_uri가 이 서버를 가리킬 때)
+        if urlparse(self.path).path == '/token':
+            self.read_json()
+            self.sleep(self.config.google_latency_ms)
+            self.send_json(200, {
+                'access_token': f"fake-access-{uuid.uuid4().hex}",
+                'expires_in': 3600,
+                'token_type': 'Bearer'
+            })
+            return
+        self.send_json(404, {'error': 'not_found'})
+
+    def list_events(self, items: list, params: dict):
+        if params.get('syncToken'):
+            return {'items': [], 'nextSyncToken': SYNC_TOKEN}
+        if params.get('timeMin') or params.get('timeMax'):
+            time_min = parse_time(params['timeMin']) if params.get('timeMin') else None
+            time_max = parse_time(params['timeMax']) if params.get('timeMax') else None
+            items = [
+                event for event in items
+                if (time_max is None or parse_time(event['start']['dateTime']) < time_max)
+                and (time_min is None or parse_time(event['end']['dateTime']) > time_min)
+            ]
+        offset = int(params.get('pageToken') or 0)
+        page_size = int(params.get('maxResults') or 250)
+        page = items[offset:offset + page_size]
+        result = {'items': page}
+        if offset + page_size < len(items):
+            result['nextPageToken'] = str(offset + page_size)
+        elif not params.get('orderBy'):
+            # 동기화용 조회(정렬 없음)는 기간을 지정해도 syncToken을 반환
+            result['nextSyncToken'] = SYNC_TOKEN
+        return result
+
+
+class FakeOpenAIHandler(FakeServerHandler):
+    """chat.completions: 도구 호출을 강제하거나 GPT에 맡기면(auto) check_calendar 도구 호출, 그 외에는 answer_chars 길이의 응답 (stream 지원)"""
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip('/') != '/v1/chat/completions':
+            self.send_json(404, {'error': {'message': 'Not Found'}})
+            return
+        body = self.read_json()
+        self.sleep(self.config.openai_latency_ms)
+        prompt_tokens = sum(len(str(message.get('content') or '')) for message in body.get('messages', [])) // 2
+        if isinstance(body.get('tool_choice'), dict) or (body.get('tools') and body.get('tool_choice') == 'auto'):
+            self.send_json(200, self.tool_call_response(body, prompt_tokens))
+        elif body.get('stream'):
+            self.stream_answer(body)
+        else:
+            answer = self.answer_text()
+            self.send_json(200, self.completion(body, {'role': 'assistant', 'content': answer}, prompt_tokens, len(answer) // 2))
+
+    def answer_text(self):
+        return ('오늘 일정은 다음과 같습니다. ' * (self.config.answer_chars // 17 + 1))[:self.config.answer_chars]
+
+    def completion(self, body: dict, message: dict, prompt_tokens: int, completion_tokens: int):
+        return {
+            'id': f"chatcmpl-{uuid.uuid4().hex}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': body.get('model', 'gpt-3.5-turbo'),
+            'choices': [{
+                'index': 0,
+                'message': message,
+                'finish_reason': 'tool_calls' if message.get('tool_calls') else 'stop'
+            }],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens
+            }
+        }
+
+    def tool_call_response(self, body: dict, prompt_tokens: int):
+        tz = ZoneInfo(self.config.timezone)
+        today = datetime.datetime.now(tz).replace(hour=0, minute=0, second=0, microsecond=0)
+        arguments = json.dumps({
+            'start_date': today.isoformat(),
+            'end_date': today.replace(hour=23, minute=59, second=59).isoformat()
+        })
+        message = {
+            'role': 'assistant',
+            'content': None,
+            'tool_calls': [{
+                'id': f"call_{uuid.uuid4().hex[:24]}",
+                'type': 'function',
+                'function': {'name': 'check_calendar', 'arguments': arguments}
+            }]
+        }
+        return self.completion(body, message, prompt_tokens, 20)
+
+    def stream_answer(self, body: dict):
+        """SSE로 응답 조각 전송 (조각 사이 stream_delay_ms 지연)"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        answer = self.answer_text()
+        size = max(1, len(answer) // max(1, self.config.stream_chunks))
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+        for i in range(0, len(answer), size):
+            chunk = {
+                'id': chunk_id,
+                'object': 'chat.completion.chunk',
+                'created': int(time.time()),
+                'model': body.get('model', 'gpt-3.5-turbo'),
+                'choices': [{'index': 0, 'delta': {'content': answer[i:i + size]}, 'finish_reason': None}]
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+            self.sleep(self.config.stream_delay_ms)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def serve(handler_class, config, host: str = '127.0.0.1', port: int = 0, **attrs):
+    """핸들러에 설정을 붙여 백그라운드 스레드로 서버 시작"""
+    handler = type(handler_class.__name__, (handler_class,), dict(config=config, **attrs))
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_fake_redis(host: str = '127.0.0.1', port: int = 0):
+    """fakeredis TCP 서버 (실제 Redis 없이 앱 프로세스가 redis:// 주소로 접속)"""
+    from fakeredis import TcpFakeServer
+    server = TcpFakeServer((host, port), server_type='redis')
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_arguments(parser):
+    parser.add_argument('--events', type=int, default=200, help='가짜 캘린더의 일정 수 (캘린더마다)')
+    parser.add_argument('--calendars', type=int, default=1, help='사용자의 캘린더 수 (기본 캘린더 포함)')
+    parser.add_argument('--days', type=int, default=14, help='일정을 퍼뜨릴 기간 (일)')
+    parser.add_argument('--summary-bytes', type=int, default=40, help='일정 제목 크기 (응답 크기 조절)')
+    parser.add_argument('--google-latency-ms', type=float, default=80)
+    parser.add_argument('--openai-latency-ms', type=float, default=400)
+    parser.add_argument('--jitter-ms', type=float, default=0, help='지연 시간에 더할 무작위 값의 최대치')
+    parser.add_argument('--answer-chars', type=int, default=300, help='GPT 응답 길이')
+    parser.add_argument('--stream-chunks', type=int, default=20, help='스트리밍 응답 조각 수')
+    parser.add_argument('--stream-delay-ms', type=float, default=10, help='스트리밍 조각 사이 지연')
+    parser.add_argument('--timezone', default='Asia/Seoul')
+    parser.add_argument('--no-redis', action='store_true', help='가짜 Redis를 띄우지 않음 (실제 Redis 사용 시)')
+    return parser
+
+
+def main():
+    parser = add_arguments(argparse.ArgumentParser(description='벤치마크용 가짜 Google / OpenAI / Redis 서버'))
+    config = parser.parse_args()
+    calendars = {
+        calendar_id: generate_events(config.events, config.days, config.summary_bytes, config.timezone,
+                                     seed=i, prefix='' if i == 0 else f"cal{i}")
+        for i, calendar_id in enumerate(calendar_ids(config.calendars))
+    }
+    calendar = serve(FakeCalendarHandler, config, calendars=calendars)
+    openai = serve(FakeOpenAIHandler, config)
+    addresses = {
+        'google': f"http://127.0.0.1:{calendar.server_address[1]}",
+        'openai': f"http://127.0.0.1:{openai.server_address[1]}/v1"
+    }
+    if not config.no_redis:
+        redis_server = start_fake_redis()
+        addresses['redis'] = f"redis://127.0.0.1:{redis_server.server_address[1]}/0"
+    print(json.dumps(addresses), flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+콜드 스타트 import 시간 측정 (python -X importtime 기반)
+
+사용 예:
+    python benchmarks/importtime.py                      # wsgi import 5회 측정, JSON 출력
+    python benchmarks/importtime.py --history importtime.jsonl   # 결과를 누적 기록
+    python benchmarks/importtime.py --max-ms 600         # 기준 초과 시 종료 코드 1
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 첫 요청까지 미뤄야 하는 무거운 패키지 (import 시점에 로드되면 회귀)
+DEFERRED_MODULES = ['openai', 'httpx', 'googleapiclient', 'google_auth_oauthlib', 'httplib2', 'requests']
+
+
+def parse_importtime(stderr: str):
+    """-X importtime 출력을 출력 순서대로 (모듈, self_us, cumulative_us, depth) 목록으로 변환"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return modules
+
+
+def direct_imports(modules, target: str):
+    """target이 직접 import한 모듈들의 누적 시간 (하위 모듈은 부모보다 먼저 출력됨)"""
+    index = next(i for i, m in enumerate(modules) if m[0] == target)
+    depth = modules[index][3]
+    children = []
+    for name, _, cumulative, child_depth in reversed(modules[:index]):
+        if child_depth <= depth:
+            break
+        if child_depth == depth + 1:
+            children.append((name, cumulative))
+    return children
+
+
+def total_us(modules, target: str):
+    return next(cumulative for name, _, cumulative, _ in modules if name == target)
+
+
+def measure(target: str):
+    """새 인터프리터에서 target을 import하고 모듈별 import 시간과 로드된 무거운 패키지 반환"""
+    env = dict(os.environ)
+    # 측정 중 백그라운드 토큰 갱신 스레드가 Redis에 연결하지 않도록 함
+    env['TOKEN_REFRESHER_ENABLED'] = 'false'
+    code = (
+        f"import sys; import {target}; "
+        f"print(','.join(m for m in {DEFERRED_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    loaded = [m for m in result.stdout.strip().split(',') if m]
+    return parse_importtime(result.stderr), loaded
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(target: str, repeat: int, top: int):
+    """repeat회 측정해 중앙값 기준 결과 생성"""
+    totals = []
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        modules, loaded = measure(target)
+        totals.append(total_us(modules, target))
+        samples.append(modules)
+
+    # 가장 중앙값에 가까운 실행의 모듈별 수치를 보고
+    median_total = statistics.median(totals)
+    modules = min(samples, key=lambda m: abs(total_us(m, target) - median_total))
+    # target이 직접 import한 모듈 기준으로 비용이 큰 순서
+    direct = direct_imports(modules, target)
+    direct.sort(key=lambda item: item[1], reverse=True)
+    return {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'target': target,
+        'repeat': repeat,
+        'total_ms': {
+            'median': round(median_total / 1000, 1),
+            'min': round(min(totals) / 1000, 1),
+            'max': round(max(totals) / 1000, 1)
+        },
+        'module_count': len(modules),
+        'top_imports_ms': {name: round(cumulative / 1000, 1) for name, cumulative in direct[:top]},
+        'deferred_modules_loaded': loaded
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='콜드 스타트 import 시간 측정')
+    parser.add_argument('--target', default='wsgi', help='import할 모듈 (기본: wsgi)')
+    parser.add_argument('--repeat', type=int, default=5, help='측정 횟수 (중앙값 사용)')
+    parser.add_argument('--top', type=int, default=10, help='보고할 직접 import 모듈 수')
+    parser.add_argument('--history', help='결과를 한 줄씩 누적할 JSONL 파일')
+    parser.add_argument('--max-ms', type=float, help='중앙값이 이 값을 넘으면 실패')
+    args = parser.parse_args()
+
+    report = run(args.target, args.repeat, args.top)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if args.history:
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(report, ensure_ascii=False) + '\n')
+
+    failed = bool(report['deferred_modules_loaded'])
+    if args.max_ms is not None and report['total_ms']['median'] > args.max_ms:
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,316 @@
+"""
+오프라인 부하 벤치마크: 가짜 Google / OpenAI / Redis 위에서 실제 gunicorn 앱을 띄워 엔드포인트별 성능 측정
+
+    python benchmarks/load.py --concurrency 20 --requests 400 --output bench.json
+    python benchmarks/load.py --compare bench.json --max-regression 10   # 이전 결과와 비교
+
+가짜 Redis는 Lua 스크립트 실행을 위해 fakeredis와 lupa가 필요함
+    pip install -r benchmarks/requirements.txt
+
+엔드포인트별 p50/p95/p99 지연, 처리량, 오류 수, 앱 프로세스 메모리(RSS)를 JSON으로 출력
+가짜 서버의 지연/응답 크기 옵션은 fake_upstreams.py와 같음
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import datetime
+import statistics
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_upstreams import add_arguments
+from importtime import git_revision
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+ENDPOINTS = ['calendar', 'query_calendar', 'ask_gpt', 'ask_gpt_stream']
+
+
+def start_fake_upstreams(args):
+    """가짜 서버를 별도 프로세스로 시작하고 주소 반환 (앱/부하 발생기와 GIL을 나눠 쓰지 않도록)"""
+    command = [sys.executable, os.path.join(BENCHMARKS_DIR, 'fake_upstreams.py')]
+    for option in ('events', 'calendars', 'days', 'summary_bytes', 'google_latency_ms', 'openai_latency_ms', 'jitter_ms',
+                   'answer_chars', 'stream_chunks', 'stream_delay_ms', 'timezone'):
+        command += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    if args.redis_url:
+        command.append('--no-redis')
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    addresses = json.loads(process.stdout.readline())
+    if args.redis_url:
+        addresses['redis'] = args.redis_url
+    return process, addresses
+
+
+def seed_tokens(redis_url: str, token_uri: str, users: int):
+    """벤치마크 사용자들의 유효한 토큰을 Redis에 저장"""
+    import redis
+    client = redis.Redis.from_url(redis_url, decode_responses=True)
+    expiry = (datetime.datetime.now(datetime.timezone.utc) + datetime.timedelta(days=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+    pipe = client.pipeline()
+    for i in range(users):
+        pipe.set(f"tokens:google:{user_id(i)}", json.dumps({
+            'token': f"bench-access-{i}",
+            'refresh_token': f"bench-refresh-{i}",
+            'token_uri': token_uri,
+            'client_id': 'bench-client-id',
+            'client_secret': 'bench-client-secret',
+            'scopes': ['https://www.googleapis.com/auth/calendar.readonly'],
+            'expiry': expiry,
+            'fence': 1
+        }))
+    pipe.execute()
+    client.close()
+
+
+def user_id(i: int):
+    return f"bench{i}@example.com"
+
+
+def start_app(args, addresses, port: int):
+    """운영과 같은 gunicorn 설정으로 앱 시작 (외부 주소만 가짜 서버로 바꿈)"""
+    env = dict(os.environ)
+    env.update({
+        'PORT': str(port),
+        'REDIS_URL': addresses['redis'],
+        'OPENAI_BASE_URL': addresses['openai'],
+        'OPENAI_API_KEY': 'bench-key',
+        'GOOGLE_CALENDAR_API_ENDPOINT': f"{addresses['google']}/calendar/v3/",
+        'GOOGLE_CLIENT_ID': 'bench-client-id',
+        'GOOGLE_PROJECT_ID': 'bench-project',
+        'GOOGLE_CLIENT_SECRET': 'bench-client-secret',
+        'SECRET_KEY': 'bench',
+        'TOKEN_REFRESHER_ENABLED': 'false',
+        # 속도 제한은 켜 둔 채(Redis 스크립트 비용 포함) 부하 때문에 거절되지 않을 만큼만 높임
+        'RATE_LIMIT_USER_RATE': '100000',
+        'RATE_LIMIT_USER_BURST': '100000',
+        'RATE_LIMIT_GLOBAL_RATE': '100000',
+        'RATE_LIMIT_GLOBAL_BURST': '100000',
+        'CALENDAR_TIMEZONE': args.timezone,
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_ACCESS_LOG': os.devnull
+    })
+    log = open(args.app_log, 'w') if args.app_log else subprocess.DEVNULL
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=log, stderr=log
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"앱 프로세스가 종료됨 (exit={process.returncode}), --app-log로 로그 확인")
+        try:
+            if requests.get(base_url + '/readyz', timeout=1).status_code == 200:
+                return process, base_url
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('앱이 30초 안에 시작되지 않음')
+
+
+def process_tree(pid: int):
+    """pid와 그 자식 프로세스 목록 (gunicorn 마스터 + 워커)"""
+    pids = [pid]
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # comm에 공백이 있을 수 있으므로 마지막 ')' 뒤에서 ppid를 읽음
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            pids.append(int(entry))
+    return pids
+
+
+def memory_kb(pid: int):
+    """앱 프로세스 전체의 현재 RSS와 최대 RSS 합계 (KB, /proc이 없으면 None)"""
+    rss = peak = 0
+    for child in process_tree(pid):
+        try:
+            with open(f"/proc/{child}/status") as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss += int(line.split()[1])
+                    elif line.startswith('VmHWM:'):
+                        peak += int(line.split()[1])
+        except OSError:
+            return None
+    return {'rss_kb': rss, 'peak_rss_kb': peak}
+
+
+def make_request(endpoint: str, base_url: str, i: int, args):
+    """엔드포인트별 요청 함수 반환 (세션을 받아 응답 본문까지 모두 읽음)"""
+    user = user_id(i % args.users)
+    today = datetime.date.today()
+    start = datetime.datetime.combine(today, datetime.time.min)
+    end = start + datetime.timedelta(days=args.range_days)
+    if endpoint == 'calendar':
+        return lambda session: session.get(f"{base_url}/calendar", params={
+            'start_date': start.isoformat(), 'end_date': end.isoformat(), 'user_id': user
+        })
+    if endpoint == 'query_calendar':
+        return lambda session: session.post(f"{base_url}/query_calendar", json={
+            'start_time': start.isoformat(), 'end_time': end.isoformat(), 'user_id': user
+        })
+    if endpoint == 'ask_gpt':
+        return lambda session: session.post(f"{base_url}/ask_gpt", json={'query': args.query, 'user_id': user})
+    if endpoint == 'ask_gpt_stream':
+        return lambda session: session.post(f"{base_url}/ask_gpt?stream=1", json={'query': args.query, 'user_id': user})
+    raise ValueError(f"알 수 없는 엔드포인트: {endpoint}")
+
+
+def percentile(sorted_values, q: float):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def is_error_body(response):
+    """200 응답이지만 본문이 실패를 나타내는 경우 (JSON status=error 또는 SSE error 이벤트)"""
+    if response.headers.get('Content-Type', '').startswith('text/event-stream'):
+        return b'event: error' in response.content
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    # error 키가 있어도 값이 비어 있으면 (예: "error": null) 실패로 보지 않음
+    return isinstance(body, dict) and (body.get('status') == 'error' or bool(body.get('error')))
+
+
+def run_endpoint(endpoint: str, base_url: str, args):
+    """warmup 후 concurrency개 스레드로 requests개 요청을 보내고 지연 분포 계산"""
+    local = threading.local()
+
+    def send(i):
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        request = make_request(endpoint, base_url, i, args)
+        started = time.perf_counter()
+        try:
+            response = request(session)
+            ok = response.status_code < 400 and not is_error_body(response)
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(send, range(args.warmup)))
+        started = time.perf_counter()
+        results = list(executor.map(send, range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    to_ms = lambda value: round(value * 1000, 2) if value is not None else None
+    return {
+        'requests': len(results),
+        'errors': errors,
+        'throughput_rps': round(len(results) / elapsed, 2) if elapsed else None,
+        'latency_ms': {
+            'mean': to_ms(statistics.fmean(latencies)) if latencies else None,
+            'p50': to_ms(percentile(latencies, 50)),
+            'p95': to_ms(percentile(latencies, 95)),
+            'p99': to_ms(percentile(latencies, 99)),
+            'max': to_ms(latencies[-1]) if latencies else None
+        }
+    }
+
+
+def compare(report: dict, baseline: dict):
+    """엔드포인트별 지연/처리량 변화율 (%) (양수 지연 = 느려짐, 음수 처리량 = 줄어듦)"""
+    result = {}
+    for endpoint, current in report['results'].items():
+        previous = baseline.get('results', {}).get(endpoint)
+        if not previous:
+            continue
+        change = lambda new, old: round((new - old) / old * 100, 1) if new is not None and old else None
+        result[endpoint] = {
+            key: change(current['latency_ms'][key], previous['latency_ms'][key])
+            for key in ('p50', 'p95', 'p99')
+        }
+        result[endpoint]['throughput_rps'] = change(current['throughput_rps'], previous['throughput_rps'])
+    return {'baseline_revision': baseline.get('revision'), 'change_pct': result}
+
+
+def main():
+    parser = add_arguments(argparse.ArgumentParser(description='오프라인 엔드포인트 부하 벤치마크'))
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help=f"측정할 엔드포인트 (쉼표 구분: {', '.join(ENDPOINTS)})")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=200, help='엔드포인트당 측정 요청 수')
+    parser.add_argument('--warmup', type=int, default=20, help='측정 전 요청 수')
+    parser.add_argument('--users', type=int, default=50, help='요청을 나눠 보낼 사용자 수')
+    parser.add_argument('--range-days', type=int, default=1, help='조회 기간 (일)')
+    parser.add_argument('--query', default='오늘 일정 알려줘', help='/ask_gpt 질문')
+    parser.add_argument('--workers', type=int, default=1, help='gunicorn 워커 수')
+    parser.add_argument('--threads', type=int, default=40, help='gunicorn 워커당 스레드 수')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--redis-url', help='가짜 Redis 대신 사용할 Redis 주소 (기존 데이터가 섞이지 않도록 전용 DB 권장)')
+    parser.add_argument('--app-log', help='앱 stdout/stderr를 저장할 파일')
+    parser.add_argument('--output', help='결과 JSON 파일')
+    parser.add_argument('--compare', help='비교할 이전 결과 JSON 파일')
+    parser.add_argument('--max-regression', type=float, help='p95 지연이 이 비율(%%) 이상 늘면 실패')
+    args = parser.parse_args()
+
+    endpoints = [name.strip() for name in args.endpoints.split(',') if name.strip()]
+    fakes, addresses = start_fake_upstreams(args)
+    app = None
+    try:
+        seed_tokens(addresses['redis'], f"{addresses['google']}/token", args.users)
+        app, base_url = start_app(args, addresses, args.port)
+        results = {}
+        for endpoint in endpoints:
+            results[endpoint] = run_endpoint(endpoint, base_url, args)
+            results[endpoint]['memory'] = memory_kb(app.pid)
+    finally:
+        if app:
+            app.terminate()
+            app.wait(timeout=15)
+        fakes.terminate()
+        fakes.wait(timeout=5)
+
+    report = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'revision': git_revision(),
+        'python': sys.version.split()[0],
+        'config': {
+            key: getattr(args, key) for key in (
+                'concurrency', 'requests', 'warmup', 'users', 'range_days', 'query', 'workers', 'threads',
+                'events', 'calendars', 'days', 'summary_bytes', 'google_latency_ms', 'openai_latency_ms', 'jitter_ms',
+                'answer_chars', 'stream_chunks', 'stream_delay_ms'
+            )
+        },
+        'results': results
+    }
+    failed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            report['comparison'] = compare(report, json.load(f))
+        if args.max_regression is not None:
+            failed = any(
+                (change['p95'] or 0) > args.max_regression
+                for change in report['comparison']['change_pct'].values()
+            )
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
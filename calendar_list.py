@@ -0,0 +1,92 @@
+import os
+import json
+import threading
+
+import redis
+
+import auth_manager
+from google_events import list_calendar_ids
+from metrics import record_upstream_error
+
+# 캘린더 목록 캐시 설정 (환경 변수 또는 기본값 사용)
+MULTI_CALENDAR_ENABLED = os.getenv('MULTI_CALENDAR_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 캘린더 목록은 거의 바뀌지 않으므로 이 시간 동안 calendarList를 다시 호출하지 않음
+CALENDAR_LIST_TTL = int(os.getenv('CALENDAR_LIST_TTL', '600'))
+
+
+class CalendarListCache:
+    """
+    사용자별 조회 대상 캘린더 ID 목록 캐시 (Redis, TTL)
+    로그아웃 시 모든 캘린더의 일정 저장소를 지울 수 있도록 한 번이라도 조회한 캘린더 ID도 함께 기록
+    """
+
+    def __init__(self, ttl=CALENDAR_LIST_TTL, enabled=MULTI_CALENDAR_ENABLED):
+        self.ttl = ttl
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def key(self, platform: str, user_id: str):
+        return f"calendars:{platform}:{user_id}"
+
+    def known_key(self, platform: str, user_id: str):
+        return f"calendars_known:{platform}:{user_id}"
+
+    def get_calendar_ids(self, service, platform: str, user_id: str):
+        """조회할 캘린더 ID 목록 ('primary'가 맨 앞, 목록 조회 실패 시 기본 캘린더만)"""
+        if not self.enabled or not user_id:
+            return ['primary']
+        try:
+            cached = auth_manager.get_redis_client().get(self.key(platform, user_id))
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 캘린더 목록 캐시 조회 실패: {str(e)}")
+            record_upstream_error('redis', e)
+            cached = None
+        if cached:
+            with self._lock:
+                self.hits += 1
+            return json.loads(cached)
+
+        with self._lock:
+            self.misses += 1
+        try:
+            calendar_ids = list_calendar_ids(service)
+        except Exception as e:
+            # 공유 캘린더를 못 보더라도 기본 캘린더 조회는 계속함 (다음 요청에서 다시 시도)
+            print(f"[API ERROR] 캘린더 목록 조회 실패, 기본 캘린더만 조회: {str(e)}")
+            with self._lock:
+                self.failures += 1
+            return ['primary']
+
+        try:
+            pipe = auth_manager.get_redis_client().pipeline()
+            pipe.set(self.key(platform, user_id), json.dumps(calendar_ids), ex=self.ttl)
+            pipe.sadd(self.known_key(platform, user_id), *calendar_ids)
+            pipe.execute()
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 캘린더 목록 캐시 저장 실패: {str(e)}")
+            record_upstream_error('redis', e)
+        return calendar_ids
+
+    def forget(self, platform: str, user_id: str):
+        """캐시 삭제 후 지금까지 조회한 캘린더 ID 목록 반환 (로그아웃)"""
+        pipe = auth_manager.get_redis_client().pipeline()
+        pipe.smembers(self.known_key(platform, user_id))
+        pipe.delete(self.key(platform, user_id), self.known_key(platform, user_id))
+        known, _ = pipe.execute()
+        return ['primary'] + sorted(set(known) - {'primary'})
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures
+            }
+
+
+calendar_list_cache = CalendarListCache()
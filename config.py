@@ -0,0 +1,70 @@
+import os
+import threading
+from dataclasses import dataclass, fields
+from typing import Optional
+
+# 기본 OAuth 리디렉션 주소 (Cloud Run 배포 주소)
+DEFAULT_GOOGLE_REDIRECT_URI = "https://ai-secretary-148126309509.asia-northeast3.run.app/oauth2callback"
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """
+    외부 서비스 자격 증명 등 앱 설정 (시작 시 한 번 환경 변수에서 읽어 검증)
+    요청 처리 중에는 os.getenv 대신 get_config()로 이 객체를 사용
+    """
+
+    google_client_id: Optional[str] = None
+    google_project_id: Optional[str] = None
+    google_client_secret: Optional[str] = None
+    google_redirect_uri: str = DEFAULT_GOOGLE_REDIRECT_URI
+    openai_api_key: Optional[str] = None
+    secret_key: Optional[str] = None
+
+    # 없으면 요청을 처리할 수 없는 설정 (필드 이름 → 환경 변수 이름)
+    REQUIRED = {
+        'google_client_id': 'GOOGLE_CLIENT_ID',
+        'google_project_id': 'GOOGLE_PROJECT_ID',
+        'google_client_secret': 'GOOGLE_CLIENT_SECRET',
+        'openai_api_key': 'OPENAI_API_KEY'
+    }
+
+    @classmethod
+    def from_env(cls, environ=None):
+        """환경 변수에서 설정 생성 (빈 문자열은 설정되지 않은 것으로 봄)"""
+        environ = os.environ if environ is None else environ
+        values = {}
+        for field in fields(cls):
+            value = (environ.get(field.name.upper()) or '').strip()
+            if value:
+                values[field.name] = value
+        return cls(**values)
+
+    @property
+    def missing(self):
+        """설정되지 않은 필수 환경 변수 이름 목록"""
+        return [env for name, env in self.REQUIRED.items() if not getattr(self, name)]
+
+
+_config = None
+_config_lock = threading.Lock()
+
+
+def load_config(environ=None):
+    """환경 변수에서 설정을 다시 읽어 프로세스 설정으로 사용 (앱 시작 시 호출)"""
+    global _config
+    config = AppConfig.from_env(environ)
+    with _config_lock:
+        _config = config
+    if config.missing:
+        print(f"[CONFIG ERROR] 필수 환경 변수가 설정되지 않음: {', '.join(config.missing)}")
+    return config
+
+
+def get_config():
+    """프로세스 설정 반환 (아직 읽지 않았으면 환경 변수에서 읽음)"""
+    config = _config
+    if config is None:
+        # 동시에 처음 호출돼도 같은 환경 변수에서 같은 설정을 만들므로 안전
+        config = load_config()
+    return config
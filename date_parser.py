@@ -0,0 +1,251 @@
+import os
+import re
+import threading
+import datetime
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+# 상대 날짜 계산 기준 시간대 (환경 변수 또는 기본값 사용)
+CALENDAR_TIMEZONE = os.getenv('CALENDAR_TIMEZONE', 'Asia/Seoul')
+
+WEEKDAYS = {
+    '월': 0, '화': 1, '수': 2, '목': 3, '금': 4, '토': 5, '일': 6,
+    'monday': 0, 'tuesday': 1, 'wednesday': 2, 'thursday': 3,
+    'friday': 4, 'saturday': 5, 'sunday': 6,
+    'mon': 0, 'tue': 1, 'wed': 2, 'thu': 3, 'fri': 4, 'sat': 5, 'sun': 6,
+}
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'jun': 6, 'jul': 7, 'aug': 8,
+    'sep': 9, 'sept': 9, 'oct': 10, 'nov': 11, 'dec': 12,
+}
+
+# 단일 날짜 오프셋 표현
+DAY_OFFSETS = {
+    '오늘': 0, '금일': 0, 'today': 0,
+    '내일모레': 2, '모레': 2, 'day after tomorrow': 2, '글피': 3,
+    '내일': 1, '명일': 1, 'tomorrow': 1,
+    '그저께': -2, '그제': -2, 'day before yesterday': -2,
+    '어제': -1, 'yesterday': -1,
+}
+
+# 주/월 단위 상대 표현 (0: 이번, 1: 다음, -1: 지난)
+RELATIVE_PREFIX = {
+    '이번': 0, '금': 0, 'this': 0,
+    '다음': 1, '담': 1, '차': 1, 'next': 1,
+    '지난': -1, '저번': -1, 'last': -1,
+}
+
+_WEEKDAY_KO = r'(?P<wd_ko>[월화수목금토일])요일'
+_WEEKDAY_EN = r'(?P<wd_en>monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)'
+_MONTH_EN = r'(?P<mon_en>' + '|'.join(sorted(MONTHS, key=len, reverse=True)) + r')'
+
+# 매칭 순서가 중요함 (긴 표현을 먼저 검사해 "이번 주 월요일"이 "이번 주"로 잘리지 않도록 함)
+PATTERNS = [
+    ('iso_date', re.compile(r'(?P<y>\d{4})[-./](?P<m>\d{1,2})[-./](?P<d>\d{1,2})')),
+    ('ko_full_date', re.compile(r'(?P<y>\d{4})\s*년\s*(?P<m>\d{1,2})\s*월\s*(?P<d>\d{1,2})\s*일')),
+    ('ko_date', re.compile(r'(?P<m>\d{1,2})\s*월\s*(?P<d>\d{1,2})\s*일')),
+    ('en_date', re.compile(_MONTH_EN + r'\.?\s+(?P<d>\d{1,2})(?:st|nd|rd|th)?\b')),
+    ('en_date_rev', re.compile(r'\b(?P<d>\d{1,2})(?:st|nd|rd|th)?\s+' + _MONTH_EN + r'\b')),
+    ('slash_date', re.compile(r'(?<![\d/])(?P<m>\d{1,2})/(?P<d>\d{1,2})(?![\d/])')),
+    ('ko_week_weekday', re.compile(r'(?P<rel>이번|다음|지난|저번|담|차|금)\s*주\s*' + _WEEKDAY_KO)),
+    ('en_week_weekday', re.compile(r'\b(?P<rel>this|next|last)\s+' + _WEEKDAY_EN + r'\b')),
+    # "이번 주 말고"의 "주 말"은 주말이 아님
+    ('ko_weekend', re.compile(r'(?P<rel>이번|다음|지난|저번|담|차)?\s*주\s*말(?!고)')),
+    ('en_weekend', re.compile(r'\b(?:(?P<rel>this|next|last)\s+)?weekend\b')),
+    ('ko_week', re.compile(r'(?P<rel>이번|다음|지난|저번|담|차|금)\s*주(?!\s*말(?!고))')),
+    ('en_week', re.compile(r'\b(?P<rel>this|next|last)\s+week\b')),
+    ('ko_month', re.compile(r'(?P<rel>이번|다음|지난|저번|담)\s*달')),
+    ('en_month', re.compile(r'\b(?P<rel>this|next|last)\s+month\b')),
+    ('ko_days_later', re.compile(r'(?P<n>\d{1,3})\s*일\s*(?P<dir>후|뒤|전)')),
+    ('en_days_later', re.compile(r'\bin\s+(?P<n>\d{1,3})\s+days?\b')),
+    ('en_days_ago', re.compile(r'\b(?P<n>\d{1,3})\s+days?\s+ago\b')),
+    ('day_offset', re.compile('|'.join(re.escape(k) for k in sorted(DAY_OFFSETS, key=len, reverse=True)))),
+    ('ko_weekday', re.compile(_WEEKDAY_KO)),
+    ('en_weekday', re.compile(r'\b' + _WEEKDAY_EN + r'\b')),
+]
+
+# 시각이 명시된 쿼리는 하루 전체가 아니라 시간대 범위가 필요하므로 GPT에 맡김 ("1시간" 같은 길이 표현은 제외)
+TIME_OF_DAY = re.compile(
+    r'\d{1,2}\s*시(?!간)|\d{1,2}:\d{2}|오전|오후|아침|점심|저녁|새벽|밤|\b\d{1,2}\s*(?:am|pm)\b|\b(?:morning|afternoon|evening|night|noon)\b'
+)
+# 날짜 표현 바로 뒤에 오면 그 기간을 제외하라는 뜻이므로 GPT에 맡김 ("주말 말고 평일 일정")
+NEGATION = re.compile(r'\s*(?:말고|빼고|제외)')
+RANGE_CONNECTOR = re.compile(r'부터|~|\buntil\b|\bto\b|\bthrough\b|까지|\s-\s')
+
+
+class DateParseStats:
+    """날짜 해석 경로(로컬 파서 / 캐시 / GPT)별 횟수 (GPT 회피율 추적용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.local = 0
+        self.cache = 0
+        self.gpt = 0
+
+    def record(self, source: str):
+        with self._lock:
+            if source == 'local':
+                self.local += 1
+            elif source == 'cache':
+                self.cache += 1
+            else:
+                self.gpt += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.local + self.cache + self.gpt
+            return {
+                'local': self.local,
+                'cache': self.cache,
+                'gpt': self.gpt,
+                'gpt_avoidance_rate': round((self.local + self.cache) / total, 4) if total else 0.0
+            }
+
+
+date_parse_stats = DateParseStats()
+
+
+def get_timezone():
+    return ZoneInfo(CALENDAR_TIMEZONE)
+
+
+def parse_datetime(value: str, tz=None) -> datetime.datetime:
+    """ISO 8601 문자열을 aware datetime으로 변환 (시간대가 없으면 캘린더 시간대로 간주)"""
+    parsed = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=tz or get_timezone())
+    return parsed
+
+
+def _day_range(day: datetime.date, tz, days: int = 1):
+    """하루(또는 여러 날) 전체 범위: 00:00:00 ~ 마지막 날 23:59:59"""
+    start = datetime.datetime.combine(day, datetime.time.min, tzinfo=tz)
+    end = datetime.datetime.combine(day + timedelta(days=days - 1), datetime.time(23, 59, 59), tzinfo=tz)
+    return start, end
+
+
+def _relative(value):
+    if value is None:
+        return 0
+    return RELATIVE_PREFIX.get(value.strip(), 0)
+
+
+def _safe_date(year: int, month: int, day: int):
+    try:
+        return datetime.date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _month_day(today: datetime.date, month: int, day: int):
+    """연도가 없는 날짜는 올해 기준 (이미 지난 지 오래된 날짜도 올해로 처리)"""
+    return _safe_date(today.year, month, day)
+
+
+def _resolve(kind: str, m, today: datetime.date, tz):
+    """매칭 종류별로 (start, end) 계산, 해석할 수 없으면 None"""
+    g = m.groupdict()
+    if kind in ('iso_date', 'ko_full_date'):
+        day = _safe_date(int(g['y']), int(g['m']), int(g['d']))
+        return _day_range(day, tz) if day else None
+    if kind in ('ko_date', 'slash_date'):
+        day = _month_day(today, int(g['m']), int(g['d']))
+        return _day_range(day, tz) if day else None
+    if kind in ('en_date', 'en_date_rev'):
+        day = _month_day(today, MONTHS[g['mon_en']], int(g['d']))
+        return _day_range(day, tz) if day else None
+    if kind in ('ko_week_weekday', 'en_week_weekday'):
+        weekday = WEEKDAYS[g.get('wd_ko') or g.get('wd_en')]
+        monday = today - timedelta(days=today.weekday()) + timedelta(weeks=_relative(g['rel']))
+        return _day_range(monday + timedelta(days=weekday), tz)
+    if kind in ('ko_weekend', 'en_weekend'):
+        saturday = today - timedelta(days=today.weekday()) + timedelta(days=5, weeks=_relative(g['rel']))
+        return _day_range(saturday, tz, days=2)
+    if kind in ('ko_week', 'en_week'):
+        monday = today - timedelta(days=today.weekday()) + timedelta(weeks=_relative(g['rel']))
+        return _day_range(monday, tz, days=7)
+    if kind in ('ko_month', 'en_month'):
+        month_index = today.year * 12 + (today.month - 1) + _relative(g['rel'])
+        first = datetime.date(month_index // 12, month_index % 12 + 1, 1)
+        next_index = month_index + 1
+        next_first = datetime.date(next_index // 12, next_index % 12 + 1, 1)
+        return _day_range(first, tz, days=(next_first - first).days)
+    if kind == 'ko_days_later':
+        sign = -1 if g['dir'] == '전' else 1
+        return _day_range(today + timedelta(days=sign * int(g['n'])), tz)
+    if kind == 'en_days_later':
+        return _day_range(today + timedelta(days=int(g['n'])), tz)
+    if kind == 'en_days_ago':
+        return _day_range(today - timedelta(days=int(g['n'])), tz)
+    if kind == 'day_offset':
+        return _day_range(today + timedelta(days=DAY_OFFSETS[m.group(0)]), tz)
+    if kind in ('ko_weekday', 'en_weekday'):
+        # 요일만 언급되면 오늘 이후 가장 가까운 해당 요일
+        weekday = WEEKDAYS[g.get('wd_ko') or g.get('wd_en')]
+        return _day_range(today + timedelta(days=(weekday - today.weekday()) % 7), tz)
+    return None
+
+
+def _find_expressions(text: str):
+    """쿼리에서 날짜 표현을 겹치지 않게 순서대로 찾음"""
+    found = []
+    taken = [False] * len(text)
+    for kind, pattern in PATTERNS:
+        for m in pattern.finditer(text):
+            if any(taken[m.start():m.end()]):
+                continue
+            for i in range(m.start(), m.end()):
+                taken[i] = True
+            found.append((m.start(), kind, m))
+    found.sort(key=lambda item: item[0])
+    return found
+
+
+def parse_date_range(query: str, now: datetime.datetime = None):
+    """
+    자주 쓰는 한국어/영어 날짜 표현을 로컬에서 해석
+    extract_date_range와 같은 {start_time, end_time} 형태를 반환하고,
+    확신할 수 없는 경우(표현 없음, 시각 지정, 모호한 복수 표현)에는 None 반환
+    """
+    if not query:
+        return None
+    tz = get_timezone()
+    if now is None:
+        now = datetime.datetime.now(tz)
+    elif now.tzinfo is None:
+        now = now.replace(tzinfo=tz)
+    else:
+        now = now.astimezone(tz)
+    today = now.date()
+
+    text = query.strip().lower()
+    if TIME_OF_DAY.search(text):
+        return None
+
+    expressions = _find_expressions(text)
+    if not expressions:
+        return None
+    if any(NEGATION.match(text, m.end()) for _, _, m in expressions):
+        return None
+
+    ranges = [_resolve(kind, m, today, tz) for _, kind, m in expressions]
+    if any(r is None for r in ranges):
+        return None
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+    elif len(ranges) == 2 and RANGE_CONNECTOR.search(text):
+        # "내일부터 금요일까지" 같은 구간 표현
+        start, end = ranges[0][0], ranges[1][1]
+        if end < start:
+            return None
+    else:
+        return None
+
+    return {
+        'start_time': start.isoformat(),
+        'end_time': end.isoformat()
+    }
@@ -0,0 +1,116 @@
+import os
+import re
+import json
+import hashlib
+import threading
+import time
+import datetime
+from collections import OrderedDict
+
+import redis
+
+import auth_manager
+from date_parser import get_timezone
+from metrics import record_upstream_error
+
+# 프로세스 내 L1 캐시 크기 (환경 변수 또는 기본값 사용)
+DATE_RANGE_L1_MAX_SIZE = int(os.getenv('DATE_RANGE_L1_MAX_SIZE', '1024'))
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?!.~…]+$')
+
+
+def normalize_query(query: str) -> str:
+    """캐시 키용 쿼리 정규화 (대소문자, 공백, 끝 문장부호 무시)"""
+    text = _WHITESPACE.sub(' ', query.strip().lower())
+    return _TRAILING_PUNCTUATION.sub('', text)
+
+
+def seconds_until_midnight(now: datetime.datetime) -> int:
+    """현지 자정까지 남은 초 ("내일"의 의미가 바뀌는 시점)"""
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min, tzinfo=now.tzinfo)
+    return max(1, int((midnight - now).total_seconds()))
+
+
+class DateRangeCache:
+    """extract_date_range 결과 캐시 (L1: 프로세스 메모리, L2: Redis), 현지 자정에 만료"""
+
+    def __init__(self, max_size=DATE_RANGE_L1_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+
+    def make_key(self, query: str, now: datetime.datetime) -> str:
+        """정규화된 쿼리 + 기준 날짜 + 시간대 기반 키"""
+        digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+        return f"date_range:{now.tzinfo}:{now.date().isoformat()}:{digest}"
+
+    def get(self, query: str, now: datetime.datetime = None):
+        """캐시된 날짜 범위 반환 (없으면 None)"""
+        now = now or datetime.datetime.now(get_timezone())
+        key = self.make_key(query, now)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.l1_hits += 1
+                    return dict(value)
+                del self._entries[key]
+
+        try:
+            cached = auth_manager.get_redis_client().get(key)
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 날짜 범위 캐시 조회 실패: {str(e)}")
+            record_upstream_error('redis', e)
+            cached = None
+        if not cached:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        value = json.loads(cached)
+        self._store_l1(key, value, now)
+        with self._lock:
+            self.l2_hits += 1
+        return dict(value)
+
+    def set(self, query: str, value: dict, now: datetime.datetime = None):
+        """날짜 범위 저장 (현지 자정에 만료)"""
+        now = now or datetime.datetime.now(get_timezone())
+        key = self.make_key(query, now)
+        self._store_l1(key, value, now)
+        try:
+            auth_manager.get_redis_client().set(key, json.dumps(value), ex=seconds_until_midnight(now))
+        except redis.RedisError as e:
+            print(f"[CACHE ERROR] 날짜 범위 캐시 저장 실패: {str(e)}")
+            record_upstream_error('redis', e)
+
+    def _store_l1(self, key: str, value: dict, now: datetime.datetime):
+        expires_at = time.time() + seconds_until_midnight(now)
+        with self._lock:
+            self._entries[key] = (dict(value), expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'l1_hits': self.l1_hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses
+            }
+
+
+date_range_cache = DateRangeCache()
@@ -0,0 +1,321 @@
+import os
+import json
+import time
+import datetime
+
+import auth_manager
+from date_parser import get_timezone
+from google_events import iter_event_pages, MAX_EVENTS_PAGE_SIZE
+from metrics import track_stage
+
+# 증분 동기화 설정 (환경 변수 또는 기본값 사용)
+EVENT_SYNC_ENABLED = os.getenv('EVENT_SYNC_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 마지막 동기화 후 이 시간(초) 안에는 Google을 호출하지 않고 저장된 일정만 사용
+EVENT_SYNC_STALENESS_SECONDS = float(os.getenv('EVENT_SYNC_STALENESS_SECONDS', '30'))
+# 처음 조회할 때 요청 기간과 함께 받아 둘 기본 기간 (오늘 기준 과거/미래 일수)
+EVENT_SYNC_PAST_DAYS = int(os.getenv('EVENT_SYNC_PAST_DAYS', '30'))
+EVENT_SYNC_FUTURE_DAYS = int(os.getenv('EVENT_SYNC_FUTURE_DAYS', '90'))
+# 이보다 긴 일정은 종료 시각 인덱스에 따로 저장 (시작 시각 인덱스는 조회 시작 - 이 길이부터만 훑음)
+EVENT_INDEX_LONG_SECONDS = int(os.getenv('EVENT_INDEX_LONG_SECONDS', '86400'))
+# 기록해 둘 최대 조회 구간 수 (넘으면 오래된 구간부터 잊음)
+EVENT_COVERAGE_MAX_WINDOWS = 64
+
+# 기간 조회: 시작 시각 인덱스와 긴 일정의 종료 시각 인덱스에서 ID를 찾아 본문을 한 번에 읽음 (왕복 1회)
+# KEYS: 시작 인덱스, 긴 일정 종료 인덱스, 본문 해시
+# ARGV: 시작 인덱스 최소 점수, 조회 종료(미포함), 조회 시작(미포함)
+QUERY_SCRIPT = """
+local ids = redis.call('ZRANGEBYSCORE', KEYS[1], ARGV[1], '(' .. ARGV[2])
+for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '(' .. ARGV[3], '+inf')) do
+    ids[#ids + 1] = id
+end
+local bodies = {}
+for i = 1, #ids, 1000 do
+    local values = redis.call('HMGET', KEYS[3], unpack(ids, i, math.min(i + 999, #ids)))
+    for _, value in ipairs(values) do
+        if value then
+            bodies[#bodies + 1] = value
+        end
+    end
+end
+return bodies
+"""
+
+
+class FullSyncRequired(Exception):
+    """syncToken이 만료되어(410 Gone) 전체 동기화가 필요함"""
+
+
+def parse_event_time(value: dict, tz=None) -> datetime.datetime:
+    """이벤트 start/end 필드를 aware datetime으로 변환 (종일 일정은 캘린더 시간대 자정 기준)"""
+    if 'dateTime' in value:
+        return datetime.datetime.fromisoformat(value['dateTime'].replace('Z', '+00:00'))
+    day = datetime.date.fromisoformat(value['date'])
+    return datetime.datetime.combine(day, datetime.time.min, tzinfo=tz or get_timezone())
+
+
+def event_bounds(event: dict, tz=None):
+    """이벤트의 (시작, 종료) 시각"""
+    start = parse_event_time(event['start'], tz)
+    end = parse_event_time(event.get('end', event['start']), tz)
+    return start, end
+
+
+def encode_event(event: dict) -> str:
+    """
+    저장용 압축 형식: [id, summary, start, end, status, recurringEventId, transparency]
+    필드 이름 없이 위치로 구분하고 끝의 빈 값은 생략 (start/end는 dateTime 또는 date 문자열)
+    """
+    end = event.get('end', event['start'])
+    fields = [
+        event['id'],
+        event.get('summary'),
+        event['start'].get('dateTime') or event['start']['date'],
+        end.get('dateTime') or end['date'],
+        event.get('status'),
+        event.get('recurringEventId'),
+        event.get('transparency')
+    ]
+    while fields[-1] is None:
+        fields.pop()
+    return json.dumps(fields, ensure_ascii=False, separators=(',', ':'))
+
+
+def decode_event(raw: str) -> dict:
+    """encode_event 형식을 Google API 이벤트 형식으로 복원"""
+    fields = json.loads(raw)
+    fields += [None] * (7 - len(fields))
+    event_id, summary, start, end, status, recurring_event_id, transparency = fields
+    event = {
+        'id': event_id,
+        'start': {'dateTime': start} if 'T' in start else {'date': start},
+        'end': {'dateTime': end} if 'T' in end else {'date': end}
+    }
+    for name, value in (('summary', summary), ('status', status),
+                        ('recurringEventId', recurring_event_id), ('transparency', transparency)):
+        if value is not None:
+            event[name] = value
+    return event
+
+
+def subtract_windows(start: float, end: float, windows):
+    """[start, end)에서 windows [(시작, 종료), ...]가 덮지 않는 구간 목록"""
+    gaps = []
+    cursor = start
+    for window_start, window_end in sorted(windows):
+        if window_end <= cursor:
+            continue
+        if window_start >= end:
+            break
+        if window_start > cursor:
+            gaps.append((cursor, window_start))
+        cursor = max(cursor, window_end)
+    if cursor < end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class EventStore:
+    """
+    사용자별 일정 저장소 (Redis)
+    일정 본문은 해시에, ID는 시작 시각(긴 일정은 종료 시각) 점수의 sorted set에 저장해 기간 조회 시 해당 일정만 읽음
+    syncToken을 받은 기간은 변경분만 동기화하고, 그 밖의 기간은 조회한 구간을 기록해 두었다가 빠진 구간만 Google에서 받음
+    """
+
+    def __init__(self, platform: str, user_id: str, calendar_id: str = 'primary',
+                 staleness: float = None):
+        self.platform = platform
+        self.user_id = user_id
+        self.calendar_id = calendar_id
+        self.staleness = EVENT_SYNC_STALENESS_SECONDS if staleness is None else staleness
+        suffix = f"{platform}:{user_id}:{calendar_id}"
+        self.events_key = f"event_bodies:{suffix}"
+        self.starts_key = f"event_starts:{suffix}"
+        self.long_ends_key = f"event_long_ends:{suffix}"
+        self.sync_key = f"event_index:{suffix}"
+        # 이전 형식(전체 JSON 해시) 키: 새 인덱스를 만들 때 함께 지움
+        self.legacy_keys = (f"events:{suffix}", f"events_sync:{suffix}")
+
+    def get_events(self, service, start_date, end_date):
+        """필요하면 변경분과 빠진 구간을 받아온 뒤 저장소에서 기간 내 일정을 시작 시간 순으로 반환"""
+        state = self.ensure_fresh(service)
+        time_min = start_date.astimezone().timestamp()
+        time_max = end_date.astimezone().timestamp()
+        for gap_start, gap_end in self.missing_windows(state, time_min, time_max):
+            self._fetch_window(service, state, gap_start, gap_end)
+        with track_stage('event_store_query'):
+            return self.query(start_date, end_date)
+
+    def ensure_fresh(self, service):
+        """syncToken이 있고 마지막 동기화가 staleness보다 오래됐으면 증분 동기화 후 동기화 상태 반환"""
+        state = auth_manager.get_redis_client().hgetall(self.sync_key)
+        sync_token = state.get('sync_token')
+        if not sync_token or time.time() - float(state.get('synced_at', 0)) < self.staleness:
+            return state
+        try:
+            state.update(self._sync(service, sync_token))
+        except FullSyncRequired:
+            print(f"[SYNC] syncToken 만료, 저장소 초기화: {self.events_key}")
+            self.clear()
+            return {}
+        return state
+
+    def _sync(self, service, sync_token):
+        """syncToken 이후 변경분을 반영하고 갱신된 동기화 상태 반환"""
+        # service를 받았다면 googleapiclient는 이미 로드된 상태
+        from googleapiclient.errors import HttpError
+        changed = {}
+        removed = []
+        next_sync_token = None
+        try:
+            # 동기화는 전체 페이지를 다 읽으므로 왕복 횟수를 줄이기 위해 최대 페이지 크기 사용
+            pages = iter_event_pages(service, page_size=MAX_EVENTS_PAGE_SIZE,
+                                     calendarId=self.calendar_id, singleEvents=True, syncToken=sync_token)
+            for page in pages:
+                for event in page.get('items', []):
+                    if event.get('status') == 'cancelled':
+                        removed.append(event['id'])
+                        changed.pop(event['id'], None)
+                    else:
+                        changed[event['id']] = event
+                next_sync_token = page.get('nextSyncToken')
+        except HttpError as e:
+            if e.resp.status == 410:
+                raise FullSyncRequired() from e
+            raise
+
+        pipe = auth_manager.get_redis_client().pipeline()
+        self._remove(pipe, removed)
+        self._store(pipe, changed.values())
+        state = {'synced_at': time.time()}
+        if next_sync_token:
+            state['sync_token'] = next_sync_token
+        pipe.hset(self.sync_key, mapping=state)
+        pipe.execute()
+        print(f"[SYNC] 증분 동기화 완료: 변경 {len(changed)}건, 삭제 {len(removed)}건")
+        return state
+
+    def missing_windows(self, state: dict, time_min: float, time_max: float):
+        """
+        [time_min, time_max) 중 저장소가 최신 상태를 보장하지 못하는 구간 (epoch)
+        syncToken을 받은 기간과 staleness 이내에 조회한 구간은 제외하고, 나머지는 하루 단위로 넓혀 반환
+        """
+        now = time.time()
+        fresh = [tuple(window[:2]) for window in self._coverage(state) if now - window[2] < self.staleness]
+        if state.get('sync_token'):
+            fresh.append((float(state['token_start']), float(state['token_end'])))
+        gaps = subtract_windows(time_min, time_max, fresh)
+        if not gaps:
+            return []
+        if not state:
+            # 처음 조회하는 캘린더는 기본 기간도 받아 syncToken이 덮는 기간을 넓힘
+            # (멀리 떨어진 요청 기간과 한 구간으로 합치지 않고 따로 받음)
+            today = datetime.datetime.now(get_timezone()).replace(hour=0, minute=0, second=0, microsecond=0)
+            default_window = (
+                (today - datetime.timedelta(days=EVENT_SYNC_PAST_DAYS)).timestamp(),
+                (today + datetime.timedelta(days=EVENT_SYNC_FUTURE_DAYS)).timestamp()
+            )
+            gaps = sorted([default_window] + subtract_windows(time_min, time_max, [default_window]))
+        tz = get_timezone()
+        windows = []
+        for gap_start, gap_end in gaps:
+            day_start = datetime.datetime.fromtimestamp(gap_start, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+            day_end = datetime.datetime.fromtimestamp(gap_end, tz).replace(hour=0, minute=0, second=0, microsecond=0)
+            if day_end.timestamp() < gap_end:
+                day_end += datetime.timedelta(days=1)
+            window = (day_start.timestamp(), day_end.timestamp())
+            if windows and window[0] <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], window[1]))
+            else:
+                windows.append(window)
+        return windows
+
+    def _fetch_window(self, service, state: dict, window_start: float, window_end: float):
+        """구간의 일정을 Google에서 받아 저장소의 해당 구간을 교체하고 조회 구간 기록 (state도 갱신)"""
+        tz = get_timezone()
+        start_date = datetime.datetime.fromtimestamp(window_start, tz)
+        end_date = datetime.datetime.fromtimestamp(window_end, tz)
+        events = []
+        next_sync_token = None
+        pages = iter_event_pages(service, page_size=MAX_EVENTS_PAGE_SIZE, calendarId=self.calendar_id,
+                                 singleEvents=True, timeMin=start_date.isoformat(), timeMax=end_date.isoformat())
+        for page in pages:
+            events.extend(event for event in page.get('items', []) if event.get('status') != 'cancelled')
+            next_sync_token = page.get('nextSyncToken')
+
+        # 저장소에는 있는데 이번 응답에 없는 일정은 그 사이 삭제된 것
+        fetched_ids = {event['id'] for event in events}
+        stale_ids = [event['id'] for event in self.query(start_date, end_date) if event['id'] not in fetched_ids]
+
+        now = time.time()
+        coverage = [window for window in self._coverage(state) if now - window[2] < self.staleness]
+        coverage.append([window_start, window_end, now])
+        update = {'coverage': json.dumps(coverage[-EVENT_COVERAGE_MAX_WINDOWS:])}
+        if next_sync_token and not state.get('sync_token'):
+            update.update({'sync_token': next_sync_token, 'synced_at': now,
+                           'token_start': window_start, 'token_end': window_end})
+
+        pipe = auth_manager.get_redis_client().pipeline()
+        if not state:
+            pipe.delete(*self.legacy_keys)
+        self._remove(pipe, stale_ids)
+        self._store(pipe, events)
+        pipe.hset(self.sync_key, mapping=update)
+        pipe.execute()
+        state.update(update)
+        print(f"[SYNC] 구간 조회 완료: {start_date.date()} ~ {end_date.date()}, 일정 {len(events)}건, 삭제 {len(stale_ids)}건")
+
+    def _coverage(self, state: dict):
+        """조회 구간 기록 [[시작, 종료, 조회 시각], ...]"""
+        return json.loads(state.get('coverage') or '[]')
+
+    def _store(self, pipe, events):
+        """일정 본문 저장 후 길이에 따라 시작 시각 또는 종료 시각 인덱스에 등록 (다른 쪽 인덱스에서는 제거)"""
+        tz = get_timezone()
+        bodies = {}
+        starts = {}
+        long_ends = {}
+        for event in events:
+            event_start, event_end = event_bounds(event, tz)
+            bodies[event['id']] = encode_event(event)
+            if (event_end - event_start).total_seconds() > EVENT_INDEX_LONG_SECONDS:
+                long_ends[event['id']] = event_end.timestamp()
+            else:
+                starts[event['id']] = event_start.timestamp()
+        if bodies:
+            pipe.hset(self.events_key, mapping=bodies)
+        if starts:
+            pipe.zadd(self.starts_key, starts)
+            pipe.zrem(self.long_ends_key, *starts)
+        if long_ends:
+            pipe.zadd(self.long_ends_key, long_ends)
+            pipe.zrem(self.starts_key, *long_ends)
+
+    def _remove(self, pipe, event_ids):
+        if event_ids:
+            pipe.hdel(self.events_key, *event_ids)
+            pipe.zrem(self.starts_key, *event_ids)
+            pipe.zrem(self.long_ends_key, *event_ids)
+
+    def query(self, start_date, end_date):
+        """저장된 일정 중 [start_date, end_date) 구간과 겹치는 일정 (Google의 timeMin/timeMax와 동일한 규칙)"""
+        time_min = start_date.astimezone()
+        time_max = end_date.astimezone()
+        bodies = auth_manager.get_script(QUERY_SCRIPT)(
+            keys=[self.starts_key, self.long_ends_key, self.events_key],
+            args=[time_min.timestamp() - EVENT_INDEX_LONG_SECONDS, time_max.timestamp(), time_min.timestamp()]
+        )
+        tz = get_timezone()
+        matched = []
+        for raw in bodies:
+            event = decode_event(raw)
+            event_start, event_end = event_bounds(event, tz)
+            if event_start < time_max and event_end > time_min:
+                matched.append((event_start, event))
+        matched.sort(key=lambda item: item[0])
+        return [event for _, event in matched]
+
+    def clear(self):
+        """저장된 일정과 인덱스, 동기화 상태 삭제"""
+        auth_manager.get_redis_client().delete(
+            self.events_key, self.starts_key, self.long_ends_key, self.sync_key, *self.legacy_keys
+        )
@@ -0,0 +1,133 @@
+import os
+import datetime
+from collections import OrderedDict
+
+from date_parser import get_timezone
+from event_store import event_bounds
+
+# 최종 응답 생성 프롬프트에 넣을 일정 목록 토큰 예산 (환경 변수 또는 기본값 사용)
+EVENTS_PROMPT_TOKEN_BUDGET = int(os.getenv('EVENTS_PROMPT_TOKEN_BUDGET', '1200'))
+
+WEEKDAYS = ['월', '화', '수', '목', '금', '토', '일']
+
+try:
+    import tiktoken
+except ImportError:  # 선택 의존성: 없으면 글자 수로 추정
+    tiktoken = None
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """프롬프트 토큰 수 (tiktoken이 있으면 정확히, 없으면 ASCII 4자당 1토큰 / 한글 등은 1자당 1토큰으로 추정)"""
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding('cl100k_base')
+        return len(_encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ch.isascii())
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def format_day(day: datetime.date) -> str:
+    return f"{day.isoformat()} ({WEEKDAYS[day.weekday()]})"
+
+
+def format_time_range(start: datetime.datetime, end: datetime.datetime, all_day: bool) -> str:
+    """09:00-10:00 / 종일 / 종일(~03-22)처럼 짧게 표시"""
+    if all_day:
+        last_day = (end - datetime.timedelta(days=1)).date()
+        return '종일' if last_day <= start.date() else f"종일(~{last_day.strftime('%m-%d')})"
+    if end.date() != start.date():
+        return f"{start.strftime('%H:%M')}-{end.strftime('%m-%d %H:%M')}"
+    return f"{start.strftime('%H:%M')}-{end.strftime('%H:%M')}"
+
+
+def group_events(events: list, tz=None):
+    """
+    일정을 날짜별 줄 목록으로 묶음 ({날짜: [줄, ...]})
+    같은 반복 일정의 같은 시간대 인스턴스는 첫 날짜에 한 줄로 합침
+    """
+    tz = tz or get_timezone()
+    rows = []
+    recurring = {}
+    for event in events:
+        start, end = event_bounds(event, tz)
+        start, end = start.astimezone(tz), end.astimezone(tz)
+        all_day = 'date' in event['start']
+        time_range = format_time_range(start, end, all_day)
+        summary = event.get('summary') or '(제목 없음)'
+        series = event.get('recurringEventId')
+        if series:
+            key = (series, time_range, summary)
+            if key in recurring:
+                recurring[key]['days'].append(start.date())
+                continue
+            row = recurring[key] = {'day': start.date(), 'time': time_range, 'summary': summary, 'days': [start.date()]}
+        else:
+            row = {'day': start.date(), 'time': time_range, 'summary': summary, 'days': [start.date()]}
+        rows.append(row)
+
+    days = OrderedDict()
+    for row in sorted(rows, key=lambda r: r['day']):
+        line = f"- {row['time']} {row['summary']}"
+        if len(row['days']) > 1:
+            line += f" (반복 {len(row['days'])}회, ~{row['days'][-1].strftime('%m-%d')})"
+        days.setdefault(row['day'], []).append(line)
+    return days
+
+
+def build_events_prompt(events: list, start_time: str, end_time: str, budget: int = None, tz=None):
+    """
+    check_calendar 도구 응답 내용 생성 (날짜별 묶음, 짧은 시간 표기, 반복 일정 합침)
+    토큰 예산을 넘으면 남은 날짜들은 날짜별 일정 수로 요약
+    (내용, {'events', 'lines', 'omitted', 'tokens'}) 반환
+    """
+    budget = EVENTS_PROMPT_TOKEN_BUDGET if budget is None else budget
+    events = list(events or [])
+    header = f"조회한 기간: {start_time} ~ {end_time}\n"
+    if not events:
+        text = header + "해당 기간에 예정된 일정이 없습니다.\n"
+        return text, {'events': 0, 'lines': 0, 'omitted': 0, 'tokens': count_tokens(text)}
+
+    days = group_events(events, tz)
+    parts = [header + f"일정 {len(events)}건:\n"]
+    used = count_tokens(parts[0])
+    listed = 0
+    overflow = []
+    for day, lines in days.items():
+        if overflow:
+            overflow.append((day, len(lines)))
+            continue
+        day_header = format_day(day) + "\n"
+        header_cost = count_tokens(day_header)
+        # 날짜 제목만 남지 않도록 첫 일정까지 들어갈 때만 이 날짜를 나열
+        if used + header_cost + count_tokens(lines[0] + "\n") > budget:
+            overflow.append((day, len(lines)))
+            continue
+        parts.append(day_header)
+        used += header_cost
+        for i, line in enumerate(lines):
+            line += "\n"
+            cost = count_tokens(line)
+            if used + cost > budget:
+                overflow.append((day, len(lines) - i))
+                break
+            parts.append(line)
+            used += cost
+            listed += 1
+
+    omitted = sum(count for _, count in overflow)
+    if overflow:
+        counts = ", ".join(f"{day.strftime('%m-%d')} {count}건" for day, count in overflow[:14])
+        if len(overflow) > 14:
+            counts += f" 외 {len(overflow) - 14}일"
+        parts.append(f"(길이 제한으로 {omitted}개 항목 생략: {counts})\n")
+
+    text = "".join(parts)
+    return text, {
+        'events': len(events),
+        'lines': listed,
+        'omitted': omitted,
+        'tokens': count_tokens(text)
+    }
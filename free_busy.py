@@ -0,0 +1,250 @@
+import os
+import re
+import time
+import bisect
+import datetime
+import threading
+from collections import OrderedDict
+
+from date_parser import get_timezone
+from event_store import event_bounds
+from events_prompt import format_day
+from metrics import track_stage
+
+# 빈 시간 조회 설정 (환경 변수 또는 기본값 사용)
+# 하루 중 빈 시간을 찾을 시간대 (이 범위 밖은 비어 있어도 제안하지 않음)
+FREE_BUSY_DAY_START = os.getenv('FREE_BUSY_DAY_START', '09:00')
+FREE_BUSY_DAY_END = os.getenv('FREE_BUSY_DAY_END', '18:00')
+FREE_SLOT_MIN_MINUTES = int(os.getenv('FREE_SLOT_MIN_MINUTES', '30'))
+# 사용자별 바쁜 구간 인덱스 재사용 시간 (일정 저장소 동기화 주기와 같게 둠)
+FREE_BUSY_INDEX_TTL = float(os.getenv('FREE_BUSY_INDEX_TTL', '30'))
+FREE_BUSY_INDEX_MAX_SIZE = int(os.getenv('FREE_BUSY_INDEX_MAX_SIZE', '256'))
+# GPT 프롬프트에 넣을 최대 빈 시간 수
+FREE_SLOTS_PROMPT_LIMIT = 50
+
+# "한가위", "Freedom", "여유 자금", "회의 시간 있어?" 같은 일정 질문은 잡지 않도록 의도가 드러나는 형태만 허용
+_FREE_INTENT = re.compile(
+    r'비어\s*있|비었|비는\s*시간|빈\s*시간|한가(?:해|한|할|하|합)|여유\s*시간|언제\s*(?:시간\s*)?(?:돼|되|괜찮)'
+    r'|\b(?:free|available)\b',
+    re.IGNORECASE
+)
+_DURATION = re.compile(r'(\d+)\s*(시간|분)')
+
+
+def is_free_slot_query(query: str) -> bool:
+    """빈 시간을 묻는 질문인지 ("내일 언제 비어 있어?", "이번 주 빈 시간") - 날짜를 로컬에서 해석해 GPT가 도구를 고르지 않을 때 사용"""
+    return bool(_FREE_INTENT.search(query or ''))
+
+
+def parse_min_minutes(query: str, default: int = None):
+    """질문에 있는 최소 길이 ("1시간 30분" → 90, 없으면 기본값)"""
+    minutes = 0
+    for value, unit in _DURATION.findall(query or ''):
+        minutes += int(value) * (60 if unit == '시간' else 1)
+    return minutes or (FREE_SLOT_MIN_MINUTES if default is None else default)
+
+
+def parse_clock(value: str) -> datetime.time:
+    """'09:00' → time(9, 0) ('24:00'은 하루 끝)"""
+    if value in ('24:00', '24'):
+        return datetime.time.max
+    return datetime.time.fromisoformat(value if ':' in value else f"{int(value):02d}:00")
+
+
+class BusyIndex:
+    """
+    겹치는 일정을 합친 바쁜 구간 인덱스 (시작/종료 epoch 정렬 배열)
+    구간이 서로 겹치지 않으므로 starts와 ends가 모두 정렬되어 있어 이분 탐색으로 찾음
+    """
+
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, intervals):
+        self.starts = []
+        self.ends = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    @classmethod
+    def from_events(cls, events: list, tz=None):
+        """일정 목록으로 인덱스 생성 (취소된 일정과 '한가함'으로 표시된 일정은 제외)"""
+        tz = tz or get_timezone()
+        intervals = []
+        for event in events:
+            if event.get('status') == 'cancelled' or event.get('transparency') == 'transparent':
+                continue
+            start, end = event_bounds(event, tz)
+            intervals.append((start.timestamp(), end.timestamp()))
+        return cls(intervals)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def busy_between(self, start: float, end: float):
+        """[start, end)와 겹치는 바쁜 구간 목록"""
+        i = bisect.bisect_right(self.ends, start)
+        busy = []
+        while i < len(self.starts) and self.starts[i] < end:
+            busy.append((self.starts[i], self.ends[i]))
+            i += 1
+        return busy
+
+    def free_between(self, start: float, end: float, min_seconds: float):
+        """[start, end) 안의 min_seconds 이상 빈 구간 목록"""
+        free = []
+        cursor = start
+        for busy_start, busy_end in self.busy_between(start, end):
+            if busy_start - cursor >= min_seconds:
+                free.append((cursor, busy_start))
+            cursor = max(cursor, busy_end)
+        if end - cursor >= min_seconds:
+            free.append((cursor, end))
+        return free
+
+    def free_slots(self, start: datetime.datetime, end: datetime.datetime, min_minutes: int,
+                   day_start: datetime.time = None, day_end: datetime.time = None, tz=None):
+        """
+        기간 안의 min_minutes 이상 빈 시간 [(시작, 종료), ...]
+        day_start/day_end가 있으면 날마다 그 시간대 안에서만 찾음
+        """
+        tz = tz or get_timezone()
+        start, end = start.astimezone(tz), end.astimezone(tz)
+        if day_start is None or day_end is None:
+            windows = [(start, end)]
+        else:
+            windows = []
+            day = start.date()
+            while day <= end.date():
+                window_start = datetime.datetime.combine(day, day_start, tzinfo=tz)
+                if day_end == datetime.time.max:
+                    window_end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time.min, tzinfo=tz)
+                else:
+                    window_end = datetime.datetime.combine(day, day_end, tzinfo=tz)
+                windows.append((max(start, window_start), min(end, window_end)))
+                day += datetime.timedelta(days=1)
+
+        slots = []
+        for window_start, window_end in windows:
+            if window_end <= window_start:
+                continue
+            for slot_start, slot_end in self.free_between(window_start.timestamp(), window_end.timestamp(), min_minutes * 60):
+                slots.append((
+                    datetime.datetime.fromtimestamp(slot_start, tz),
+                    datetime.datetime.fromtimestamp(slot_end, tz)
+                ))
+        return slots
+
+
+class BusyIndexCache:
+    """(platform, user_id) 키 기반 바쁜 구간 인덱스 LRU + TTL 캐시 (인덱스를 만든 기간을 포함하는 조회에만 재사용)"""
+
+    def __init__(self, max_size=FREE_BUSY_INDEX_MAX_SIZE, ttl=FREE_BUSY_INDEX_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, platform: str, user_id: str, start: datetime.datetime, end: datetime.datetime):
+        key = (platform, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[3] <= time.monotonic() or not (entry[1] <= start and end <= entry[2]):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, platform: str, user_id: str, start: datetime.datetime, end: datetime.datetime, index: BusyIndex):
+        key = (platform, user_id)
+        with self._lock:
+            self._entries[key] = (index, start, end, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, platform: str, user_id: str):
+        with self._lock:
+            self._entries.pop((platform, user_id), None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+busy_index_cache = BusyIndexCache()
+
+
+def get_busy_index(service, user_id: str, platform: str, start: datetime.datetime, end: datetime.datetime):
+    """사용자의 기간 내 바쁜 구간 인덱스 (캐시에 없으면 일정 저장소의 일정으로 생성)"""
+    index = busy_index_cache.get(platform, user_id, start, end)
+    if index is not None:
+        return index
+    # main은 googleapiclient 관련 모듈을 함께 로드하므로 처음 사용할 때 import
+    from main import get_events
+    events = get_events(service, start, end, user_id=user_id, platform=platform)
+    with track_stage('busy_index_build'):
+        index = BusyIndex.from_events(events)
+    busy_index_cache.put(platform, user_id, start, end, index)
+    return index
+
+
+def find_free_slots(service, user_id: str, platform: str, start: datetime.datetime, end: datetime.datetime,
+                    min_minutes: int = None, day_start: str = None, day_end: str = None, now: datetime.datetime = None):
+    """
+    기간 안의 min_minutes 이상 빈 시간 목록 ({'start', 'end', 'minutes'})
+    지난 시간은 제외하고, 하루 중 day_start ~ day_end 시간대에서만 찾음
+    """
+    tz = get_timezone()
+    min_minutes = FREE_SLOT_MIN_MINUTES if min_minutes is None else min_minutes
+    now = now or datetime.datetime.now(tz)
+    index = get_busy_index(service, user_id, platform, start, end)
+    with track_stage('free_slots_query'):
+        slots = index.free_slots(
+            max(start, now), end, min_minutes,
+            parse_clock(day_start or FREE_BUSY_DAY_START), parse_clock(day_end or FREE_BUSY_DAY_END), tz
+        )
+    return [
+        {
+            'start': slot_start.isoformat(),
+            'end': slot_end.isoformat(),
+            'minutes': int((slot_end - slot_start).total_seconds() // 60)
+        }
+        for slot_start, slot_end in slots
+    ]
+
+
+def format_free_slots(slots: list, start_time: str, end_time: str, min_minutes: int) -> str:
+    """find_free_slots 도구 응답 내용 (날짜별로 묶은 빈 시간 목록)"""
+    header = (
+        f"조회한 기간: {start_time} ~ {end_time}\n"
+        f"{min_minutes}분 이상 빈 시간 (하루 {FREE_BUSY_DAY_START}-{FREE_BUSY_DAY_END} 기준):\n"
+    )
+    if not slots:
+        return header + "해당 기간에 조건에 맞는 빈 시간이 없습니다.\n"
+    lines = [header]
+    current_day = None
+    for slot in slots[:FREE_SLOTS_PROMPT_LIMIT]:
+        slot_start = datetime.datetime.fromisoformat(slot['start'])
+        slot_end = datetime.datetime.fromisoformat(slot['end'])
+        if slot_start.date() != current_day:
+            current_day = slot_start.date()
+            lines.append(format_day(current_day) + "\n")
+        lines.append(f"- {slot_start.strftime('%H:%M')}-{slot_end.strftime('%H:%M')} ({slot['minutes']}분)\n")
+    if len(slots) > FREE_SLOTS_PROMPT_LIMIT:
+        lines.append(f"(이후 {len(slots) - FREE_SLOTS_PROMPT_LIMIT}개 생략)\n")
+    return "".join(lines)
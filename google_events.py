@@ -0,0 +1,64 @@
+import os
+
+from metrics import track_stage
+
+# check_google_calendar와 GPT 프롬프트에 필요한 필드만 요청 (참석자, 설명, 회의 정보 등 제외)
+EVENT_FIELDS = 'id,status,summary,start,end,recurringEventId,transparency'
+# 페이지당 이벤트 수 (API 기본 250, 최대 2500)
+EVENTS_PAGE_SIZE = int(os.getenv('EVENTS_PAGE_SIZE', '250'))
+MAX_EVENTS_PAGE_SIZE = 2500
+
+
+def iter_event_pages(service, page_size=EVENTS_PAGE_SIZE, **params):
+    """events().list 응답 페이지를 nextPageToken을 따라 지연 조회 (부분 응답 fields 사용)"""
+    params.setdefault('fields', f'nextPageToken,nextSyncToken,items({EVENT_FIELDS})')
+    page_token = None
+    while True:
+        with track_stage('google_events_list'):
+            result = service.events().list(
+                maxResults=page_size,
+                pageToken=page_token,
+                **params
+            ).execute()
+        yield result
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return
+
+
+def iter_events(service, start_date, end_date, calendar_id='primary', page_size=EVENTS_PAGE_SIZE):
+    """기간 내 이벤트를 시작 시간 순으로 하나씩 반환 (필요한 만큼만 소비하면 이후 페이지는 요청하지 않음)"""
+    pages = iter_event_pages(
+        service,
+        page_size=page_size,
+        calendarId=calendar_id,
+        timeMin=start_date.astimezone().isoformat(),
+        timeMax=end_date.astimezone().isoformat(),
+        singleEvents=True,
+        orderBy='startTime',
+        fields=f'nextPageToken,items({EVENT_FIELDS})'
+    )
+    for page in pages:
+        yield from page.get('items', [])
+
+
+def list_calendar_ids(service):
+    """
+    사용자가 캘린더 목록에서 표시(selected)한 캘린더 ID 목록 (기본 캘린더는 'primary'로 맨 앞에)
+    숨긴 캘린더와 표시하지 않은 구독 캘린더는 제외
+    """
+    calendar_ids = ['primary']
+    page_token = None
+    while True:
+        with track_stage('google_calendar_list'):
+            result = service.calendarList().list(
+                pageToken=page_token,
+                fields='nextPageToken,items(id,primary,selected,hidden)'
+            ).execute()
+        for item in result.get('items', []):
+            if item.get('primary') or item.get('hidden') or not item.get('selected'):
+                continue
+            calendar_ids.append(item['id'])
+        page_token = result.get('nextPageToken')
+        if not page_token:
+            return calendar_ids
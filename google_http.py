@@ -0,0 +1,154 @@
+import os
+import threading
+
+from metrics import record_upstream_error
+
+
+# Google API 연결 풀 / 타임아웃 설정 (환경 변수 또는 기본값 사용)
+GOOGLE_HTTP_POOL_CONNECTIONS = int(os.getenv('GOOGLE_HTTP_POOL_CONNECTIONS', '4'))
+GOOGLE_HTTP_POOL_MAXSIZE = int(os.getenv('GOOGLE_HTTP_POOL_MAXSIZE', '32'))
+GOOGLE_HTTP_CONNECT_TIMEOUT = float(os.getenv('GOOGLE_HTTP_CONNECT_TIMEOUT', '3'))
+GOOGLE_HTTP_TIMEOUT = float(os.getenv('GOOGLE_HTTP_TIMEOUT', '10'))
+
+
+class PoolStats:
+    """Google API 전송 계층 사용량 (동시 요청 수, 누적 요청/오류 수)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.errors = 0
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finish(self, error: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            if error:
+                self.errors += 1
+
+    def stats(self):
+        with self._lock:
+            result = {
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'requests': self.requests,
+                'errors': self.errors,
+                'pool_maxsize': GOOGLE_HTTP_POOL_MAXSIZE
+            }
+        adapter = _adapter if _adapter_pid == os.getpid() else None
+        result['host_pools'] = len(adapter.poolmanager.pools) if adapter else 0
+        return result
+
+
+pool_stats = PoolStats()
+
+# 프로세스 전역 공유 어댑터 (urllib3 연결 풀은 스레드 안전)
+_adapter = None
+_adapter_pid = None
+_adapter_lock = threading.Lock()
+
+
+def get_shared_adapter():
+    """모든 Google 호출이 공유하는 연결 풀 어댑터 (fork된 자식 프로세스에서는 새로 생성)"""
+    global _adapter, _adapter_pid
+    pid = os.getpid()
+    if _adapter is not None and _adapter_pid == pid:
+        return _adapter
+    with _adapter_lock:
+        if _adapter is None or _adapter_pid != pid:
+            from requests.adapters import HTTPAdapter
+            _adapter = HTTPAdapter(
+                pool_connections=GOOGLE_HTTP_POOL_CONNECTIONS,
+                pool_maxsize=GOOGLE_HTTP_POOL_MAXSIZE,
+                pool_block=False
+            )
+            _adapter_pid = pid
+        return _adapter
+
+
+def create_pooled_session(session_class=None, *args, **kwargs):
+    """공유 어댑터를 마운트한 세션 생성 (session_class 기본값은 requests.Session)"""
+    if session_class is None:
+        import requests
+        session_class = requests.Session
+    session = session_class(*args, **kwargs)
+    adapter = get_shared_adapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def create_auth_request():
+    """토큰 갱신용 google-auth 전송 객체 (공유 연결 풀 사용)"""
+    from google.auth.transport.requests import Request
+    return Request(session=create_pooled_session())
+
+
+class PooledHttp:
+    """
+    googleapiclient가 기대하는 httplib2.Http 인터페이스를 requests 연결 풀 위에 구현
+    자격 증명은 AuthorizedSession이 붙이고, 만료/401 시 토큰 갱신은 refresh(single-flight 갱신 함수)로 처리함
+    """
+
+    def __init__(self, credentials, timeout=None, refresh=None):
+        self.credentials = credentials
+        self.refresh = refresh
+        self.timeout = timeout or (GOOGLE_HTTP_CONNECT_TIMEOUT, GOOGLE_HTTP_TIMEOUT)
+        self._refresh_lock = threading.Lock()
+        # google-auth / requests는 첫 Calendar 호출 때 로드 (콜드 스타트 단축)
+        from google.auth.transport.requests import AuthorizedSession
+        # 401 시 세션 안에서 갱신하지 않음 (갱신 결과가 저장되지 않고 인스턴스 간 single-flight도 거치지 않으므로)
+        self.session = create_pooled_session(
+            AuthorizedSession, credentials, auth_request=create_auth_request(), refresh_status_codes=()
+        )
+
+    def _refresh_credentials(self, used, rejected=False):
+        """used가 만료되었거나 401로 거절(rejected)되었으면 갱신 (다른 스레드가 이미 교체했으면 그 자격 증명 사용)"""
+        with self._refresh_lock:
+            if self.credentials is used:
+                self.credentials = self.refresh(used, reject_current=rejected)
+                self.session.credentials = self.credentials
+
+    def request(self, uri, method='GET', body=None, headers=None,
+                redirections=None, connection_type=None, timeout=None):
+        """httplib2.Http.request와 같은 (response, content) 반환"""
+        if self.refresh and not self.credentials.valid:
+            self._refresh_credentials(self.credentials)
+        used = self.credentials
+        response = self._send(uri, method, body, headers, timeout)
+        if response.status_code == 401 and self.refresh:
+            self._refresh_credentials(used, rejected=True)
+            response = self._send(uri, method, body, headers, timeout)
+
+        import httplib2
+        info = {key.lower(): value for key, value in response.headers.items()}
+        info['status'] = str(response.status_code)
+        # requests가 이미 압축을 풀었으므로 content-encoding은 전달하지 않음
+        info.pop('content-encoding', None)
+        return httplib2.Response(info), response.content
+
+    def _send(self, uri, method, body, headers, timeout):
+        pool_stats.start()
+        try:
+            response = self.session.request(
+                method, uri, data=body, headers=headers,
+                timeout=timeout or self.timeout
+            )
+        except Exception as e:
+            pool_stats.finish(error=True)
+            record_upstream_error('google', e)
+            raise
+        pool_stats.finish(error=response.status_code >= 500)
+        if response.status_code >= 400:
+            record_upstream_error('google', response.status_code)
+        return response
+
+    def close(self):
+        """공유 연결 풀은 닫지 않음"""
@@ -1,10 +1,19 @@
-from openai import OpenAI
 import datetime
 import os
-from main import get_calendar_service, get_events, route_calendar_service
+import threading
+from main import get_request_calendar_service, get_events, route_calendar_service
+from date_parser import parse_date_range, date_parse_stats, get_timezone, parse_datetime
+from date_range_cache import date_range_cache
+from metrics import track_stage, record_upstream_error, record_openai_usage, record_prompt_tokens
+from config import AppConfig, get_config
+from events_prompt import build_events_prompt, count_tokens
+from answer_cache import answer_cache
+from rate_limiter import openai_limiter, RateLimitExceeded
+from free_busy import is_free_slot_query, parse_min_minutes, find_free_slots, format_free_slots
 from datetime import timedelta
 from dotenv import load_dotenv
 import json
+import hashlib
 
 # .env 파일 로드
 load_dotenv()
@@ -16,125 +25,512 @@ class GPTError(Exception):
         self.error_type = error_type
         super().__init__(self.message)
 
-def init_openai_client():
-    """OpenAI 클라이언트 초기화"""
-    api_key = os.getenv("OPENAI_API_KEY")
+# OpenAI 클라이언트 연결/재시도 설정 (환경 변수 또는 기본값 사용)
+# 재시도는 속도 제한기(openai_limiter.call)가 토큰을 다시 받아 수행
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '30'))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv('OPENAI_CONNECT_TIMEOUT', '5'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '10'))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv('OPENAI_KEEPALIVE_EXPIRY', '60'))
+
+# openai / httpx는 첫 GPT 호출 때 로드 (콜드 스타트 단축)
+OpenAI = None
+
+def get_openai_class():
+    """OpenAI 클라이언트 클래스 (처음 호출 시 import)"""
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as openai_class
+        OpenAI = openai_class
+    return OpenAI
+
+# 프로세스 전역 공유 클라이언트 (요청마다 연결 풀/TLS 핸드셰이크를 새로 만들지 않음)
+_openai_client = None
+_openai_client_pid = None
+_openai_client_lock = threading.Lock()
+
+def init_openai_client(config: AppConfig = None):
+    """OpenAI 클라이언트 초기화 (keep-alive 연결 풀, 타임아웃, 재시도 횟수 설정, config가 없으면 현재 환경 변수 사용)"""
+    config = config or AppConfig.from_env()
+    api_key = config.openai_api_key
     if not api_key:
         raise ValueError("OPENAI_API_KEY 환경 변수가 설정되지 않았습니다.")
-    return OpenAI(api_key=api_key)
+    import httpx
+    http_client = httpx.Client(
+        limits=httpx.Limits(
+            max_connections=OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+    )
+    return get_openai_class()(
+        api_key=api_key,
+        http_client=http_client,
+        timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT),
+        max_retries=OPENAI_MAX_RETRIES
+    )
 
-def extract_date_range(query: str) -> dict:
-    """자연어 쿼리에서 날짜 범위 추출"""
-    client = init_openai_client()
-    
-    system_message = """당신은 사용자의 자연어 쿼리에서 날짜 범위를 추출하는 AI 비서입니다.
-다음 규칙을 따라주세요:
-1. 시작 시간과 종료 시간을 ISO 8601 형식으로 반환
+def get_openai_client():
+    """프로세스 전역 OpenAI 클라이언트 반환 (처음 호출 시 생성, fork된 자식 프로세스에서는 새로 생성)"""
+    global _openai_client, _openai_client_pid
+    pid = os.getpid()
+    client = _openai_client
+    if client is not None and _openai_client_pid == pid:
+        return client
+    with _openai_client_lock:
+        if _openai_client is None or _openai_client_pid != pid:
+            _openai_client = init_openai_client(get_config())
+            _openai_client_pid = pid
+        return _openai_client
+
+def reset_openai_client():
+    """공유 클라이언트 폐기 (fork 직후 자식 프로세스가 부모의 연결 풀을 쓰지 않도록 함)"""
+    global _openai_client, _openai_client_pid, _openai_client_lock
+    # 부모 프로세스와 소켓을 공유하므로 close() 하지 않고 참조만 버림
+    _openai_client = None
+    _openai_client_pid = None
+    _openai_client_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=reset_openai_client)
+
+GPT_MODEL = "gpt-3.5-turbo"
+
+# 두 번의 호출(도구 호출 → 최종 응답)이 같은 프롬프트 앞부분을 공유하도록 고정된 지시문을 맨 앞에 둠
+SYSTEM_PROMPT = """당신은 {platform} Calendar 일정 관리를 돕는 AI 비서입니다.
+사용자의 일정 관련 질문에 답하려면 먼저 check_calendar 함수로 일정을 조회하세요.
+check_calendar 호출 규칙:
+1. start_date, end_date는 ISO 8601 형식으로 전달
 2. "오늘", "내일", "다음 주" 등의 상대적 표현을 실제 날짜로 변환
 3. 특정 날짜만 언급된 경우 해당 날의 00:00:00부터 23:59:59까지로 설정
 4. 시간이 명시되지 않은 경우 하루 전체를 범위로 설정
-5. 날짜가 명시되지 않은 경우 오늘을 기준으로 설정"""
-
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=[
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": query}
-        ],
-        response_format={"type": "json_object"}
-    )
+5. 날짜가 명시되지 않은 경우 오늘을 기준으로 설정
+빈 시간을 묻는 질문이면 check_calendar 대신 find_free_slots 함수로 빈 시간을 조회하세요.
+조회 결과를 받으면 사용자의 질문에 친절하게 답변해주세요.
+일정이 있다면 시간과 제목을 명확하게 알려주시고, 일정이 없다면 그 날이 비어있다고 알려주세요.
+답변은 한국어로 해주세요."""
 
-    result = response.choices[0].message.content
-    return json.loads(result)
+# 지시문이나 모델이 바뀌면 이전에 캐시된 응답을 쓰지 않도록 응답 캐시 키에 포함
+PROMPT_VERSION = hashlib.sha1(f"{GPT_MODEL}\n{SYSTEM_PROMPT}".encode('utf-8')).hexdigest()[:12]
 
-def process_calendar_query(query: str, user_id: str = None, platform: str = 'google'):
-    """사용자 쿼리 처리 (user_id, platform 지원)"""
-    try:
-        if not user_id:
-            print("[API ERROR] user_id가 없음 - 인증 필요")
-            return {
-                "status": "error",
-                "message": "사용자 인증이 필요합니다. 먼저 로그인 해주세요."
+def get_calendar_function_spec():
+    """캘린더 도구 함수 스펙 정의 (check_calendar, find_free_slots)"""
+    return [
+        {
+            "name": "check_calendar",
+            "description": "지정한 기간의 사용자 캘린더 일정을 조회합니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {
+                        "type": "string",
+                        "description": "조회 시작 시각 (ISO 8601, 예: 2024-03-20T00:00:00+09:00)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "조회 종료 시각 (ISO 8601, 예: 2024-03-20T23:59:59+09:00)"
+                    }
+                },
+                "required": ["start_date", "end_date"]
             }
-        # 1. 자연어에서 날짜 범위 추출
-        try:
-            date_range = extract_date_range(query)
-            start_time = date_range.get("start_time")
-            end_time = date_range.get("end_time")
-        except Exception as e:
-            print(f"[GPT ERROR] 날짜 범위 추출 실패: {str(e)}")
-            return {
-                "status": "error",
-                "message": f"GPT 호출 중 오류 발생: 날짜 범위 추출 실패 - {str(e)}"
+        },
+        {
+            "name": "find_free_slots",
+            "description": "지정한 기간에서 일정이 없는 빈 시간을 찾습니다.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "start_date": {
+                        "type": "string",
+                        "description": "조회 시작 시각 (ISO 8601, 예: 2024-03-20T00:00:00+09:00)"
+                    },
+                    "end_date": {
+                        "type": "string",
+                        "description": "조회 종료 시각 (ISO 8601, 예: 2024-03-20T23:59:59+09:00)"
+                    },
+                    "min_minutes": {
+                        "type": "integer",
+                        "description": "빈 시간의 최소 길이 (분, 예: 1시간이면 60)"
+                    }
+                },
+                "required": ["start_date", "end_date"]
             }
+        }
+    ]
 
-        if not start_time or not end_time:
-            print("[API ERROR] 날짜 범위 추출 결과 없음")
-            return {
-                "status": "error",
-                "message": "날짜 범위를 추출할 수 없습니다."
-            }
+def get_calendar_tools():
+    """chat.completions의 tools 형식으로 변환한 함수 스펙"""
+    return [{"type": "function", "function": spec} for spec in get_calendar_function_spec()]
 
-        # 2. 캘린더 조회 (user_id, platform 활용)
-        try:
-            start = datetime.datetime.fromisoformat(start_time)
-            end = datetime.datetime.fromisoformat(end_time)
-            service = get_calendar_service(user_id, platform)
-            if not service:
-                print(f"[API ERROR] 캘린더 서비스 인증 실패: user_id={user_id}, platform={platform}")
-                events = []
+def build_base_messages(query: str, platform: str, now: datetime.datetime = None) -> list:
+    """고정 지시문 + 오늘 날짜 + 사용자 질문"""
+    now = now or datetime.datetime.now(get_timezone())
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT.format(platform=platform.title())},
+        {"role": "system", "content": f"오늘은 {now.strftime('%Y-%m-%d (%A)')}이고 시간대는 {now.tzinfo}입니다."},
+        {"role": "user", "content": query}
+    ]
+
+def resolve_date_range_locally(query: str, now: datetime.datetime = None):
+    """GPT 없이 날짜 범위 해석 (로컬 파서 → 캐시 순서, 둘 다 실패하면 None)"""
+    date_range = parse_date_range(query, now)
+    if date_range:
+        date_parse_stats.record('local')
+        date_range['source'] = 'local'
+        return date_range
+
+    cached = date_range_cache.get(query, now)
+    if cached:
+        date_parse_stats.record('cache')
+        cached['source'] = 'cache'
+        return cached
+    return None
+
+def rate_limited_result(error: RateLimitExceeded) -> dict:
+    """호출 한도 초과 결과 (app에서 429 + Retry-After로 응답)"""
+    return {
+        "status": "error",
+        "error_type": "rate_limited",
+        "retry_after": error.retry_after,
+        "message": str(error)
+    }
+
+def request_check_calendar_call(client, messages: list, query: str, now: datetime.datetime = None, user_id: str = None,
+                                tool_name: str = None) -> dict:
+    """
+    GPT 도구 호출로 날짜 범위와 사용할 도구를 받음
+    tool_name이 없으면 GPT가 check_calendar / find_free_slots 중 하나를 고름 (tool_choice="auto")
+    """
+    tool_choice = {"type": "function", "function": {"name": tool_name}} if tool_name else "auto"
+    try:
+        with track_stage('openai_tool_call'):
+            # 재시도도 토큰 버킷을 거치도록 SDK 재시도는 끄고 속도 제한기에서 재시도
+            response = openai_limiter.call(user_id, lambda: client.with_options(max_retries=0).chat.completions.create(
+                model=GPT_MODEL,
+                messages=messages,
+                tools=get_calendar_tools(),
+                tool_choice=tool_choice
+            ), retries=OPENAI_MAX_RETRIES)
+    except RateLimitExceeded:
+        raise
+    except Exception as e:
+        record_upstream_error('openai', e)
+        raise
+    record_openai_usage('tool_call', response)
+    if not response.choices[0].message.tool_calls:
+        raise GPTError("도구 호출 없이 응답함", error_type="no_tool_call")
+    tool_call = response.choices[0].message.tool_calls[0]
+    if tool_call.function.name not in ('check_calendar', 'find_free_slots'):
+        raise GPTError(f"알 수 없는 함수 호출: {tool_call.function.name}", error_type="unknown_tool")
+    arguments = json.loads(tool_call.function.arguments)
+    date_parse_stats.record('gpt')
+
+    date_range = {
+        "start_time": arguments.get("start_date"),
+        "end_time": arguments.get("end_date"),
+        "tool": tool_call.function.name
+    }
+    if date_range["start_time"] and date_range["end_time"]:
+        date_range_cache.set(query, date_range, now)
+    date_range["source"] = "gpt"
+    date_range["tool_call_id"] = tool_call.id
+    if isinstance(arguments.get("min_minutes"), int) and arguments["min_minutes"] > 0:
+        date_range["min_minutes"] = arguments["min_minutes"]
+    return date_range
+
+def extract_date_range(query: str) -> dict:
+    """자연어 쿼리에서 날짜 범위 추출 (로컬 파서 → 캐시 → GPT 도구 호출 순서)"""
+    now = datetime.datetime.now(get_timezone())
+    date_range = resolve_date_range_locally(query, now)
+    if date_range:
+        return date_range
+    client = get_openai_client()
+    return request_check_calendar_call(client, build_base_messages(query, 'google', now), query, now)
+
+def check_calendar(start_date: str, end_date: str, user_id: str = None, platform: str = 'google', service=None):
+    """check_calendar 도구 실행: 로컬에서 일정 조회 (인증 정보가 없으면 error 반환)"""
+    if not user_id:
+        print("[API ERROR] user_id가 없음 - 인증 필요")
+        return {"error": "Authentication required"}
+    start = datetime.datetime.fromisoformat(start_date)
+    end = datetime.datetime.fromisoformat(end_date)
+    if service is None:
+        service = get_request_calendar_service(user_id, platform)
+    if not service:
+        print(f"[API ERROR] 캘린더 서비스 인증 실패: user_id={user_id}, platform={platform}")
+        return []
+    return get_events(service, start, end, user_id=user_id, platform=platform)
+
+def check_free_slots(start_date: str, end_date: str, min_minutes: int, user_id: str = None, platform: str = 'google', service=None):
+    """find_free_slots 도구 실행: 바쁜 구간 인덱스로 빈 시간 조회 (인증 정보가 없으면 error 반환)"""
+    if not user_id:
+        print("[API ERROR] user_id가 없음 - 인증 필요")
+        return {"error": "Authentication required"}
+    # GPT가 시간대 없이 준 범위도 캘린더 시간대로 해석 (지금 시각과 비교하므로 aware여야 함)
+    start = parse_datetime(start_date)
+    end = parse_datetime(end_date)
+    if service is None:
+        service = get_request_calendar_service(user_id, platform)
+    if not service:
+        print(f"[API ERROR] 캘린더 서비스 인증 실패: user_id={user_id}, platform={platform}")
+        # 빈 목록은 "빈 시간 없음"으로 답하게 되므로 인증 오류로 처리
+        return {"error": "Authentication required"}
+    return find_free_slots(service, user_id, platform, start, end, min_minutes)
+
+def prepare_calendar_query(query: str, user_id: str = None, platform: str = 'google', service=None, client=None):
+    """
+    1~2단계: 날짜 범위 결정(check_calendar 도구 호출) 및 로컬 일정 조회
+    최종 응답 생성에 쓸 대화(messages)까지 구성해 반환 (실패 시 status가 error인 결과 반환)
+    """
+    # 인증 없이 들어온 요청은 OpenAI를 호출하기 전에 거절
+    if not user_id:
+        print("[API ERROR] user_id가 없음 - 인증 필요")
+        return {
+            "status": "error",
+            "message": "사용자 인증이 필요합니다. 먼저 로그인 해주세요."
+        }
+
+    now = datetime.datetime.now(get_timezone())
+    messages = build_base_messages(query, platform, now)
+
+    # 1. 날짜 범위 결정 (로컬에서 해석되면 GPT 호출 없이 도구 호출을 직접 구성)
+    try:
+        with track_stage('date_resolve_local'):
+            date_range = resolve_date_range_locally(query, now)
+        if not date_range:
+            # GPT가 날짜 범위와 함께 도구(일정 조회 / 빈 시간 조회)도 고름
+            client = client or get_openai_client()
+            date_range = request_check_calendar_call(client, messages, query, now, user_id)
+        # 빈 시간을 묻는 질문이면 일정 목록 대신 빈 시간 목록을 GPT에 전달
+        # (GPT가 고른 도구는 캐시에도 남으므로, 없을 때만 질문 형태로 판단)
+        tool_name = date_range.get("tool") or ("find_free_slots" if is_free_slot_query(query) else "check_calendar")
+        start_time = date_range.get("start_time")
+        end_time = date_range.get("end_time")
+        date_source = date_range.get("source")
+        tool_call_id = date_range.get("tool_call_id", f"call_{tool_name}")
+    except RateLimitExceeded as e:
+        print(f"[GPT ERROR] 호출 한도 초과로 날짜 범위 추출 거절: retry_after={e.retry_after}")
+        return rate_limited_result(e)
+    except Exception as e:
+        print(f"[GPT ERROR] 날짜 범위 추출 실패: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"GPT 호출 중 오류 발생: 날짜 범위 추출 실패 - {str(e)}"
+        }
+
+    if not start_time or not end_time:
+        print("[API ERROR] 날짜 범위 추출 결과 없음")
+        return {
+            "status": "error",
+            "message": "날짜 범위를 추출할 수 없습니다."
+        }
+
+    # 2. check_calendar / find_free_slots 도구 실행 (user_id, platform 활용)
+    min_minutes = date_range.get("min_minutes") or parse_min_minutes(query)
+    try:
+        with track_stage('calendar_lookup'):
+            if tool_name == "find_free_slots":
+                events = check_free_slots(start_time, end_time, min_minutes, user_id=user_id, platform=platform, service=service)
             else:
-                events = get_events(service, start, end)
-        except Exception as e:
-            print(f"[API ERROR] 캘린더 조회 실패: {str(e)}")
-            return {
-                "status": "error",
-                "message": f"API 호출 중 오류 발생: 캘린더 조회 실패 - {str(e)}"
-            }
+                events = check_calendar(start_time, end_time, user_id=user_id, platform=platform, service=service)
+    except Exception as e:
+        print(f"[API ERROR] 캘린더 조회 실패: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"API 호출 중 오류 발생: 캘린더 조회 실패 - {str(e)}"
+        }
+    if isinstance(events, dict) and events.get("error"):
+        return {
+            "status": "error",
+            "message": "사용자 인증이 필요합니다. 먼저 로그인 해주세요."
+        }
+
+    arguments = {"start_date": start_time, "end_date": end_time}
+    if tool_name == "find_free_slots":
+        arguments["min_minutes"] = min_minutes
+    messages.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{
+            "id": tool_call_id,
+            "type": "function",
+            "function": {"name": tool_name, "arguments": json.dumps(arguments, ensure_ascii=False)}
+        }]
+    })
+    free_slots = None
+    if tool_name == "find_free_slots":
+        free_slots, events = events, []
+        events_prompt = format_free_slots(free_slots, start_time, end_time, min_minutes)
+        prompt_info = {"free_slots": len(free_slots), "tokens": count_tokens(events_prompt)}
+    else:
+        # 날짜별로 묶은 짧은 일정 목록 (토큰 예산을 넘으면 나머지는 요약)
+        events_prompt, prompt_info = build_events_prompt(events, start_time, end_time)
+    messages.append({
+        "role": "tool",
+        "tool_call_id": tool_call_id,
+        "content": events_prompt
+    })
+    prompt_info["prompt_tokens"] = sum(count_tokens(message.get("content") or "") for message in messages)
+    record_prompt_tokens(prompt_info["prompt_tokens"])
+
+    # 같은 질문 + 같은 일정이면 이전 응답을 재사용 (일정이 바뀌면 키가 달라짐)
+    answer_cache_key = None
+    if user_id:
+        answer_cache_key = answer_cache.make_key(
+            user_id, query, start_time, end_time, events_prompt, PROMPT_VERSION, now.date().isoformat()
+        )
+
+    prepared = {
+        "status": "success",
+        "user_id": user_id,
+        "query_info": {
+            "original_query": query,
+            "start_time": start_time,
+            "end_time": end_time,
+            "date_source": date_source,
+            "tool": tool_name,
+            "prompt": prompt_info
+        },
+        "events": events,
+        "messages": messages,
+        "answer_cache_key": answer_cache_key
+    }
+    if free_slots is not None:
+        prepared["free_slots"] = free_slots
+        prepared["query_info"]["min_minutes"] = min_minutes
+    return prepared
+
+def create_answer(client, prepared: dict, stream: bool = False):
+    """3단계: 같은 대화에 도구 결과를 이어 붙여 최종 응답 생성 (스트리밍이면 응답이 시작될 때까지의 시간 기록)"""
+    with track_stage('openai_answer_stream_start' if stream else 'openai_answer'):
+        response = openai_limiter.call(prepared.get("user_id"), lambda: client.with_options(max_retries=0).chat.completions.create(
+            model=GPT_MODEL,
+            messages=prepared["messages"],
+            tools=get_calendar_tools(),
+            tool_choice="none",
+            stream=stream
+        ), retries=OPENAI_MAX_RETRIES)
+    if not stream:
+        record_openai_usage('answer', response)
+    return response
+
+def process_calendar_query(query: str, user_id: str = None, platform: str = 'google', service=None):
+    """사용자 쿼리 처리 (user_id, platform 지원, 요청에서 해석된 service 재사용)"""
+    try:
+        prepared = prepare_calendar_query(query, user_id, platform, service)
+        if prepared["status"] == "error":
+            return prepared
+        client = get_openai_client()
+
+        cache_key = prepared.pop("answer_cache_key")
+        cached = answer_cache.get(cache_key) if cache_key else None
+        if cached:
+            # 같은 질문과 일정에 대해 이미 만든 응답이 있으면 GPT를 호출하지 않음
+            prepared.pop("messages")
+            prepared["query_info"]["answer_source"] = "cache"
+            prepared["response"] = cached
+            return prepared
 
         # 3. GPT에게 일정 정보 전달하여 응답 생성
         try:
-            client = init_openai_client()
-            events_description = "조회된 일정:\n"
-            if events:
-                for event in events:
-                    events_description += f"- {event['start']}: {event['summary']}\n"
-            else:
-                events_description += "해당 기간에 예정된 일정이 없습니다.\n"
-
-            system_message = f"""당신은 {platform.title()} Calendar 일정 관리를 돕는 AI 비서입니다.\n사용자의 일정 관련 질문에 친절하게 답변해주세요.\n일정이 있다면 시간과 제목을 명확하게 알려주시고, \n일정이 없다면 그 날이 비어있다고 알려주세요.\n답변은 한국어로 해주세요."""
-
-            final_response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": query},
-                    {"role": "system", "content": f"조회한 기간: {start_time} ~ {end_time}"},
-                    {"role": "system", "content": events_description}
-                ]
-            )
+            final_response = create_answer(client, prepared)
+        except RateLimitExceeded as e:
+            print(f"[GPT ERROR] 호출 한도 초과로 응답 생성 거절: retry_after={e.retry_after}")
+            return rate_limited_result(e)
         except Exception as e:
             print(f"[GPT ERROR] GPT 응답 생성 실패: {str(e)}")
+            record_upstream_error('openai', e)
             return {
                 "status": "error",
                 "message": f"GPT 호출 중 오류 발생: 응답 생성 실패 - {str(e)}"
             }
 
+        prepared.pop("messages")
+        prepared["query_info"]["answer_source"] = "gpt"
+        prepared["response"] = final_response.choices[0].message.content
+        if cache_key:
+            answer_cache.set(cache_key, prepared["response"])
+        usage = getattr(final_response, "usage", None)
+        if isinstance(getattr(usage, "prompt_tokens", None), int):
+            # 추정치가 아닌 OpenAI가 계산한 실제 토큰 수
+            prepared["query_info"]["prompt"]["usage"] = {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens
+            }
+        return prepared
+
+    except Exception as e:
+        print(f"[API ERROR] process_calendar_query 전체 예외: {str(e)}")
         return {
+            "status": "error",
+            "message": f"API 호출 중 알 수 없는 오류 발생: {str(e)}"
+        }
+
+def stream_calendar_query(query: str, user_id: str = None, platform: str = 'google', service=None):
+    """
+    사용자 쿼리 스트리밍 처리 (SSE용)
+    (이벤트 이름, 데이터) 튜플을 순서대로 생성:
+    query_info(날짜 범위 + 일정) → token(응답 조각)* → done(전체 응답) / 실패 시 error
+    """
+    try:
+        prepared = prepare_calendar_query(query, user_id, platform, service)
+        if prepared["status"] == "error":
+            yield "error", prepared
+            return
+        client = get_openai_client()
+
+        cache_key = prepared.pop("answer_cache_key")
+        cached = answer_cache.get(cache_key) if cache_key else None
+        prepared["query_info"]["answer_source"] = "cache" if cached else "gpt"
+
+        # 캘린더 조회가 끝나는 즉시 조회 결과부터 전송
+        query_result = {
             "status": "success",
-            "user_id": user_id,
-            "query_info": {
-                "original_query": query,
-                "start_time": start_time,
-                "end_time": end_time
-            },
-            "events": events,
-            "response": final_response.choices[0].message.content
+            "query_info": prepared["query_info"],
+            "events": prepared["events"]
         }
+        if "free_slots" in prepared:
+            query_result["free_slots"] = prepared["free_slots"]
+        yield "query_info", query_result
+
+        if cached:
+            yield "token", {"content": cached}
+            yield "done", {"status": "success", "message": cached}
+            return
+
+        # 3. GPT 응답을 생성되는 대로 전송
+        parts = []
+        try:
+            for chunk in create_answer(client, prepared, stream=True):
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    yield "token", {"content": content}
+        except RateLimitExceeded as e:
+            print(f"[GPT ERROR] 호출 한도 초과로 응답 스트리밍 거절: retry_after={e.retry_after}")
+            yield "error", rate_limited_result(e)
+            return
+        except Exception as e:
+            print(f"[GPT ERROR] GPT 응답 스트리밍 실패: {str(e)}")
+            record_upstream_error('openai', e)
+            yield "error", {
+                "status": "error",
+                "message": f"GPT 호출 중 오류 발생: 응답 생성 실패 - {str(e)}"
+            }
+            return
+
+        answer = "".join(parts)
+        if cache_key:
+            answer_cache.set(cache_key, answer)
+        yield "done", {"status": "success", "message": answer}
 
     except Exception as e:
-        print(f"[API ERROR] process_calendar_query 전체 예외: {str(e)}")
-        return {
+        print(f"[API ERROR] stream_calendar_query 전체 예외: {str(e)}")
+        yield "error", {
             "status": "error",
             "message": f"API 호출 중 알 수 없는 오류 발생: {str(e)}"
         }
@@ -0,0 +1,44 @@
+import math
+import os
+
+# Cloud Run 운영용 gunicorn 설정 (환경 변수 또는 기본값 사용)
+# /ask_gpt 처리 시간 대부분은 OpenAI/Google 응답 대기이므로 스레드 워커로 동시 요청을 처리함
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+
+# 프로세스 수: Cloud Run 인스턴스의 vCPU 수에 맞춤
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = 'gthread'
+
+# 스레드 수: Cloud Run 동시성 설정(--concurrency)을 워커 수로 나눠 인스턴스당 동시 요청 수를 맞춤
+CLOUD_RUN_CONCURRENCY = int(os.getenv('CLOUD_RUN_CONCURRENCY', '40'))
+threads = int(os.getenv('GUNICORN_THREADS', str(max(1, math.ceil(CLOUD_RUN_CONCURRENCY / workers)))))
+
+# Cloud Run 프런트엔드와의 연결을 재사용하도록 keep-alive 유지
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+
+# 요청 타임아웃은 Cloud Run이 관리하므로 워커 타임아웃은 끔 (긴 SSE 응답 허용)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '0'))
+
+# Cloud Run은 SIGTERM 후 10초 뒤 SIGKILL을 보내므로 그 안에 진행 중인 요청을 마치도록 함
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '8'))
+
+# 앱을 마스터에서 미리 로드하면 워커 기동이 빨라짐 (fork 후 초기화는 post_fork에서 처리)
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """fork 후 워커에서 백그라운드 스레드 재시작 (preload 시 마스터의 스레드는 상속되지 않음)"""
+    if preload_app:
+        from token_refresher import start_token_refresher
+        start_token_refresher()
+
+
+def worker_exit(server, worker):
+    """워커 종료 시 백그라운드 토큰 갱신 중지"""
+    from token_refresher import token_refresher
+    token_refresher.stop(timeout=1)
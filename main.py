@@ -4,13 +4,23 @@ import datetime
 from datetime import timedelta
 import json
 from dotenv import load_dotenv
-from flask import session, redirect, url_for
+from flask import session, redirect, url_for, g, has_request_context
 
-from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
 from auth_manager import AuthManager
+from service_cache import service_cache
+from google_http import PooledHttp
+from event_store import EventStore, EVENT_SYNC_ENABLED, event_bounds
+from calendar_list import calendar_list_cache
+from date_parser import get_timezone
+from google_events import iter_events, EVENTS_PAGE_SIZE
+from metrics import track_stage, record_upstream_error
+from itertools import islice
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+import heapq
+import threading
+import redis
 
 # .env 파일 로드
 load_dotenv()
@@ -18,48 +28,148 @@ load_dotenv()
 # Google Calendar에 접근하기 위한 권한 범위
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
 
+# Calendar API 주소 변경 (벤치마크용 가짜 서버 등, 비어 있으면 discovery 문서의 기본 주소 사용)
+GOOGLE_CALENDAR_API_ENDPOINT = os.getenv('GOOGLE_CALENDAR_API_ENDPOINT')
+
+# 여러 캘린더를 동시에 조회할 때 사용할 프로세스 공유 스레드 수 (환경 변수 또는 기본값 사용)
+CALENDAR_FANOUT_WORKERS = int(os.getenv('CALENDAR_FANOUT_WORKERS', '8'))
+
+_fanout_executor = None
+_fanout_executor_lock = threading.Lock()
+
+def get_fanout_executor():
+    """캘린더 동시 조회용 스레드 풀 (처음 호출 시 생성, 모든 요청이 공유해 스레드 수를 제한)"""
+    global _fanout_executor
+    if _fanout_executor is None:
+        with _fanout_executor_lock:
+            if _fanout_executor is None:
+                _fanout_executor = ThreadPoolExecutor(max_workers=CALENDAR_FANOUT_WORKERS, thread_name_prefix='calendar-fanout')
+    return _fanout_executor
+
+# 패키지에 포함된 정적 discovery 문서 (프로세스당 한 번만 읽음)
+_calendar_discovery_doc = None
+
+def get_calendar_discovery_doc():
+    """Calendar v3 discovery 문서 반환 (네트워크 조회 없이 정적 문서 사용)"""
+    global _calendar_discovery_doc
+    if _calendar_discovery_doc is None:
+        # googleapiclient는 첫 Calendar 호출 때 로드 (콜드 스타트 단축)
+        from googleapiclient import discovery_cache
+        _calendar_discovery_doc = discovery_cache.get_static_doc('calendar', 'v3')
+    return _calendar_discovery_doc
+
+def build_calendar_service(creds, user_id=None, platform='google'):
+    """
+    정적 discovery 문서와 공유 연결 풀(스레드 안전) 전송 계층으로 Calendar 서비스 객체 생성
+    user_id가 있으면 호출 중 만료/401 시 single-flight 갱신(AuthManager.refresh_credentials)으로 토큰 갱신
+    """
+    from googleapiclient.discovery import build_from_document
+    client_options = {'api_endpoint': GOOGLE_CALENDAR_API_ENDPOINT} if GOOGLE_CALENDAR_API_ENDPOINT else None
+    refresh = partial(AuthManager(platform).refresh_credentials, user_id) if user_id else None
+    http = PooledHttp(creds, refresh=refresh)
+    return build_from_document(get_calendar_discovery_doc(), http=http, client_options=client_options)
+
 def create_flow(platform='google'):
     """플랫폼별 OAuth Flow 객체 생성 (AuthManager 사용)"""
     return AuthManager(platform).create_flow()
 
 def get_calendar_service(user_id, platform='google'):
     """Redis 기반 토큰으로 Google Calendar API 서비스 객체 반환"""
+    # 최근에 사용한 사용자만 백그라운드에서 토큰을 미리 갱신함
+    AuthManager(platform).touch(user_id)
+    service = service_cache.get(platform, user_id)
+    if service:
+        return service
     auth = AuthManager(platform)
-    tokens = auth.load_tokens(user_id)
+    with track_stage('token_load'):
+        tokens = auth.load_tokens(user_id)
     if not tokens:
         return None
     creds = Credentials.from_authorized_user_info(tokens, auth.scopes)
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
-            creds.refresh(Request())
-            auth.save_tokens(user_id, creds)
+            # 여러 요청/인스턴스가 동시에 갱신하지 않도록 single-flight로 갱신
+            with track_stage('token_refresh'):
+                creds = auth.refresh_credentials(user_id, creds)
         else:
             return None
-    return build('calendar', 'v3', credentials=creds)
+    with track_stage('build_service'):
+        service = build_calendar_service(creds, user_id, platform)
+    service_cache.put(platform, user_id, service, creds)
+    return service
+
+def get_request_calendar_service(user_id, platform='google'):
+    """요청 범위(flask.g) 안에서 서비스 객체를 한 번만 해석해 재사용"""
+    if not has_request_context():
+        return get_calendar_service(user_id, platform)
+    services = g.setdefault('calendar_services', {})
+    key = (platform, user_id)
+    # 인증 실패(None)도 저장해 같은 요청에서 토큰을 다시 읽지 않음
+    if key not in services:
+        services[key] = get_calendar_service(user_id, platform)
+    return services[key]
 
 def credentials_to_dict(credentials):
     """Credentials 객체를 딕셔너리로 변환 (AuthManager 사용)"""
     return AuthManager('google').credentials_to_dict(credentials)
 
-def get_events(service, start_date, end_date):
-    """지정된 기간의 일정을 가져옴"""
-    # 한국 시간 (UTC+9)으로 조정
-    time_min = start_date.astimezone().isoformat()
-    time_max = end_date.astimezone().isoformat()
-
-    print(f"Fetching events from {time_min} to {time_max}")  # 디버깅용 로그
-
-    events_result = service.events().list(
-        calendarId='primary',
-        timeMin=time_min,
-        timeMax=time_max,
-        singleEvents=True,
-        orderBy='startTime'
-    ).execute()
-    
-    events = events_result.get('items', [])
+def get_events(service, start_date, end_date, user_id=None, platform='google', limit=None):
+    """
+    지정된 기간의 일정을 가져옴 (limit개까지만)
+    user_id가 있으면 표시된 모든 캘린더를 동시에 조회해 시작 시간 순으로 병합
+    """
+    calendar_ids = calendar_list_cache.get_calendar_ids(service, platform, user_id)
+    if len(calendar_ids) == 1:
+        return get_calendar_events(service, start_date, end_date, calendar_ids[0], user_id, platform, limit)
+
+    # 나머지 캘린더는 스레드 풀에서, 기본 캘린더는 현재 스레드에서 조회 (전체 시간 ≈ 가장 느린 캘린더)
+    with track_stage('calendar_fanout'):
+        executor = get_fanout_executor()
+        futures = [
+            (calendar_id, executor.submit(get_calendar_events, service, start_date, end_date, calendar_id, user_id, platform, limit))
+            for calendar_id in calendar_ids[1:]
+        ]
+        results = [get_calendar_events(service, start_date, end_date, calendar_ids[0], user_id, platform, limit)]
+        for calendar_id, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # 공유/구독 캘린더 하나가 실패해도 나머지 일정은 보여줌
+                print(f"[API ERROR] 캘린더 조회 실패, 결과에서 제외: calendar_id={calendar_id}, {str(e)}")
+    return list(islice(merge_events(results), limit))
+
+def merge_events(results):
+    """캘린더별로 시작 시간 순 정렬된 일정 목록을 k-way 병합 (여러 캘린더에 있는 같은 일정은 한 번만)"""
+    tz = get_timezone()
+    seen = set()
+    for event in heapq.merge(*results, key=lambda event: event_bounds(event, tz)[0]):
+        if event['id'] in seen:
+            continue
+        seen.add(event['id'])
+        yield event
+
+def get_calendar_events(service, start_date, end_date, calendar_id='primary', user_id=None, platform='google', limit=None):
+    """캘린더 하나의 일정 조회 (user_id가 있으면 증분 동기화된 일정 저장소 사용)"""
+    if user_id and EVENT_SYNC_ENABLED:
+        try:
+            with track_stage('event_store'):
+                events = EventStore(platform, user_id, calendar_id).get_events(service, start_date, end_date)
+            print(f"Found {len(events)} events (event store)")  # 디버깅용 로그
+            return events[:limit] if limit else events
+        except redis.RedisError as e:
+            print(f"[SYNC ERROR] 일정 저장소 사용 불가, 직접 조회: {str(e)}")
+            record_upstream_error('redis', e)
+    with track_stage('events_fetch'):
+        return fetch_events(service, start_date, end_date, limit=limit, calendar_id=calendar_id)
+
+def fetch_events(service, start_date, end_date, limit=None, calendar_id='primary'):
+    """Google Calendar API에서 지정된 기간의 일정을 모든 페이지에 걸쳐 직접 조회 (limit개에서 중단)"""
+    print(f"Fetching events from {start_date.astimezone().isoformat()} to {end_date.astimezone().isoformat()}")  # 디버깅용 로그
+
+    page_size = min(limit, EVENTS_PAGE_SIZE) if limit else EVENTS_PAGE_SIZE
+    events = list(islice(iter_events(service, start_date, end_date, calendar_id=calendar_id, page_size=page_size), limit))
     print(f"Found {len(events)} events")  # 디버깅용 로그
-    
+
     return events
 
 def format_event_time(event):
@@ -99,38 +209,41 @@ def print_events_by_date(events):
         # 이벤트 정보 출력
         start_time = format_event_time(event)
         if 'T' in event['start'].get('dateTime', ''):  # 시간이 있는 경우
-            print(f"⏰ {start_time[11:]} - {event['summary']}")
+            print(f"⏰ {start_time[11:]} - {event.get('summary') or '(제목 없음)'}")
         else:  # 종일 일정인 경우
-            print(f"📌 종일 - {event['summary']}")
+            print(f"📌 종일 - {event.get('summary') or '(제목 없음)'}")
 
-def check_google_calendar(user_id, start_date, end_date, platform='google'):
-    """구글 캘린더 일정 조회 메인 함수 (user_id, platform 기반)"""
-    service = get_calendar_service(user_id, platform)
+def check_google_calendar(user_id, start_date, end_date, platform='google', service=None):
+    """구글 캘린더 일정 조회 메인 함수 (user_id, platform 기반, 이미 해석된 service 재사용)"""
+    if service is None:
+        service = get_request_calendar_service(user_id, platform)
     if not service:
         return {"error": "Authentication required"}
-    events = get_events(service, start_date, end_date)
+    events = get_events(service, start_date, end_date, user_id=user_id, platform=platform)
     # 이벤트 데이터 가공
     formatted_events = []
     for event in events:
         formatted_event = {
-            'summary': event['summary'],
+            # 바쁨/한가함만 볼 수 있는 공유 캘린더의 일정에는 제목이 없음
+            'summary': event.get('summary') or '(제목 없음)',
             'start': format_event_time(event),
             'is_all_day': 'T' not in event['start'].get('dateTime', '')
         }
         formatted_events.append(formatted_event)
     return formatted_events
 
-def route_calendar_service(user_id, start_date, end_date, platform=None):
+def route_calendar_service(user_id, start_date, end_date, platform=None, service=None):
     """
     user_id와 platform을 받아 연결된 서비스에 따라 캘린더 조회 함수를 라우팅
     platform이 명시되지 않으면, 기본 연결(google)로 처리
+    service가 주어지면 요청 안에서 이미 해석된 서비스 객체를 그대로 사용
     추후 Notion, Slack 등 확장 가능
     """
     # 실제 서비스 연결 정보는 DB/Redis 등에서 조회해야 함 (여기선 platform 인자 우선)
     if not platform:
         platform = 'google'  # 기본값
     if platform == 'google':
-        return check_google_calendar(user_id, start_date, end_date, platform)
+        return check_google_calendar(user_id, start_date, end_date, platform, service=service)
     # elif platform == 'notion':
     #     return check_notion_calendar(user_id, start_date, end_date)
     # elif platform == 'slack':
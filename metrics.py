@@ -0,0 +1,198 @@
+import time
+
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Redis 조회(ms)부터 OpenAI 응답(수 초)까지 담을 수 있는 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    'ai_secretary_stage_duration_seconds',
+    '요청 처리 단계별 소요 시간 (token_load, token_refresh, build_service, google_events_list, openai_tool_call, openai_answer 등)',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+REQUEST_LATENCY = Histogram(
+    'ai_secretary_request_duration_seconds',
+    '엔드포인트별 응답 시간 (SSE는 응답 헤더를 보낼 때까지)',
+    ['endpoint', 'method', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+UPSTREAM_ERRORS = Counter(
+    'ai_secretary_upstream_errors',
+    '외부 의존성 호출 오류 수',
+    ['upstream', 'reason']
+)
+OPENAI_TOKENS = Counter(
+    'ai_secretary_openai_tokens',
+    'OpenAI 토큰 사용량',
+    ['call', 'type']
+)
+
+PROMPT_TOKENS = Histogram(
+    'ai_secretary_answer_prompt_tokens',
+    '최종 응답 생성 호출의 프롬프트 토큰 수 (요청 전 추정치)',
+    buckets=(100, 200, 400, 800, 1200, 1600, 2400, 3200, 4800, 8000)
+)
+
+
+class StageTimer:
+    """with 블록의 소요 시간을 히스토그램에 기록 (contextmanager보다 가벼운 구현)"""
+
+    __slots__ = ('_histogram', '_start')
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+
+def track_stage(stage: str):
+    """단계 소요 시간 측정: with track_stage('token_load'): ..."""
+    return StageTimer(STAGE_LATENCY.labels(stage))
+
+
+def record_upstream_error(upstream: str, reason):
+    """외부 호출 오류 집계 (reason은 상태 코드 또는 예외)"""
+    if isinstance(reason, BaseException):
+        reason = type(reason).__name__
+    UPSTREAM_ERRORS.labels(upstream, str(reason)).inc()
+
+
+def record_openai_usage(call: str, response):
+    """chat.completions 응답의 usage를 토큰 카운터에 반영 (스트리밍 응답에는 usage가 없음)"""
+    usage = getattr(response, 'usage', None)
+    for token_type in ('prompt_tokens', 'completion_tokens'):
+        value = getattr(usage, token_type, None)
+        if isinstance(value, int):
+            OPENAI_TOKENS.labels(call, token_type.split('_')[0]).inc(value)
+
+
+def record_prompt_tokens(tokens: int):
+    PROMPT_TOKENS.observe(tokens)
+
+
+class StatsCollector:
+    """
+    각 모듈 싱글턴의 stats()를 scrape 시점에만 읽어 변환
+    캐시 히트/미스는 이미 모듈에서 세고 있으므로 요청 경로에 추가 비용이 없음
+    """
+
+    def describe(self):
+        # 등록 시점에 collect()가 호출되지 않도록 함 (stats()를 가진 모듈들은 아직 import 전일 수 있음)
+        return []
+
+    def collect(self):
+        # metrics를 import하는 모듈과의 순환 import를 피하려고 scrape 시점에 import
+        from service_cache import service_cache
+        from token_cache import token_cache
+        from date_parser import date_parse_stats
+        from date_range_cache import date_range_cache
+        from google_http import pool_stats
+        from token_refresher import token_refresher
+        from answer_cache import answer_cache
+        from calendar_list import calendar_list_cache
+        from free_busy import busy_index_cache
+        from rate_limiter import openai_limiter
+
+        cache_lookups = CounterMetricFamily(
+            'ai_secretary_cache_lookups', '캐시 조회 결과', labels=['cache', 'result']
+        )
+        service = service_cache.stats()
+        cache_lookups.add_metric(['service', 'hit'], service['hits'])
+        cache_lookups.add_metric(['service', 'miss'], service['misses'])
+        tokens = token_cache.stats()
+        cache_lookups.add_metric(['token', 'hit'], tokens['hits'])
+        cache_lookups.add_metric(['token', 'miss'], tokens['misses'])
+        cache_lookups.add_metric(['token', 'bypass'], tokens['bypassed'])
+        date_range = date_range_cache.stats()
+        cache_lookups.add_metric(['date_range', 'l1_hit'], date_range['l1_hits'])
+        cache_lookups.add_metric(['date_range', 'l2_hit'], date_range['l2_hits'])
+        cache_lookups.add_metric(['date_range', 'miss'], date_range['misses'])
+        answer = answer_cache.stats()
+        cache_lookups.add_metric(['answer', 'hit'], answer['hits'])
+        cache_lookups.add_metric(['answer', 'miss'], answer['misses'])
+        calendars = calendar_list_cache.stats()
+        cache_lookups.add_metric(['calendar_list', 'hit'], calendars['hits'])
+        cache_lookups.add_metric(['calendar_list', 'miss'], calendars['misses'])
+        busy_index = busy_index_cache.stats()
+        cache_lookups.add_metric(['busy_index', 'hit'], busy_index['hits'])
+        cache_lookups.add_metric(['busy_index', 'miss'], busy_index['misses'])
+        yield cache_lookups
+
+        cache_size = GaugeMetricFamily('ai_secretary_cache_entries', '프로세스 캐시 항목 수', labels=['cache'])
+        cache_size.add_metric(['service'], service['size'])
+        cache_size.add_metric(['token'], tokens['size'])
+        cache_size.add_metric(['busy_index'], busy_index['size'])
+        cache_size.add_metric(['date_range'], date_range['size'])
+        yield cache_size
+
+        evictions = CounterMetricFamily(
+            'ai_secretary_service_cache_removals', '서비스 캐시에서 제거된 항목 수', labels=['reason']
+        )
+        evictions.add_metric(['eviction'], service['evictions'])
+        evictions.add_metric(['invalidation'], service['invalidations'])
+        yield evictions
+
+        date_sources = CounterMetricFamily(
+            'ai_secretary_date_resolutions', '날짜 범위 해석 경로', labels=['source']
+        )
+        sources = date_parse_stats.stats()
+        for source in ('local', 'cache', 'gpt'):
+            date_sources.add_metric([source], sources[source])
+        yield date_sources
+
+        pool = pool_stats.stats()
+        yield GaugeMetricFamily('ai_secretary_google_http_in_flight', '진행 중인 Google API 요청 수', value=pool['in_flight'])
+        yield CounterMetricFamily('ai_secretary_google_http_requests', 'Google API 요청 수', value=pool['requests'])
+
+        refresher = token_refresher.stats()
+        yield CounterMetricFamily('ai_secretary_token_refreshes', '백그라운드 토큰 갱신 성공 수', value=refresher['refreshed'])
+        yield CounterMetricFamily('ai_secretary_token_refresh_failures', '백그라운드 토큰 갱신 실패 수', value=refresher['failures'])
+        yield CounterMetricFamily('ai_secretary_token_refresh_dropped_inactive', '장기간 사용하지 않아 갱신 스케줄에서 뺀 사용자 수', value=refresher['dropped_inactive'])
+        yield GaugeMetricFamily('ai_secretary_token_refresh_lag_seconds', '마지막 갱신이 예정보다 늦어진 시간', value=refresher['last_lag_seconds'])
+
+        limiter = openai_limiter.stats()
+        decisions = CounterMetricFamily(
+            'ai_secretary_openai_rate_limit', 'OpenAI 호출 속도 제한 결과', labels=['result']
+        )
+        for result in ('allowed', 'waited', 'rejected', 'throttled', 'fail_open'):
+            decisions.add_metric([result], limiter[result])
+        yield decisions
+        yield GaugeMetricFamily('ai_secretary_openai_rate_limit_waiting', '토큰을 기다리는 요청 수', value=limiter['waiting'])
+        yield GaugeMetricFamily('ai_secretary_openai_rate_limit_factor', '429 반영 후 전체 속도 비율', value=limiter['factor'])
+
+
+REGISTRY.register(StatsCollector())
+
+
+def init_app(app):
+    """엔드포인트별 응답 시간 기록 훅 등록"""
+    from flask import g, request
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def observe_request_latency(response):
+        started_at = g.pop('request_started_at', None)
+        if started_at is not None:
+            # URL 대신 엔드포인트 이름을 사용해 라벨 수를 제한
+            REQUEST_LATENCY.labels(
+                request.endpoint or 'unmatched', request.method, response.status_code
+            ).observe(time.perf_counter() - started_at)
+        return response
+
+    return app
+
+
+def render_metrics():
+    """Prometheus 텍스트 형식의 (본문, Content-Type)"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
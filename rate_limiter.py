@@ -0,0 +1,304 @@
+import os
+import math
+import time
+import random
+import threading
+from contextlib import contextmanager
+
+import redis
+
+import auth_manager
+from metrics import record_upstream_error
+
+# OpenAI 호출 속도 제한 설정 (환경 변수 또는 기본값 사용)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 초당 허용 호출 수 / 순간 최대 호출 수 (사용자별, 전체)
+RATE_LIMIT_USER_RATE = float(os.getenv('RATE_LIMIT_USER_RATE', '1'))
+RATE_LIMIT_USER_BURST = float(os.getenv('RATE_LIMIT_USER_BURST', '5'))
+RATE_LIMIT_GLOBAL_RATE = float(os.getenv('RATE_LIMIT_GLOBAL_RATE', '20'))
+RATE_LIMIT_GLOBAL_BURST = float(os.getenv('RATE_LIMIT_GLOBAL_BURST', '40'))
+# 프로세스당 토큰을 기다릴 수 있는 요청 수와 최대 대기 시간 (넘으면 바로 거절)
+RATE_LIMIT_MAX_QUEUE = int(os.getenv('RATE_LIMIT_MAX_QUEUE', '16'))
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', '5'))
+# OpenAI 429 응답 시 전체 속도를 줄이는 비율과 성공할 때마다 회복하는 양
+RATE_LIMIT_DECREASE = float(os.getenv('RATE_LIMIT_DECREASE', '0.5'))
+RATE_LIMIT_INCREASE = float(os.getenv('RATE_LIMIT_INCREASE', '0.05'))
+RATE_LIMIT_MIN_FACTOR = float(os.getenv('RATE_LIMIT_MIN_FACTOR', '0.1'))
+# Retry-After 헤더가 없는 429의 기본 대기 시간 (초)
+RATE_LIMIT_DEFAULT_COOLDOWN = float(os.getenv('RATE_LIMIT_DEFAULT_COOLDOWN', '1'))
+
+KEY_PREFIX = 'ratelimit:openai'
+
+# 사용자/전체 버킷을 함께 채우고 둘 다 토큰이 있을 때만 하나씩 차감
+# ARGV: 사용자 속도, 사용자 최대, 전체 속도, 전체 최대
+# 반환: {허용 여부, 대기 시간(ms), 현재 전체 속도 비율}
+ACQUIRE_SCRIPT = """
+-- 인스턴스마다 시계가 다를 수 있으므로 공유 버킷의 시각은 Redis 서버 시각(ms) 사용
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local cooldown_until = tonumber(redis.call('GET', KEYS[4]) or '0')
+local factor = tonumber(redis.call('GET', KEYS[3]) or '1')
+if cooldown_until > now then
+    return {0, cooldown_until - now, tostring(factor)}
+end
+
+local function refill(key, rate, burst)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    return math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+end
+
+local function wait_ms(tokens, rate)
+    if tokens >= 1 then
+        return 0
+    end
+    return math.ceil((1 - tokens) * 1000 / rate)
+end
+
+local user_rate = tonumber(ARGV[1])
+local user_burst = tonumber(ARGV[2])
+local global_rate = tonumber(ARGV[3]) * factor
+local global_burst = math.max(1, tonumber(ARGV[4]) * factor)
+
+local global_tokens = refill(KEYS[2], global_rate, global_burst)
+local wait = wait_ms(global_tokens, global_rate)
+local user_tokens = nil
+if user_rate > 0 then
+    user_tokens = refill(KEYS[1], user_rate, user_burst)
+    wait = math.max(wait, wait_ms(user_tokens, user_rate))
+end
+
+local allowed = 0
+if wait == 0 then
+    allowed = 1
+    global_tokens = global_tokens - 1
+    if user_tokens then
+        user_tokens = user_tokens - 1
+    end
+end
+
+redis.call('HSET', KEYS[2], 'tokens', tostring(global_tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[2], math.ceil(global_burst / global_rate * 1000) + 1000)
+if user_tokens then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(user_tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(user_burst / user_rate * 1000) + 1000)
+end
+return {allowed, wait, tostring(factor)}
+"""
+
+# 전체 속도 비율 조정 (429: 곱해서 감소 + 대기 시간 설정, 성공: 더해서 회복)
+# 동시에 들어온 429들이 비율을 연달아 줄이지 않도록 감소는 holddown 동안 한 번만 적용
+ADJUST_SCRIPT = """
+local factor = tonumber(redis.call('GET', KEYS[1]) or '1')
+local multiplier = tonumber(ARGV[1])
+local cooldown_ms = tonumber(ARGV[5])
+if cooldown_ms > 0 then
+    local time = redis.call('TIME')
+    local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+    redis.call('SET', KEYS[3], tostring(now + cooldown_ms), 'PX', math.ceil(cooldown_ms))
+end
+if multiplier < 1 and not redis.call('SET', KEYS[2], '1', 'NX', 'PX', tonumber(ARGV[4])) then
+    return tostring(factor)
+end
+factor = math.max(tonumber(ARGV[3]), math.min(1, factor * multiplier + tonumber(ARGV[2])))
+redis.call('SET', KEYS[1], tostring(factor), 'EX', 3600)
+return tostring(factor)
+"""
+
+
+class RateLimitExceeded(Exception):
+    """OpenAI 호출 한도를 넘어 요청을 거절함 (retry_after: 다시 시도할 때까지 초)"""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__(f"요청이 많아 {retry_after}초 후 다시 시도해주세요.")
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """OpenAI 429 (RateLimitError) 여부"""
+    return getattr(error, 'status_code', None) == 429
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """OpenAI SDK가 재시도하는 오류 (429, 408/409, 5xx, 연결/타임아웃 오류)"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in (408, 409, 429) or status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+
+
+def get_retry_after(error: Exception) -> float:
+    """429 응답의 Retry-After 헤더 (초, 없거나 해석할 수 없으면 기본값)"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return max(0.0, float(headers.get('retry-after')))
+    except (TypeError, ValueError):
+        return RATE_LIMIT_DEFAULT_COOLDOWN
+
+
+class OpenAIRateLimiter:
+    """
+    Redis 토큰 버킷으로 사용자별 / 전체 OpenAI 호출 속도를 제한
+    토큰이 없으면 제한된 수의 요청만 기다리게 하고 나머지는 Retry-After와 함께 바로 거절
+    OpenAI가 429를 반환하면 전체 속도를 줄였다가 성공할 때마다 조금씩 회복
+    Redis 오류 시에는 요청을 막지 않음 (fail open)
+    """
+
+    def __init__(self, user_rate=RATE_LIMIT_USER_RATE, user_burst=RATE_LIMIT_USER_BURST,
+                 global_rate=RATE_LIMIT_GLOBAL_RATE, global_burst=RATE_LIMIT_GLOBAL_BURST,
+                 max_queue=RATE_LIMIT_MAX_QUEUE, max_wait=RATE_LIMIT_MAX_WAIT, enabled=RATE_LIMIT_ENABLED):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._scripts = {}
+        self.factor = 1.0
+        self.waiting = 0
+        self.allowed = 0
+        self.waited = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.fail_open = 0
+
+    def _script(self, name: str, source: str):
+        """Lua 스크립트 등록 (Redis 클라이언트가 바뀌면 다시 등록)"""
+        client = auth_manager.get_redis_client()
+        cached = self._scripts.get(name)
+        if cached is None or cached[0] is not client:
+            cached = self._scripts[name] = (client, client.register_script(source))
+        return cached[1]
+
+    def _keys(self, user_id: str = None):
+        return [
+            f"{KEY_PREFIX}:user:{user_id or '-'}",
+            f"{KEY_PREFIX}:global",
+            f"{KEY_PREFIX}:factor",
+            f"{KEY_PREFIX}:cooldown"
+        ]
+
+    def try_acquire(self, user_id: str = None):
+        """토큰 하나를 차감 시도 (허용 여부, 대기해야 할 초) 반환"""
+        allowed, wait_ms, factor = self._script('acquire', ACQUIRE_SCRIPT)(
+            keys=self._keys(user_id),
+            args=[self.user_rate if user_id else 0, self.user_burst, self.global_rate, self.global_burst]
+        )
+        self.factor = float(factor)
+        return bool(int(allowed)), int(wait_ms) / 1000
+
+    def acquire(self, user_id: str = None):
+        """토큰을 얻을 때까지 대기 (대기열이 가득 찼거나 max_wait 안에 얻을 수 없으면 RateLimitExceeded)"""
+        if not self.enabled:
+            return
+        deadline = time.monotonic() + self.max_wait
+        queued = False
+        try:
+            while True:
+                try:
+                    allowed, wait = self.try_acquire(user_id)
+                except redis.RedisError as e:
+                    print(f"[RATE LIMIT ERROR] 속도 제한 확인 실패 (제한 없이 진행): {str(e)}")
+                    record_upstream_error('redis', e)
+                    with self._lock:
+                        self.fail_open += 1
+                    return
+                if allowed:
+                    with self._lock:
+                        self.allowed += 1
+                        if queued:
+                            self.waited += 1
+                    return
+
+                remaining = deadline - time.monotonic()
+                with self._lock:
+                    if not queued and self.waiting < self.max_queue:
+                        queued = True
+                        self.waiting += 1
+                    if not queued or wait > remaining:
+                        self.rejected += 1
+                        raise RateLimitExceeded(max(1, math.ceil(wait)))
+                # 같은 시점에 깨어난 요청들이 한꺼번에 몰리지 않도록 약간의 지터 추가
+                time.sleep(min(remaining, wait + random.uniform(0, 0.05)))
+        finally:
+            if queued:
+                with self._lock:
+                    self.waiting -= 1
+
+    def _adjust(self, multiplier: float, increase: float, cooldown: float = 0):
+        try:
+            factor = self._script('adjust', ADJUST_SCRIPT)(
+                keys=[f"{KEY_PREFIX}:factor", f"{KEY_PREFIX}:holddown", f"{KEY_PREFIX}:cooldown"],
+                args=[multiplier, increase, RATE_LIMIT_MIN_FACTOR, 1000, int(cooldown * 1000)]
+            )
+        except redis.RedisError as e:
+            print(f"[RATE LIMIT ERROR] 속도 조정 실패: {str(e)}")
+            record_upstream_error('redis', e)
+            return
+        self.factor = float(factor)
+
+    def record_throttled(self, retry_after: float = None):
+        """OpenAI 429: 전체 속도를 줄이고 Retry-After 동안 모든 인스턴스의 호출을 멈춤"""
+        with self._lock:
+            self.throttled += 1
+        cooldown = RATE_LIMIT_DEFAULT_COOLDOWN if retry_after is None else retry_after
+        self._adjust(RATE_LIMIT_DECREASE, 0, cooldown)
+
+    def record_success(self):
+        """속도가 줄어든 상태에서만 조금씩 회복 (평상시에는 Redis 호출 없음)"""
+        if self.factor < 1:
+            self._adjust(1, RATE_LIMIT_INCREASE)
+
+    @contextmanager
+    def limit(self, user_id: str = None):
+        """OpenAI 호출을 감싸 속도 제한 및 429 반영"""
+        self.acquire(user_id)
+        try:
+            yield
+        except Exception as e:
+            if self.enabled and is_rate_limit_error(e):
+                self.record_throttled(get_retry_after(e))
+            raise
+        if self.enabled:
+            self.record_success()
+
+    def call(self, user_id: str, func, retries: int = 0):
+        """
+        func()를 속도 제한 안에서 호출 (클라이언트 자체 재시도는 끄고 사용)
+        429 / 일시적 오류면 retries번까지 다시 토큰을 받아 재시도 (429 뒤에는 대기 시간이 끝날 때까지 acquire가 기다림)
+        """
+        attempt = 0
+        while True:
+            try:
+                with self.limit(user_id):
+                    return func()
+            except RateLimitExceeded:
+                raise
+            except Exception as e:
+                if attempt >= retries or not is_retryable_error(e):
+                    raise
+                if not is_rate_limit_error(e):
+                    time.sleep(min(8.0, 0.5 * 2 ** attempt) + random.uniform(0, 0.25))
+                attempt += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'user_rate': self.user_rate,
+                'global_rate': self.global_rate,
+                'factor': self.factor,
+                'waiting': self.waiting,
+                'allowed': self.allowed,
+                'waited': self.waited,
+                'rejected': self.rejected,
+                'throttled': self.throttled,
+                'fail_open': self.fail_open
+            }
+
+
+openai_limiter = OpenAIRateLimiter()
@@ -0,0 +1,114 @@
+import os
+import gzip
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성: 없으면 Flask 기본 json 사용
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # 선택 의존성: 없으면 gzip만 사용
+    brotli = None
+
+# 응답 직렬화 / 압축 설정 (환경 변수 또는 기본값 사용)
+# orjson(설치된 경우) 또는 default(Flask 기본 json)
+JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'orjson')
+# 이보다 작은 응답은 압축하지 않음 (압축 이득보다 CPU 비용이 큼)
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html'}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    orjson으로 직렬화하는 JSON provider (bytes를 바로 응답 본문으로 사용)
+    datetime/dataclass 등은 Flask 기본 provider와 같은 형식이 되도록 default로 넘김
+    """
+
+    ensure_ascii = False
+
+    def _options(self, indent: bool = False):
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        # json.dumps 전용 인자가 있으면 기본 구현 사용
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def choose_encoding(accept_encoding):
+    """Accept-Encoding에서 사용할 압축 방식 선택 (br > gzip, 지원하지 않으면 None)"""
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def encode_response(response):
+    """
+    GET 응답에 ETag를 붙여 If-None-Match가 같으면 304로 응답하고,
+    크기가 COMPRESSION_MIN_SIZE 이상이면 클라이언트가 지원하는 방식으로 압축
+    """
+    # 스트리밍(SSE) 응답과 이미 인코딩된 응답은 그대로 전달
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    if response.status_code != 200:
+        return response
+
+    if request.method in ('GET', 'HEAD'):
+        # 압축된 표현도 같은 ETag를 쓰므로 weak ETag 사용
+        response.add_etag(weak=True)
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+def init_app(app):
+    """JSON provider 교체 및 ETag/압축 훅 등록"""
+    if JSON_PROVIDER == 'orjson' and orjson is not None:
+        app.json = OrjsonProvider(app)
+    app.after_request(encode_response)
+    return app
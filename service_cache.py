@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# 캐시 크기 / 유효 시간 (환경 변수 또는 기본값 사용)
+SERVICE_CACHE_MAX_SIZE = int(os.getenv('SERVICE_CACHE_MAX_SIZE', '256'))
+SERVICE_CACHE_TTL = int(os.getenv('SERVICE_CACHE_TTL', '600'))
+
+
+class ServiceCache:
+    """(platform, user_id) 키 기반 캘린더 서비스 객체 LRU + TTL 캐시"""
+
+    def __init__(self, max_size=SERVICE_CACHE_MAX_SIZE, ttl=SERVICE_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, platform: str, user_id: str):
+        """캐시된 서비스 객체 반환 (없거나 만료되었으면 None)"""
+        key = (platform, user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            service, credentials, expires_at = entry
+            # TTL 만료 또는 자격 증명이 더 이상 유효하지 않으면 새로 만들도록 함
+            if expires_at <= time.monotonic() or (credentials is not None and not credentials.valid):
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return service
+
+    def put(self, platform: str, user_id: str, service, credentials=None):
+        """서비스 객체 저장 (용량 초과 시 가장 오래 사용되지 않은 항목 제거)"""
+        key = (platform, user_id)
+        with self._lock:
+            self._entries[key] = (service, credentials, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, platform: str, user_id: str):
+        """토큰 갱신/로그아웃 시 해당 사용자 항목 제거"""
+        with self._lock:
+            if self._entries.pop((platform, user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """히트/미스 카운터 반환"""
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+# 프로세스 전역 캐시
+service_cache = ServiceCache()
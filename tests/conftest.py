@@ -1,7 +1,28 @@
 import pytest
 import os
+import datetime
 from dotenv import load_dotenv
 
+
+def make_event(event_id, start, end, summary=None, **extra):
+    """
+    테스트용 Google Calendar 일정 (summary 기본값은 event_id)
+    start/end는 datetime 또는 문자열 (YYYY-MM-DD면 종일 일정), extra는 status/transparency 등 추가 필드
+    """
+    def when(value):
+        if isinstance(value, datetime.datetime):
+            return {'dateTime': value.isoformat()}
+        return {'date': value} if len(value) == 10 else {'dateTime': value}
+
+    event = {
+        'id': event_id,
+        'summary': event_id if summary is None else summary,
+        'start': when(start),
+        'end': when(end)
+    }
+    event.update(extra)
+    return event
+
 @pytest.fixture(autouse=True)
 def load_env():
     """모든 테스트에서 자동으로 실행되는 픽스처"""
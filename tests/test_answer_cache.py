@@ -0,0 +1,78 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import redis
+
+from answer_cache import AnswerCache
+from rate_limiter import OpenAIRateLimiter
+from gpt_calendar import process_calendar_query
+
+
+def make_store_redis():
+    """get/set만 흉내 내는 Redis 모의 객체"""
+    store = {}
+    mock_redis = MagicMock()
+    mock_redis.get.side_effect = store.get
+    mock_redis.set.side_effect = lambda key, value, ex=None: store.__setitem__(key, value)
+    return mock_redis, store
+
+
+class TestAnswerCache(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.cache = AnswerCache(ttl=60, enabled=True)
+
+    def test_key_changes_with_events(self):
+        """일정 목록이 바뀌면 키가 달라짐 (질문 표현의 공백/문장부호는 무시)"""
+        args = ('a@test.com', '오늘 일정 알려줘', '2024-03-20T00:00:00', '2024-03-20T23:59:59')
+        key = self.cache.make_key(*args, '- 09:00-10:00 회의', 'v1', '2024-03-20')
+        self.assertEqual(
+            key,
+            self.cache.make_key('a@test.com', '오늘  일정 알려줘?', *args[2:], '- 09:00-10:00 회의', 'v1', '2024-03-20')
+        )
+        self.assertNotEqual(key, self.cache.make_key(*args, '- 10:00-11:00 회의', 'v1', '2024-03-20'))
+        self.assertNotEqual(key, self.cache.make_key(*args, '- 09:00-10:00 회의', 'v2', '2024-03-20'))
+        self.assertTrue(key.startswith('answer:a@test.com:'))
+
+    def test_get_set(self):
+        """저장한 응답을 TTL과 함께 저장하고 다시 읽음"""
+        mock_redis, _ = make_store_redis()
+        with patch('auth_manager.redis_client', mock_redis):
+            self.assertIsNone(self.cache.get('k'))
+            self.cache.set('k', '비어 있어요')
+            self.assertEqual(self.cache.get('k'), '비어 있어요')
+        self.assertEqual(mock_redis.set.call_args.kwargs['ex'], 60)
+        self.assertEqual(self.cache.stats()['hits'], 1)
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+    def test_redis_error_is_miss(self):
+        """Redis 오류는 캐시 미스로 처리"""
+        mock_redis = MagicMock()
+        mock_redis.get.side_effect = redis.ConnectionError('down')
+        with patch('auth_manager.redis_client', mock_redis):
+            self.assertIsNone(self.cache.get('k'))
+
+    def test_process_calendar_query_skips_answer_call(self):
+        """같은 질문과 일정이면 두 번째 요청은 GPT 응답 생성을 건너뜀"""
+        mock_redis, _ = make_store_redis()
+        client = MagicMock()
+        client.with_options.return_value = client
+        client.chat.completions.create.return_value.choices[0].message.content = '오늘은 일정이 없습니다.'
+        client.chat.completions.create.return_value.usage = None
+        with patch('auth_manager.redis_client', mock_redis), \
+             patch('gpt_calendar.get_openai_client', return_value=client), \
+             patch('gpt_calendar.check_calendar', return_value=[]), \
+             patch('gpt_calendar.answer_cache', AnswerCache(enabled=True)), \
+             patch('gpt_calendar.openai_limiter', OpenAIRateLimiter(enabled=False)):
+            first = process_calendar_query('오늘 일정 알려줘', user_id='a@test.com')
+            second = process_calendar_query('오늘 일정 알려줘', user_id='a@test.com')
+
+        self.assertEqual(client.chat.completions.create.call_count, 1)
+        self.assertEqual(first['query_info']['answer_source'], 'gpt')
+        self.assertEqual(second['query_info']['answer_source'], 'cache')
+        self.assertEqual(second['response'], '오늘은 일정이 없습니다.')
+        self.assertNotIn('answer_cache_key', second)
+
+
+if __name__ == '__main__':
+    unittest.main()
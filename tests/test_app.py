@@ -0,0 +1,77 @@
+import os
+import sys
+import unittest
+import subprocess
+from unittest.mock import patch, MagicMock
+
+import app as app_module
+from config import AppConfig
+
+
+class TestApp(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        with patch('app.start_token_refresher'):
+            self.app = app_module.create_app()
+        self.client = self.app.test_client()
+
+    def test_index(self):
+        """앱 팩토리로 만든 앱 기본 라우트 테스트"""
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('AI Secretary', response.get_data(as_text=True))
+
+    def test_readyz(self):
+        """필수 설정이 빠진 인스턴스는 readiness 확인에 실패"""
+        self.assertEqual(self.client.get('/readyz').status_code, 200)
+
+        with patch('app.start_token_refresher'):
+            app = app_module.create_app(AppConfig(google_client_id='a'))
+        response = app.test_client().get('/readyz')
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('OPENAI_API_KEY', response.get_json()['message'])
+
+    def test_preload_skips_refresher(self):
+        """start_background=False(gunicorn preload 마스터)면 백그라운드 토큰 갱신을 시작하지 않음"""
+        with patch('app.start_token_refresher') as start:
+            app_module.create_app(start_background=False)
+        start.assert_not_called()
+
+    def test_calendar_resolves_service_once(self):
+        """요청당 서비스 객체를 한 번만 해석"""
+        with patch('main.get_calendar_service', return_value=MagicMock()) as mock_service, \
+             patch('main.get_events', return_value=[]):
+            response = self.client.get(
+                '/calendar?start_date=2024-03-20T00:00:00&end_date=2024-03-21T00:00:00&user_id=a@test.com'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_service.call_count, 1)
+
+    def test_ask_gpt_stream(self):
+        """SSE 스트리밍 응답 테스트"""
+        events = iter([
+            ('query_info', {'status': 'success', 'query_info': {}, 'events': []}),
+            ('token', {'content': '비어 있어요'}),
+            ('done', {'status': 'success', 'message': '비어 있어요'})
+        ])
+        with patch('app.stream_calendar_query', return_value=events):
+            response = self.client.post('/ask_gpt?stream=1', json={'query': '오늘 일정', 'user_id': 'a@test.com'})
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        body = response.get_data(as_text=True)
+        self.assertIn('event: query_info', body)
+        self.assertIn('event: done', body)
+
+    def test_import_defers_heavy_modules(self):
+        """앱 import 시 무거운 SDK와 Redis 클라이언트를 만들지 않음 (콜드 스타트)"""
+        code = (
+            "import sys, app, auth_manager; "
+            "print([m for m in ('openai', 'googleapiclient', 'google_auth_oauthlib') if m in sys.modules], "
+            "auth_manager.redis_client is None)"
+        )
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip().splitlines()[-1], '[] True')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import datetime
+
+from google.oauth2.credentials import Credentials
+
+from auth_manager import AuthManager, EXPIRY_FORMAT
+
+
+def make_tokens(token, expiry, fence=1):
+    return {
+        'token': token,
+        'refresh_token': 'refresh_token',
+        'client_id': 'test_client_id',
+        'client_secret': 'test_client_secret',
+        'expiry': expiry.strftime(EXPIRY_FORMAT),
+        'fence': fence
+    }
+
+
+class TestTokenRefreshSingleFlight(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis_patcher = patch('auth_manager.redis_client')
+        self.mock_redis = self.redis_patcher.start()
+        self.mock_redis.incr.return_value = 7
+        self.save_script = MagicMock(return_value=1)
+        self.release_script = MagicMock(return_value=1)
+        self.mock_redis.register_script.side_effect = (
+            lambda script: self.save_script if 'cjson' in script else self.release_script
+        )
+        self.auth = AuthManager('google')
+        self.now = datetime.datetime.utcnow()
+        self.expired = Credentials.from_authorized_user_info(
+            make_tokens('old_token', self.now - datetime.timedelta(hours=1)))
+
+    def tearDown(self):
+        self.redis_patcher.stop()
+
+    def test_lock_holder_refreshes_with_fence(self):
+        """락을 잡은 쪽이 갱신하고 발급받은 fence로 저장"""
+        self.mock_redis.set.return_value = True
+        self.mock_redis.get.return_value = json.dumps(make_tokens('old_token', self.now - datetime.timedelta(hours=1)))
+
+        with patch.object(Credentials, 'refresh') as mock_refresh:
+            self.auth.refresh_credentials('a@test.com', self.expired)
+
+        mock_refresh.assert_called_once()
+        _, kwargs = self.save_script.call_args
+        saved = json.loads(kwargs['args'][0])
+        self.assertEqual(saved['fence'], 7)
+        self.assertEqual(kwargs['args'][1:], [7, '1'])
+        self.release_script.assert_called_once()
+
+    def test_waiter_reuses_fresh_token(self):
+        """다른 곳이 갱신 중이면 갱신하지 않고 새로 저장된 토큰 재사용"""
+        self.mock_redis.set.return_value = False
+        self.mock_redis.get.side_effect = [
+            json.dumps(make_tokens('old_token', self.now - datetime.timedelta(hours=1))),
+            json.dumps(make_tokens('new_token', self.now + datetime.timedelta(hours=1), fence=8))
+        ]
+
+        with patch.object(Credentials, 'refresh') as mock_refresh, patch('auth_manager.time.sleep'):
+            creds = self.auth.refresh_credentials('a@test.com', self.expired)
+
+        mock_refresh.assert_not_called()
+        self.save_script.assert_not_called()
+        self.assertEqual(creds.token, 'new_token')
+
+    def test_rejected_token_is_not_reused(self):
+        """401로 거절된 토큰은 저장된 토큰과 같아도 재사용하지 않고 갱신"""
+        self.mock_redis.set.return_value = True
+        valid = make_tokens('old_token', self.now + datetime.timedelta(hours=1))
+        self.mock_redis.get.return_value = json.dumps(valid)
+        creds = Credentials.from_authorized_user_info(valid)
+
+        with patch.object(Credentials, 'refresh') as mock_refresh:
+            self.auth.refresh_credentials('a@test.com', creds, reject_current=True)
+
+        mock_refresh.assert_called_once()
+        self.save_script.assert_called_once()
+
+    def test_scripts_registered_once(self):
+        """저장할 때마다 Lua 스크립트를 다시 등록하지 않음"""
+        self.auth.save_tokens('a@test.com', make_tokens('token', self.now), fence=3)
+        self.auth.save_tokens('a@test.com', make_tokens('token', self.now), fence=4)
+        self.assertEqual(self.mock_redis.register_script.call_count, 1)
+        self.assertEqual(self.save_script.call_count, 2)
+
+    def test_stale_fence_is_rejected(self):
+        """더 새로운 토큰이 저장되어 있으면 저장하지 않음"""
+        self.save_script.return_value = 0
+        self.assertFalse(self.auth.save_tokens('a@test.com', make_tokens('old_token', self.now), fence=3))
+        self.mock_redis.pipeline.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
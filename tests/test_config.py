@@ -0,0 +1,38 @@
+import unittest
+import dataclasses
+
+from config import AppConfig, DEFAULT_GOOGLE_REDIRECT_URI
+
+
+class TestAppConfig(unittest.TestCase):
+    def test_from_env(self):
+        """환경 변수에서 설정 생성 (빈 값은 없는 것으로 처리)"""
+        config = AppConfig.from_env({
+            'GOOGLE_CLIENT_ID': 'client_id',
+            'GOOGLE_PROJECT_ID': 'project_id',
+            'GOOGLE_CLIENT_SECRET': ' secret ',
+            'OPENAI_API_KEY': '',
+            'SECRET_KEY': 'secret_key'
+        })
+        self.assertEqual(config.google_client_secret, 'secret')
+        self.assertIsNone(config.openai_api_key)
+        self.assertEqual(config.google_redirect_uri, DEFAULT_GOOGLE_REDIRECT_URI)
+        self.assertEqual(config.missing, ['OPENAI_API_KEY'])
+
+    def test_ready(self):
+        """필수 설정이 모두 있으면 ready"""
+        config = AppConfig(
+            google_client_id='a', google_project_id='b',
+            google_client_secret='c', openai_api_key='d'
+        )
+        self.assertEqual(config.missing, [])
+
+    def test_frozen(self):
+        """설정 객체는 변경 불가"""
+        config = AppConfig()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            config.openai_api_key = 'changed'
+
+
+if __name__ == '__main__':
+    unittest.main()
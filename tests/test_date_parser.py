@@ -0,0 +1,70 @@
+import unittest
+import datetime
+
+from date_parser import parse_date_range, DateParseStats
+
+# 2024-03-20 (수요일) 10:00 기준
+NOW = datetime.datetime(2024, 3, 20, 10, 0)
+
+
+class TestParseDateRange(unittest.TestCase):
+    def assertRange(self, query, start, end):
+        result = parse_date_range(query, NOW)
+        self.assertIsNotNone(result, query)
+        self.assertEqual(result['start_time'], start)
+        self.assertEqual(result['end_time'], end)
+
+    def test_relative_days(self):
+        """오늘/내일/모레 등 상대 날짜 테스트"""
+        self.assertRange("오늘 일정 알려줘", '2024-03-20T00:00:00+09:00', '2024-03-20T23:59:59+09:00')
+        self.assertRange("내일 뭐 있어?", '2024-03-21T00:00:00+09:00', '2024-03-21T23:59:59+09:00')
+        self.assertRange("내일모레 일정", '2024-03-22T00:00:00+09:00', '2024-03-22T23:59:59+09:00')
+        self.assertRange("tomorrow", '2024-03-21T00:00:00+09:00', '2024-03-21T23:59:59+09:00')
+
+    def test_weeks_and_months(self):
+        """주/월 단위 표현 테스트"""
+        self.assertRange("이번 주 일정", '2024-03-18T00:00:00+09:00', '2024-03-24T23:59:59+09:00')
+        self.assertRange("다음 주 월요일 일정", '2024-03-25T00:00:00+09:00', '2024-03-25T23:59:59+09:00')
+        self.assertRange("next week", '2024-03-25T00:00:00+09:00', '2024-03-31T23:59:59+09:00')
+        self.assertRange("다음 달 일정", '2024-04-01T00:00:00+09:00', '2024-04-30T23:59:59+09:00')
+        self.assertRange("이번 주말", '2024-03-23T00:00:00+09:00', '2024-03-24T23:59:59+09:00')
+
+    def test_absolute_dates(self):
+        """절대 날짜 표현 테스트"""
+        self.assertRange("3월 20일 일정", '2024-03-20T00:00:00+09:00', '2024-03-20T23:59:59+09:00')
+        self.assertRange("2024-12-01 schedule", '2024-12-01T00:00:00+09:00', '2024-12-01T23:59:59+09:00')
+        self.assertRange("March 22nd", '2024-03-22T00:00:00+09:00', '2024-03-22T23:59:59+09:00')
+
+    def test_range_expression(self):
+        """구간 표현 테스트"""
+        self.assertRange("내일부터 금요일까지", '2024-03-21T00:00:00+09:00', '2024-03-22T23:59:59+09:00')
+
+    def test_low_confidence_falls_back(self):
+        """확신할 수 없는 쿼리는 None 반환 (GPT로 위임)"""
+        self.assertIsNone(parse_date_range("내일 오후 3시 일정", NOW))
+        self.assertIsNone(parse_date_range("오늘 말고 내일", NOW))
+        # 제외하라는 표현은 GPT에 맡김
+        self.assertIsNone(parse_date_range("주말 말고 평일 일정", NOW))
+        self.assertIsNone(parse_date_range("이번 주 말고 다음 주", NOW))
+        self.assertIsNone(parse_date_range("이번 주 말고", NOW))
+        self.assertIsNone(parse_date_range("내일 빼고 이번 주 일정", NOW))
+        self.assertIsNone(parse_date_range("회의 언제야", NOW))
+        self.assertIsNone(parse_date_range("2월 30일", NOW))
+
+
+class TestDateParseStats(unittest.TestCase):
+    def test_avoidance_rate(self):
+        """GPT 회피율 계산 테스트"""
+        stats = DateParseStats()
+        stats.record('local')
+        stats.record('local')
+        stats.record('local')
+        stats.record('gpt')
+        result = stats.stats()
+        self.assertEqual(result['local'], 3)
+        self.assertEqual(result['gpt'], 1)
+        self.assertEqual(result['gpt_avoidance_rate'], 0.75)
+
+
+if __name__ == '__main__':
+    unittest.main()
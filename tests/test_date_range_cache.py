@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import datetime
+from zoneinfo import ZoneInfo
+
+import redis
+
+from date_range_cache import DateRangeCache, normalize_query, seconds_until_midnight
+
+NOW = datetime.datetime(2024, 3, 20, 23, 0, tzinfo=ZoneInfo('Asia/Seoul'))
+RANGE = {'start_time': '2024-03-21T09:00:00+09:00', 'end_time': '2024-03-21T12:00:00+09:00'}
+
+
+class TestDateRangeCache(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.cache = DateRangeCache(max_size=8)
+        self.redis_patcher = patch('date_range_cache.auth_manager.redis_client')
+        self.mock_redis = self.redis_patcher.start()
+        self.mock_redis.get.return_value = None
+
+    def tearDown(self):
+        self.redis_patcher.stop()
+
+    def test_normalize_query(self):
+        """쿼리 정규화 테스트"""
+        self.assertEqual(normalize_query("  내일 오전  일정 알려줘?! "), "내일 오전 일정 알려줘")
+        self.assertEqual(normalize_query("Tomorrow Morning"), "tomorrow morning")
+
+    def test_expires_at_local_midnight(self):
+        """현지 자정 만료 테스트"""
+        self.assertEqual(seconds_until_midnight(NOW), 3600)
+
+    def test_key_includes_reference_date(self):
+        """기준 날짜가 바뀌면 다른 키 사용"""
+        tomorrow = NOW + datetime.timedelta(days=1)
+        self.assertNotEqual(self.cache.make_key("내일 오전", NOW), self.cache.make_key("내일 오전", tomorrow))
+        self.assertEqual(self.cache.make_key("내일 오전", NOW), self.cache.make_key("내일  오전?", NOW))
+
+    def test_set_then_l1_hit(self):
+        """저장 후 Redis를 거치지 않고 L1에서 반환"""
+        self.cache.set("내일 오전", RANGE, NOW)
+        self.mock_redis.set.assert_called_once()
+        _, kwargs = self.mock_redis.set.call_args
+        self.assertEqual(kwargs['ex'], 3600)
+
+        self.assertEqual(self.cache.get("내일 오전", NOW), RANGE)
+        self.mock_redis.get.assert_not_called()
+        self.assertEqual(self.cache.stats()['l1_hits'], 1)
+
+    def test_l2_hit_fills_l1(self):
+        """Redis 히트 시 L1 채움"""
+        self.mock_redis.get.return_value = json.dumps(RANGE)
+        self.assertEqual(self.cache.get("내일 오전", NOW), RANGE)
+        self.assertEqual(self.cache.get("내일 오전", NOW), RANGE)
+        self.assertEqual(self.mock_redis.get.call_count, 1)
+        stats = self.cache.stats()
+        self.assertEqual(stats['l2_hits'], 1)
+        self.assertEqual(stats['l1_hits'], 1)
+
+    def test_redis_error_is_miss(self):
+        """Redis 오류는 캐시 미스로 처리"""
+        self.mock_redis.get.side_effect = redis.ConnectionError("down")
+        self.assertIsNone(self.cache.get("내일 오전", NOW))
+        self.assertEqual(self.cache.stats()['misses'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,196 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+import time
+import datetime
+from zoneinfo import ZoneInfo
+
+from googleapiclient.errors import HttpError
+
+from event_store import EventStore, encode_event, decode_event, subtract_windows
+from tests.conftest import make_event
+
+try:
+    import fakeredis
+except ImportError:  # 인덱스 조회(Lua)는 fakeredis가 있어야 확인 가능
+    fakeredis = None
+
+KST = ZoneInfo('Asia/Seoul')
+
+
+def at(day, hour=0):
+    return datetime.datetime(2024, 3, day, hour, tzinfo=KST)
+
+
+class TestEventEncoding(unittest.TestCase):
+    def test_round_trip(self):
+        """압축 형식으로 저장했다가 Google API 형식으로 복원"""
+        timed = make_event('a', '2024-03-20T10:00:00+09:00', '2024-03-20T11:00:00+09:00', status='confirmed')
+        timed['recurringEventId'] = 'series'
+        all_day = {'id': 'b', 'start': {'date': '2024-03-20'}, 'end': {'date': '2024-03-21'}, 'transparency': 'transparent'}
+        self.assertEqual(decode_event(encode_event(timed)), timed)
+        self.assertEqual(decode_event(encode_event(all_day)), all_day)
+        self.assertLess(len(encode_event(timed)), len(json.dumps(timed)))
+
+    def test_subtract_windows(self):
+        """조회 기간에서 이미 받은 구간을 뺀 나머지"""
+        self.assertEqual(subtract_windows(0, 100, [(10, 20), (15, 30), (90, 120)]), [(0, 10), (30, 90)])
+        self.assertEqual(subtract_windows(0, 100, [(-10, 200)]), [])
+
+
+class TestEventStoreSync(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis_patcher = patch('event_store.auth_manager.redis_client')
+        self.mock_redis = self.redis_patcher.start()
+        self.pipe = self.mock_redis.pipeline.return_value
+        self.store = EventStore('google', 'test@test.com', staleness=30)
+        self.service = MagicMock()
+
+    def tearDown(self):
+        self.redis_patcher.stop()
+
+    def test_fresh_store_skips_sync(self):
+        """staleness 이내면 Google을 호출하지 않음"""
+        self.mock_redis.hgetall.return_value = {'sync_token': 'tok', 'synced_at': str(time.time())}
+        self.store.ensure_fresh(self.service)
+        self.service.events.assert_not_called()
+
+    def test_incremental_sync_applies_delta(self):
+        """증분 동기화 시 변경분 저장 / 취소된 일정은 본문과 인덱스에서 삭제"""
+        self.mock_redis.hgetall.return_value = {'sync_token': 'old', 'synced_at': '0'}
+        self.service.events().list().execute.return_value = {
+            'items': [
+                make_event('a', '2024-03-20T10:00:00+09:00', '2024-03-20T11:00:00+09:00'),
+                {'id': 'b', 'status': 'cancelled'}
+            ],
+            'nextSyncToken': 'new'
+        }
+        state = self.store.ensure_fresh(self.service)
+
+        _, kwargs = self.service.events().list.call_args
+        self.assertEqual(kwargs['syncToken'], 'old')
+        self.pipe.delete.assert_not_called()
+        self.pipe.hdel.assert_called_once_with(self.store.events_key, 'b')
+        self.pipe.zrem.assert_any_call(self.store.starts_key, 'b')
+        self.assertIn('a', self.pipe.hset.call_args_list[0].kwargs['mapping'])
+        self.pipe.zadd.assert_called_once_with(self.store.starts_key, {'a': at(20, 10).timestamp()})
+        self.assertEqual(self.pipe.hset.call_args_list[1].kwargs['mapping']['sync_token'], 'new')
+        self.assertEqual(state['sync_token'], 'new')
+
+    def test_gone_resets_store(self):
+        """410 응답이면 저장소와 동기화 상태를 비움 (다음 조회 때 다시 받음)"""
+        self.mock_redis.hgetall.return_value = {'sync_token': 'expired', 'synced_at': '0'}
+        self.service.events().list().execute.side_effect = HttpError(MagicMock(status=410), b'Gone')
+
+        self.assertEqual(self.store.ensure_fresh(self.service), {})
+        deleted = self.mock_redis.delete.call_args.args
+        self.assertIn(self.store.events_key, deleted)
+        self.assertIn(self.store.starts_key, deleted)
+        self.assertIn(self.store.sync_key, deleted)
+
+
+@unittest.skipIf(fakeredis is None, 'fakeredis 필요')
+class TestEventIndex(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.redis_patcher = patch('event_store.auth_manager.redis_client', self.redis)
+        self.redis_patcher.start()
+        self.store = EventStore('google', 'test@test.com', staleness=30)
+
+    def tearDown(self):
+        self.redis_patcher.stop()
+
+    def fake_service(self, events, sync_token=None):
+        """timeMin/timeMax로 거른 일정을 반환하는 가짜 Calendar API (호출 기간 기록)"""
+        service = MagicMock()
+        self.requested = []
+
+        def list_events(**params):
+            time_min = datetime.datetime.fromisoformat(params['timeMin'])
+            time_max = datetime.datetime.fromisoformat(params['timeMax'])
+            self.requested.append((time_min, time_max))
+            items = [
+                event for event in events
+                if datetime.datetime.fromisoformat(event['start']['dateTime']) < time_max
+                and datetime.datetime.fromisoformat(event['end']['dateTime']) > time_min
+            ]
+            request = MagicMock()
+            request.execute.return_value = {'items': items, 'nextSyncToken': sync_token} if sync_token else {'items': items}
+            return request
+
+        service.events().list.side_effect = list_events
+        return service
+
+    def test_query_filters_and_sorts(self):
+        """기간과 겹치는 일정만 시작 시간 순으로 반환 (긴 일정 포함)"""
+        pipe = self.redis.pipeline()
+        self.store._store(pipe, [
+            make_event('late', '2024-03-20T15:00:00+09:00', '2024-03-20T16:00:00+09:00'),
+            make_event('early', '2024-03-20T09:00:00+09:00', '2024-03-20T10:00:00+09:00'),
+            make_event('other_day', '2024-03-22T09:00:00+09:00', '2024-03-22T10:00:00+09:00'),
+            make_event('trip', '2024-03-10T09:00:00+09:00', '2024-03-25T18:00:00+09:00'),
+            {'id': 'all_day', 'summary': '종일', 'start': {'date': '2024-03-20'}, 'end': {'date': '2024-03-21'}},
+        ])
+        pipe.execute()
+        self.assertEqual(self.redis.zrange(self.store.long_ends_key, 0, -1), ['trip'])
+
+        events = self.store.query(at(20), at(20, 23))
+        self.assertEqual([e['id'] for e in events], ['trip', 'all_day', 'early', 'late'])
+        self.assertEqual([e['id'] for e in self.store.query(at(26), at(27))], [])
+
+    def test_query_script_registered_once(self):
+        """조회할 때마다 Lua 스크립트를 다시 등록하지 않음"""
+        with patch.object(self.redis, 'register_script', wraps=self.redis.register_script) as register:
+            self.store.query(at(20), at(21))
+            EventStore('google', 'other@test.com').query(at(20), at(21))
+        self.assertEqual(register.call_count, 1)
+
+    def test_fetches_only_gaps(self):
+        """처음에는 기본 기간까지 받고, 받아 둔 구간 안의 조회는 Google을 호출하지 않으며 빠진 구간만 받음"""
+        today = datetime.datetime.now(KST).replace(hour=0, minute=0, second=0, microsecond=0)
+        day = today + datetime.timedelta(days=5)
+        next_day = day + datetime.timedelta(days=1)
+        events = [make_event('a', day.replace(hour=10), day.replace(hour=11))]
+        service = self.fake_service(events)
+        with patch('event_store.EVENT_SYNC_PAST_DAYS', 1), patch('event_store.EVENT_SYNC_FUTURE_DAYS', 3):
+            found = self.store.get_events(service, day.replace(hour=9), day.replace(hour=12))
+            self.assertEqual([e['id'] for e in found], ['a'])
+            # 기본 기간과 멀리 떨어진 요청 기간은 따로 받음
+            self.assertEqual(self.requested, [(today - datetime.timedelta(days=1), today + datetime.timedelta(days=3)),
+                                              (day, next_day)])
+            self.store.get_events(service, day.replace(hour=13), day.replace(hour=18))
+            self.assertEqual(len(self.requested), 2)
+
+            events.append(make_event('b', next_day.replace(hour=10), next_day.replace(hour=11)))
+            found = self.store.get_events(service, day.replace(hour=9), next_day.replace(hour=12))
+        self.assertEqual([e['id'] for e in found], ['a', 'b'])
+        self.assertEqual(self.requested[-1], (next_day, next_day + datetime.timedelta(days=1)))
+
+    def test_stale_window_drops_deleted(self):
+        """syncToken이 없는 구간은 staleness가 지나면 다시 받아 그 사이 삭제된 일정을 지움"""
+        events = [make_event('a', at(20, 10), at(20, 11))]
+        service = self.fake_service(events)
+        self.store.get_events(service, at(20), at(21))
+        events.clear()
+        with patch('event_store.time.time', return_value=time.time() + 60):
+            self.assertEqual(self.store.get_events(service, at(20), at(21)), [])
+        self.assertEqual(self.redis.hlen(self.store.events_key), 0)
+        self.assertEqual(self.redis.zcard(self.store.starts_key), 0)
+
+    def test_sync_token_covers_window(self):
+        """구간 조회에서 받은 syncToken은 그 구간을 계속 최신으로 유지 (이후엔 증분 동기화만)"""
+        service = self.fake_service([], sync_token='tok')
+        self.redis.hset(f"events:google:test@test.com:primary", 'old', '{}')
+        self.store.get_events(service, at(20), at(21))
+        state = self.redis.hgetall(self.store.sync_key)
+        self.assertEqual(state['sync_token'], 'tok')
+        self.assertFalse(self.redis.exists(f"events:google:test@test.com:primary"))
+
+        state['synced_at'] = '0'
+        self.assertEqual(self.store.missing_windows(state, at(20, 9).timestamp(), at(20, 10).timestamp()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
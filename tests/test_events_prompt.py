@@ -0,0 +1,58 @@
+import unittest
+from zoneinfo import ZoneInfo
+
+from events_prompt import build_events_prompt, count_tokens
+from tests.conftest import make_event
+
+KST = ZoneInfo('Asia/Seoul')
+
+
+class TestEventsPrompt(unittest.TestCase):
+    def test_group_by_day_and_compact_time(self):
+        """날짜별로 묶고 시간은 HH:MM-HH:MM, 종일 일정은 '종일'로 표시"""
+        events = [
+            make_event('1', '2024-03-20T09:00:00+09:00', '2024-03-20T10:00:00+09:00', summary='팀 회의'),
+            make_event('2', '2024-03-20T03:00:00Z', '2024-03-20T04:00:00Z', summary='점심'),
+            make_event('3', '2024-03-21', '2024-03-22', summary='휴가')
+        ]
+        text, info = build_events_prompt(events, 'start', 'end', tz=KST)
+        self.assertIn('2024-03-20 (수)\n- 09:00-10:00 팀 회의\n- 12:00-13:00 점심\n', text)
+        self.assertIn('2024-03-21 (목)\n- 종일 휴가\n', text)
+        self.assertNotIn('dateTime', text)
+        self.assertEqual(info['lines'], 3)
+        self.assertEqual(info['tokens'], count_tokens(text))
+
+    def test_dedupe_recurring(self):
+        """같은 반복 일정의 인스턴스는 한 줄로 합침"""
+        events = [
+            make_event(str(i), f'2024-03-{20 + i}T10:00:00+09:00', f'2024-03-{20 + i}T10:15:00+09:00',
+                       summary='스탠드업', recurringEventId='series')
+            for i in range(5)
+        ]
+        text, info = build_events_prompt(events, 'start', 'end', tz=KST)
+        self.assertEqual(text.count('스탠드업'), 1)
+        self.assertIn('(반복 5회, ~03-24)', text)
+        self.assertEqual(info['events'], 5)
+
+    def test_budget_overflow_summary(self):
+        """예산을 넘으면 남은 일정은 날짜별 개수로 요약"""
+        events = [
+            make_event(str(i), f'2024-03-{1 + i // 4:02d}T{9 + i % 4:02d}:00:00+09:00',
+                       f'2024-03-{1 + i // 4:02d}T{10 + i % 4:02d}:00:00+09:00', summary=f'회의 {i}')
+            for i in range(80)
+        ]
+        text, info = build_events_prompt(events, 'start', 'end', budget=150, tz=KST)
+        self.assertLessEqual(info['tokens'], 150 + 60)
+        self.assertGreater(info['omitted'], 0)
+        self.assertEqual(info['lines'] + info['omitted'], 80)
+        self.assertIn(f"길이 제한으로 {info['omitted']}개 항목 생략", text)
+
+    def test_no_events(self):
+        """일정이 없으면 비어 있다고 표시"""
+        text, info = build_events_prompt([], 'start', 'end')
+        self.assertIn('예정된 일정이 없습니다', text)
+        self.assertEqual(info['events'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import time
+import datetime
+import unittest
+from unittest.mock import patch, MagicMock
+from zoneinfo import ZoneInfo
+
+from free_busy import BusyIndex, BusyIndexCache, is_free_slot_query, parse_min_minutes, format_free_slots
+from gpt_calendar import prepare_calendar_query, check_free_slots
+from app import create_app
+from config import AppConfig
+from tests.conftest import make_event
+
+TZ = ZoneInfo('Asia/Seoul')
+
+
+def at(day, hour, minute=0):
+    return datetime.datetime(2024, 3, day, hour, minute, tzinfo=TZ)
+
+
+class TestBusyIndex(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.events = [
+            make_event('a', at(20, 9), at(20, 10)),
+            make_event('b', at(20, 9, 30), at(20, 11)),
+            make_event('c', at(20, 13), at(20, 13, 20)),
+            make_event('holiday', at(20, 14), at(20, 17), transparency='transparent'),
+            make_event('d', at(21, 10), at(21, 17, 30))
+        ]
+        self.index = BusyIndex.from_events(self.events, TZ)
+
+    def test_merges_overlapping(self):
+        """겹치는 일정은 하나의 바쁜 구간으로 합치고 '한가함' 일정은 제외"""
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.busy_between(at(20, 0).timestamp(), at(20, 12).timestamp()),
+                         [(at(20, 9).timestamp(), at(20, 11).timestamp())])
+
+    def test_free_slots_in_working_hours(self):
+        """날마다 근무 시간 안에서 최소 길이 이상 빈 시간만 반환"""
+        slots = self.index.free_slots(at(20, 0), at(21, 23, 59), 60, datetime.time(9), datetime.time(18), TZ)
+        self.assertEqual(slots, [
+            (at(20, 11), at(20, 13)),
+            (at(20, 13, 20), at(20, 18)),
+            (at(21, 9), at(21, 10))
+        ])
+
+    def test_query_is_fast(self):
+        """일정 수천 개에서도 빈 시간 조회는 1ms 미만"""
+        events = [make_event(str(i), at(1, 9) + datetime.timedelta(minutes=45 * i),
+                             at(1, 9) + datetime.timedelta(minutes=45 * i + 30)) for i in range(3000)]
+        index = BusyIndex.from_events(events, TZ)
+        started = time.perf_counter()
+        for _ in range(100):
+            index.free_slots(at(20, 0), at(20, 23, 59), 10, datetime.time(9), datetime.time(18), TZ)
+        self.assertLess((time.perf_counter() - started) / 100, 0.001)
+
+    def test_cache_reuses_covering_range(self):
+        """인덱스를 만든 기간 안의 조회에만 재사용"""
+        cache = BusyIndexCache(ttl=60)
+        cache.put('google', 'a@test.com', at(20, 0), at(22, 0), self.index)
+        self.assertIs(cache.get('google', 'a@test.com', at(20, 9), at(21, 0)), self.index)
+        self.assertIsNone(cache.get('google', 'a@test.com', at(19, 0), at(21, 0)))
+
+
+class TestFreeSlotQuery(unittest.TestCase):
+    def test_intent_and_duration(self):
+        """빈 시간 질문 판별과 최소 길이 추출"""
+        self.assertTrue(is_free_slot_query('내일 언제 비어 있어?'))
+        self.assertTrue(is_free_slot_query('이번 주 빈 시간 알려줘'))
+        self.assertTrue(is_free_slot_query('오후에 한가한 시간 있어?'))
+        self.assertTrue(is_free_slot_query('Am I free tomorrow?'))
+        self.assertFalse(is_free_slot_query('내일 일정 알려줘'))
+        # 빈 시간 질문이 아닌데 비슷한 단어가 들어간 일정 질문
+        for query in ('한가위 일정 알려줘', 'Freedom 프로젝트 회의 언제야?', '여유 자금 회의 언제야?', '내일 회의 시간 있어?'):
+            self.assertFalse(is_free_slot_query(query), query)
+        self.assertEqual(parse_min_minutes('1시간 30분 비는 시간'), 90)
+        self.assertEqual(parse_min_minutes('내일 언제 비어 있어?', 30), 30)
+
+    def test_format(self):
+        """빈 시간을 날짜별로 묶어 표시"""
+        slots = [{'start': at(20, 11).isoformat(), 'end': at(20, 13).isoformat(), 'minutes': 120}]
+        text = format_free_slots(slots, '2024-03-20T00:00:00+09:00', '2024-03-20T23:59:59+09:00', 60)
+        self.assertIn('2024-03-20 (수)\n- 11:00-13:00 (120분)\n', text)
+
+    def test_prepare_uses_free_slots_tool(self):
+        """빈 시간 질문이면 find_free_slots 도구 결과를 GPT 대화에 넣음"""
+        slots = [{'start': at(20, 11).isoformat(), 'end': at(20, 13).isoformat(), 'minutes': 120}]
+        with patch('gpt_calendar.find_free_slots', return_value=slots) as find:
+            prepared = prepare_calendar_query('내일 1시간 비는 시간 있어?', user_id='a@test.com', service=MagicMock())
+
+        self.assertEqual(prepared['status'], 'success')
+        self.assertEqual(prepared['free_slots'], slots)
+        self.assertEqual(prepared['query_info']['tool'], 'find_free_slots')
+        self.assertEqual(find.call_args.args[5], 60)
+        tool_call = prepared['messages'][-2]['tool_calls'][0]
+        self.assertEqual(tool_call['function']['name'], 'find_free_slots')
+        self.assertIn('11:00-13:00', prepared['messages'][-1]['content'])
+
+    def test_gpt_chooses_tool(self):
+        """로컬에서 날짜를 해석하지 못하면 두 도구를 모두 주고 GPT가 고른 도구를 사용"""
+        client = MagicMock()
+        client.with_options.return_value = client
+        tool_call = client.chat.completions.create.return_value.choices[0].message.tool_calls[0]
+        tool_call.id = 'call_1'
+        tool_call.function.name = 'find_free_slots'
+        tool_call.function.arguments = '{"start_date": "2024-03-20T00:00:00+09:00", "end_date": "2024-03-20T23:59:59+09:00", "min_minutes": 90}'
+        with patch('gpt_calendar.resolve_date_range_locally', return_value=None), \
+             patch('gpt_calendar.date_range_cache'), \
+             patch('gpt_calendar.openai_limiter.limit'), \
+             patch('gpt_calendar.find_free_slots', return_value=[]) as find:
+            prepared = prepare_calendar_query('팀 워크숍 끝나고 좀 쉴 틈 있나?', user_id='a@test.com',
+                                              service=MagicMock(), client=client)
+
+        client.with_options.assert_called_with(max_retries=0)
+        self.assertEqual(client.chat.completions.create.call_args.kwargs['tool_choice'], 'auto')
+        self.assertEqual(prepared['query_info']['tool'], 'find_free_slots')
+        self.assertEqual(find.call_args.args[5], 90)
+
+    def test_naive_range_uses_calendar_timezone(self):
+        """GPT가 시간대 없이 준 범위도 캘린더 시간대로 해석해 조회"""
+        tomorrow = datetime.datetime.now(TZ).date() + datetime.timedelta(days=1)
+        day = datetime.datetime.combine(tomorrow, datetime.time.min, tzinfo=TZ)
+        events = [make_event('a', day.replace(hour=9), day.replace(hour=17))]
+        with patch('main.get_events', return_value=events), \
+             patch('free_busy.busy_index_cache', BusyIndexCache()):
+            slots = check_free_slots(f"{tomorrow}T00:00:00", f"{tomorrow}T23:59:59", 30,
+                                     user_id='a@test.com', service=MagicMock())
+        self.assertEqual(slots, [
+            {'start': day.replace(hour=17).isoformat(), 'end': day.replace(hour=18).isoformat(), 'minutes': 60}
+        ])
+
+    def test_endpoint(self):
+        """/free_slots는 일정 저장소의 일정으로 빈 시간을 계산"""
+        config = AppConfig(google_client_id='id', google_project_id='p', google_client_secret='s', openai_api_key='k')
+        with patch('app.start_token_refresher'):
+            client = create_app(config).test_client()
+        # 지난 시간은 제외되므로 내일 기준으로 확인
+        tomorrow = datetime.datetime.now(TZ).date() + datetime.timedelta(days=1)
+        day = datetime.datetime.combine(tomorrow, datetime.time.min, tzinfo=TZ)
+        events = [make_event('a', day.replace(hour=9), day.replace(hour=12))]
+        with patch('app.get_request_calendar_service', return_value=MagicMock()), \
+             patch('main.get_events', return_value=events), \
+             patch('free_busy.busy_index_cache', BusyIndexCache()):
+            response = client.get('/free_slots', query_string={
+                'user_id': 'a@test.com', 'start_date': day.isoformat(),
+                'end_date': day.replace(hour=23, minute=59).isoformat(), 'min_minutes': 120, 'day_end': '17:00'
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['free_slots'], [
+            {'start': day.replace(hour=12).isoformat(), 'end': day.replace(hour=17).isoformat(), 'minutes': 300}
+        ])
+
+    def test_endpoint_rejects_invalid_min_minutes(self):
+        """min_minutes가 양의 정수가 아니면 400"""
+        config = AppConfig(google_client_id='id', google_project_id='p', google_client_secret='s', openai_api_key='k')
+        with patch('app.start_token_refresher'):
+            client = create_app(config).test_client()
+        for value in ('abc', '0', '-30'):
+            with patch('app.get_request_calendar_service') as get_service:
+                response = client.get('/free_slots', query_string={
+                    'user_id': 'a@test.com', 'start_date': '2024-03-20T00:00:00',
+                    'end_date': '2024-03-20T23:59:59', 'min_minutes': value
+                })
+            self.assertEqual(response.status_code, 400, value)
+            get_service.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
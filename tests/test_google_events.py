@@ -0,0 +1,41 @@
+import unittest
+from unittest.mock import MagicMock
+import datetime
+from itertools import islice
+
+from google_events import iter_events, EVENT_FIELDS
+
+
+class TestIterEvents(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.service = MagicMock()
+        self.service.events().list().execute.side_effect = [
+            {'items': [{'id': '1'}, {'id': '2'}], 'nextPageToken': 'p2'},
+            {'items': [{'id': '3'}]}
+        ]
+        self.service.events().list.reset_mock()
+        self.start = datetime.datetime(2024, 3, 20)
+        self.end = datetime.datetime(2024, 3, 21)
+
+    def test_follows_next_page_token(self):
+        """nextPageToken을 따라 모든 페이지 조회"""
+        events = list(iter_events(self.service, self.start, self.end, page_size=2))
+        self.assertEqual([e['id'] for e in events], ['1', '2', '3'])
+
+        calls = self.service.events().list.call_args_list
+        self.assertEqual(len(calls), 2)
+        self.assertIsNone(calls[0].kwargs['pageToken'])
+        self.assertEqual(calls[1].kwargs['pageToken'], 'p2')
+        self.assertEqual(calls[0].kwargs['maxResults'], 2)
+        self.assertIn(EVENT_FIELDS, calls[0].kwargs['fields'])
+
+    def test_stops_early(self):
+        """필요한 만큼만 소비하면 다음 페이지를 요청하지 않음"""
+        events = list(islice(iter_events(self.service, self.start, self.end, page_size=2), 2))
+        self.assertEqual(len(events), 2)
+        self.assertEqual(self.service.events().list.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from google_http import PooledHttp, PoolStats, get_shared_adapter
+
+
+class TestPooledHttp(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.http = PooledHttp(MagicMock())
+        self.http.session = MagicMock()
+
+    def test_shared_adapter(self):
+        """세션들이 같은 연결 풀 어댑터를 공유"""
+        other = PooledHttp(MagicMock())
+        self.assertIs(other.session.get_adapter('https://www.googleapis.com'), get_shared_adapter())
+
+    def test_request_returns_httplib2_response(self):
+        """httplib2 형식 (response, content) 반환 테스트"""
+        response = MagicMock(status_code=404, content=b'{"error": {}}')
+        response.headers = {'Content-Type': 'application/json', 'Content-Encoding': 'gzip'}
+        self.http.session.request.return_value = response
+
+        with patch('google_http.pool_stats', PoolStats()) as stats:
+            resp, content = self.http.request('https://www.googleapis.com/x', 'GET', headers={'a': 'b'})
+            self.assertEqual(stats.stats()['requests'], 1)
+            self.assertEqual(stats.stats()['in_flight'], 0)
+
+        self.assertEqual(resp.status, 404)
+        self.assertEqual(resp['content-type'], 'application/json')
+        self.assertNotIn('content-encoding', resp)
+        self.assertEqual(content, b'{"error": {}}')
+        _, kwargs = self.http.session.request.call_args
+        self.assertEqual(kwargs['timeout'], self.http.timeout)
+
+    def test_request_error_counted(self):
+        """전송 오류는 오류 수에 반영하고 그대로 전파"""
+        self.http.session.request.side_effect = requests.ConnectionError("reset")
+        with patch('google_http.pool_stats', PoolStats()) as stats:
+            with self.assertRaises(requests.ConnectionError):
+                self.http.request('https://www.googleapis.com/x')
+            self.assertEqual(stats.stats()['errors'], 1)
+            self.assertEqual(stats.stats()['in_flight'], 0)
+
+    def test_401_refreshes_through_callback(self):
+        """401이면 세션 안에서 갱신하지 않고 refresh 함수로 갱신한 뒤 한 번 재시도"""
+        old, new = MagicMock(valid=True, token='old'), MagicMock(valid=True, token='new')
+        refresh = MagicMock(return_value=new)
+        http = PooledHttp(old, refresh=refresh)
+        self.assertEqual(http.session._refresh_status_codes, ())
+        http.session = MagicMock()
+        unauthorized = MagicMock(status_code=401, content=b'', headers={})
+        ok = MagicMock(status_code=200, content=b'{}', headers={})
+        http.session.request.side_effect = [unauthorized, ok]
+
+        resp, _ = http.request('https://www.googleapis.com/x')
+
+        self.assertEqual(resp.status, 200)
+        refresh.assert_called_once_with(old, reject_current=True)
+        self.assertIs(http.credentials, new)
+        self.assertIs(http.session.credentials, new)
+
+    def test_expired_credentials_refreshed_before_request(self):
+        """만료된 자격 증명은 요청 전에 refresh 함수로 갱신"""
+        old, new = MagicMock(valid=False), MagicMock(valid=True)
+        refresh = MagicMock(return_value=new)
+        http = PooledHttp(old, refresh=refresh)
+        http.session = MagicMock()
+        http.session.request.return_value = MagicMock(status_code=200, content=b'{}', headers={})
+
+        http.request('https://www.googleapis.com/x')
+        refresh.assert_called_once_with(old, reject_current=False)
+        self.assertEqual(http.session.request.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,8 @@ import os
 from dotenv import load_dotenv
 from gpt_calendar import (
     init_openai_client,
+    get_openai_client,
+    reset_openai_client,
     get_calendar_function_spec,
     process_calendar_query
 )
@@ -25,13 +27,25 @@ class TestGPTFunctions(unittest.TestCase):
             with self.assertRaises(ValueError):
                 init_openai_client()
 
+    def test_shared_openai_client(self):
+        """공유 클라이언트 재사용 및 fork 후 재생성 테스트"""
+        reset_openai_client()
+        with patch.dict(os.environ, {'OPENAI_API_KEY': 'test_key'}):
+            client = get_openai_client()
+            self.assertIs(get_openai_client(), client)
+
+            # 다른 프로세스(fork된 자식)에서는 새 클라이언트 생성
+            with patch('gpt_calendar.os.getpid', return_value=os.getpid() + 1):
+                self.assertIsNot(get_openai_client(), client)
+        reset_openai_client()
+
     def test_get_calendar_function_spec(self):
         """함수 스펙 정의 테스트"""
         spec = get_calendar_function_spec()
         
         # 스펙 형식 확인
         self.assertIsInstance(spec, list)
-        self.assertEqual(len(spec), 1)
+        self.assertEqual(len(spec), 2)
         
         func_spec = spec[0]
         self.assertEqual(func_spec['name'], 'check_calendar')
@@ -39,6 +53,10 @@ class TestGPTFunctions(unittest.TestCase):
         self.assertIn('start_date', func_spec['parameters']['properties'])
         self.assertIn('end_date', func_spec['parameters']['properties'])
 
+        # 빈 시간 조회 도구
+        self.assertEqual(spec[1]['name'], 'find_free_slots')
+        self.assertIn('min_minutes', spec[1]['parameters']['properties'])
+
     @patch('gpt_calendar.OpenAI')
     def test_process_calendar_query(self, mock_openai):
         """GPT 쿼리 처리 테스트"""
@@ -67,11 +85,19 @@ class TestGPTFunctions(unittest.TestCase):
 
             # 테스트 실행
             with patch('gpt_calendar.check_calendar') as mock_check_calendar:
-                process_calendar_query("오늘 일정 알려줘")
+                process_calendar_query("오늘 일정 알려줘", user_id='test@test.com')
                 
                 # check_calendar가 호출되었는지 확인
                 self.assertTrue(mock_check_calendar.called)
 
+    @patch('gpt_calendar.get_openai_client')
+    def test_requires_user_id(self, mock_get_client):
+        """user_id가 없으면 OpenAI를 호출하지 않고 인증 오류 반환"""
+        result = process_calendar_query("다음 주 회의 언제야?")
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('인증', result['message'])
+        mock_get_client.assert_not_called()
+
     def test_error_handling(self):
         """에러 처리 테스트"""
         # OpenAI API 오류
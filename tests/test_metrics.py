@@ -0,0 +1,70 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from prometheus_client import REGISTRY
+
+import app as app_module
+from metrics import track_stage, record_upstream_error, record_openai_usage
+
+
+def sample(name, labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+class TestMetrics(unittest.TestCase):
+    def test_track_stage(self):
+        """with 블록 소요 시간이 단계 히스토그램에 기록됨"""
+        before = sample('ai_secretary_stage_duration_seconds_count', {'stage': 'test_stage'})
+        with track_stage('test_stage'):
+            pass
+        after = sample('ai_secretary_stage_duration_seconds_count', {'stage': 'test_stage'})
+        self.assertEqual(after - before, 1)
+
+    def test_track_stage_records_on_error(self):
+        """예외가 발생해도 소요 시간 기록"""
+        before = sample('ai_secretary_stage_duration_seconds_count', {'stage': 'test_error_stage'})
+        with self.assertRaises(ValueError):
+            with track_stage('test_error_stage'):
+                raise ValueError()
+        after = sample('ai_secretary_stage_duration_seconds_count', {'stage': 'test_error_stage'})
+        self.assertEqual(after - before, 1)
+
+    def test_record_upstream_error(self):
+        """예외는 클래스 이름, 상태 코드는 문자열로 집계"""
+        record_upstream_error('test_upstream', TimeoutError())
+        record_upstream_error('test_upstream', 503)
+        self.assertEqual(sample('ai_secretary_upstream_errors_total', {'upstream': 'test_upstream', 'reason': 'TimeoutError'}), 1)
+        self.assertEqual(sample('ai_secretary_upstream_errors_total', {'upstream': 'test_upstream', 'reason': '503'}), 1)
+
+    def test_record_openai_usage(self):
+        """usage가 있는 응답만 토큰 수 집계 (Mock 등 숫자가 아닌 값은 무시)"""
+        response = MagicMock()
+        response.usage.prompt_tokens = 120
+        response.usage.completion_tokens = 30
+        record_openai_usage('test_call', response)
+        record_openai_usage('test_call', MagicMock())
+        self.assertEqual(sample('ai_secretary_openai_tokens_total', {'call': 'test_call', 'type': 'prompt'}), 120)
+        self.assertEqual(sample('ai_secretary_openai_tokens_total', {'call': 'test_call', 'type': 'completion'}), 30)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        with patch('app.start_token_refresher'):
+            self.app = app_module.create_app()
+        self.client = self.app.test_client()
+
+    def test_metrics_endpoint(self):
+        """엔드포인트 지연과 캐시 통계를 Prometheus 형식으로 노출"""
+        self.client.get('/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith('text/plain'))
+        body = response.get_data(as_text=True)
+        self.assertIn('ai_secretary_request_duration_seconds_count{endpoint="api.index",method="GET",status="200"}', body)
+        self.assertIn('ai_secretary_cache_lookups_total{cache="service",result="hit"}', body)
+        self.assertIn('ai_secretary_date_resolutions_total{source="gpt"}', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+import datetime
+
+from google_events import list_calendar_ids
+from calendar_list import CalendarListCache
+import main
+from tests.conftest import make_event
+
+
+def hourly_event(event_id, hour):
+    """2024-03-20 hour시부터 1시간짜리 일정"""
+    start = datetime.datetime(2024, 3, 20, hour, tzinfo=datetime.timezone(datetime.timedelta(hours=9)))
+    return make_event(event_id, start, start + datetime.timedelta(hours=1))
+
+
+class TestCalendarList(unittest.TestCase):
+    def test_selected_calendars(self):
+        """기본 캘린더를 맨 앞에 두고 표시한 캘린더만 포함 (숨김/미표시 제외)"""
+        service = MagicMock()
+        service.calendarList().list().execute.side_effect = [
+            {'items': [{'id': 'team@group', 'selected': True}, {'id': 'me@test.com', 'primary': True, 'selected': True}],
+             'nextPageToken': 'p2'},
+            {'items': [{'id': 'hidden@group', 'selected': True, 'hidden': True}, {'id': 'holiday@group'}]}
+        ]
+        self.assertEqual(list_calendar_ids(service), ['primary', 'team@group'])
+
+    def test_cache(self):
+        """캐시에 있으면 calendarList를 호출하지 않고, 목록 조회 실패 시 기본 캘린더만 사용"""
+        cache = CalendarListCache(ttl=60, enabled=True)
+        mock_redis = MagicMock()
+        mock_redis.get.side_effect = [None, json.dumps(['primary', 'team@group'])]
+        with patch('auth_manager.redis_client', mock_redis), \
+             patch('calendar_list.list_calendar_ids', return_value=['primary', 'team@group']) as list_ids:
+            self.assertEqual(cache.get_calendar_ids(MagicMock(), 'google', 'a@test.com'), ['primary', 'team@group'])
+            self.assertEqual(cache.get_calendar_ids(MagicMock(), 'google', 'a@test.com'), ['primary', 'team@group'])
+        self.assertEqual(list_ids.call_count, 1)
+        mock_redis.pipeline().set.assert_called_with('calendars:google:a@test.com', json.dumps(['primary', 'team@group']), ex=60)
+
+        mock_redis.get.side_effect = None
+        mock_redis.get.return_value = None
+        with patch('auth_manager.redis_client', mock_redis), \
+             patch('calendar_list.list_calendar_ids', side_effect=Exception('403')):
+            self.assertEqual(cache.get_calendar_ids(MagicMock(), 'google', 'a@test.com'), ['primary'])
+
+
+class TestFanOut(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.events = {
+            'primary': [hourly_event('a', 9), hourly_event('shared', 11), hourly_event('d', 15)],
+            'team@group': [hourly_event('b', 10), hourly_event('shared', 11)],
+            'holiday@group': [hourly_event('c', 12)]
+        }
+        self.start = datetime.datetime(2024, 3, 20)
+        self.end = datetime.datetime(2024, 3, 21)
+
+    def fake_calendar_events(self, service, start_date, end_date, calendar_id='primary', user_id=None, platform='google', limit=None):
+        time.sleep(0.2)
+        return self.events[calendar_id]
+
+    def test_merge_concurrently(self):
+        """캘린더들을 동시에 조회해 시작 시간 순으로 병합 (중복 일정은 한 번만)"""
+        with patch('main.calendar_list_cache.get_calendar_ids', return_value=list(self.events)), \
+             patch('main.get_calendar_events', side_effect=self.fake_calendar_events):
+            started = time.monotonic()
+            events = main.get_events(MagicMock(), self.start, self.end, user_id='a@test.com')
+            elapsed = time.monotonic() - started
+        self.assertEqual([e['id'] for e in events], ['a', 'b', 'shared', 'c', 'd'])
+        self.assertLess(elapsed, 0.4)
+
+    def test_failed_calendar_is_skipped(self):
+        """공유 캘린더 조회가 실패해도 나머지 일정은 반환 (limit 적용)"""
+        def calendar_events(service, start_date, end_date, calendar_id='primary', *args):
+            if calendar_id == 'team@group':
+                raise Exception('404')
+            return self.events[calendar_id]
+
+        with patch('main.calendar_list_cache.get_calendar_ids', return_value=list(self.events)), \
+             patch('main.get_calendar_events', side_effect=calendar_events):
+            events = main.get_events(MagicMock(), self.start, self.end, user_id='a@test.com', limit=3)
+        self.assertEqual([e['id'] for e in events], ['a', 'shared', 'c'])
+
+    def test_free_busy_only_event_without_summary(self):
+        """바쁨/한가함만 공유된 캘린더의 제목 없는 일정도 조회 결과에 포함"""
+        busy = hourly_event('busy', 13)
+        del busy['summary']
+        with patch('main.get_events', return_value=[hourly_event('a', 9), busy]):
+            events = main.check_google_calendar('a@test.com', self.start, self.end, service=MagicMock())
+        self.assertEqual([e['summary'] for e in events], ['a', '(제목 없음)'])
+
+
+if __name__ == '__main__':
+    unittest.main()
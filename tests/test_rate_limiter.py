@@ -0,0 +1,149 @@
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+import redis
+
+from rate_limiter import OpenAIRateLimiter, RateLimitExceeded, get_retry_after, ACQUIRE_SCRIPT, ADJUST_SCRIPT
+from app import create_app
+from config import AppConfig
+
+try:
+    import fakeredis
+except ImportError:  # Lua 스크립트 테스트에만 필요
+    fakeredis = None
+
+
+def make_rate_limit_error(retry_after=None):
+    """openai.RateLimitError처럼 status_code와 응답 헤더를 가진 예외"""
+    error = Exception('rate limited')
+    error.status_code = 429
+    error.response = MagicMock(headers={'retry-after': retry_after} if retry_after else {})
+    return error
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis가 설치되지 않음")
+class TestTokenBucket(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis_patch = patch('auth_manager.redis_client', fakeredis.FakeRedis())
+        self.redis_patch.start()
+        self.limiter = OpenAIRateLimiter(user_rate=1, user_burst=2, global_rate=100, global_burst=100,
+                                         max_queue=4, max_wait=0.5, enabled=True)
+
+    def tearDown(self):
+        self.redis_patch.stop()
+
+    def test_user_bucket(self):
+        """사용자별 burst를 넘으면 대기 시간을 반환하고 다른 사용자는 영향 없음"""
+        self.assertEqual(self.limiter.try_acquire('a@test.com'), (True, 0.0))
+        self.assertEqual(self.limiter.try_acquire('a@test.com'), (True, 0.0))
+        allowed, wait = self.limiter.try_acquire('a@test.com')
+        self.assertFalse(allowed)
+        self.assertGreater(wait, 0.9)
+        self.assertTrue(self.limiter.try_acquire('b@test.com')[0])
+
+    def test_reject_when_wait_exceeds_max_wait(self):
+        """max_wait 안에 토큰이 생기지 않으면 Retry-After와 함께 바로 거절"""
+        self.limiter.acquire('a@test.com')
+        self.limiter.acquire('a@test.com')
+        started = time.monotonic()
+        with self.assertRaises(RateLimitExceeded) as ctx:
+            self.limiter.acquire('a@test.com')
+        self.assertLess(time.monotonic() - started, 0.1)
+        self.assertEqual(ctx.exception.retry_after, 1)
+        self.assertEqual(self.limiter.stats()['rejected'], 1)
+
+    def test_upstream_429_lowers_rate(self):
+        """OpenAI 429면 Retry-After 동안 모든 호출을 멈추고 전체 속도를 줄였다가 성공 시 회복"""
+        with self.assertRaises(Exception):
+            with self.limiter.limit('a@test.com'):
+                raise make_rate_limit_error('0.3')
+        self.assertEqual(self.limiter.factor, 0.5)
+        allowed, wait = self.limiter.try_acquire('b@test.com')
+        self.assertFalse(allowed)
+        self.assertLessEqual(wait, 0.3)
+
+        time.sleep(0.35)
+        with self.limiter.limit('b@test.com'):
+            pass
+        self.assertAlmostEqual(self.limiter.factor, 0.55)
+        self.assertEqual(self.limiter.stats()['throttled'], 1)
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_wait_then_allow(self):
+        """토큰이 곧 생기면 대기열에서 기다렸다가 진행"""
+        limiter = OpenAIRateLimiter(max_queue=1, max_wait=1, enabled=True)
+        with patch.object(limiter, 'try_acquire', side_effect=[(False, 0.01), (True, 0.0)]):
+            limiter.acquire('a@test.com')
+        stats = limiter.stats()
+        self.assertEqual((stats['allowed'], stats['waited'], stats['waiting']), (1, 1, 0))
+
+    def test_reject_when_queue_full(self):
+        """대기열이 가득 차면 기다리지 않고 거절"""
+        limiter = OpenAIRateLimiter(max_queue=0, max_wait=1, enabled=True)
+        with patch.object(limiter, 'try_acquire', return_value=(False, 0.01)):
+            with self.assertRaises(RateLimitExceeded):
+                limiter.acquire('a@test.com')
+
+    def test_redis_error_fails_open(self):
+        """Redis 오류 시에는 제한 없이 진행"""
+        limiter = OpenAIRateLimiter(enabled=True)
+        with patch.object(limiter, 'try_acquire', side_effect=redis.ConnectionError('down')):
+            limiter.acquire('a@test.com')
+        self.assertEqual(limiter.stats()['fail_open'], 1)
+
+    def test_retry_takes_token_again(self):
+        """429 재시도도 매번 토큰을 다시 받고, 재시도 횟수를 넘으면 오류 전파"""
+        limiter = OpenAIRateLimiter(enabled=True)
+        func = MagicMock(side_effect=[make_rate_limit_error('0'), 'ok'])
+        with patch.object(limiter, 'try_acquire', return_value=(True, 0.0)) as try_acquire, \
+             patch.object(limiter, '_adjust'):
+            self.assertEqual(limiter.call('a@test.com', func, retries=2), 'ok')
+            self.assertEqual(try_acquire.call_count, 2)
+            self.assertEqual(limiter.stats()['throttled'], 1)
+
+            func = MagicMock(side_effect=make_rate_limit_error('0'))
+            with self.assertRaises(Exception):
+                limiter.call('a@test.com', func, retries=1)
+            self.assertEqual(func.call_count, 2)
+
+    def test_uses_redis_clock(self):
+        """공유 버킷 시각은 인스턴스 시계가 아닌 Redis 서버 시각 (스크립트에 시각을 넘기지 않음)"""
+        limiter = OpenAIRateLimiter(enabled=True)
+        script = MagicMock(side_effect=[[1, 0, '1'], '0.5'])
+        with patch.object(limiter, '_script', return_value=script):
+            limiter.try_acquire('a@test.com')
+            limiter.record_throttled(2)
+        acquire_args = script.call_args_list[0].kwargs['args']
+        adjust_args = script.call_args_list[1].kwargs['args']
+        self.assertEqual(acquire_args, [limiter.user_rate, limiter.user_burst, limiter.global_rate, limiter.global_burst])
+        self.assertEqual(adjust_args[-1], 2000)
+        self.assertIn("redis.call('TIME')", ACQUIRE_SCRIPT)
+        self.assertIn("redis.call('TIME')", ADJUST_SCRIPT)
+
+    def test_retry_after_default(self):
+        """Retry-After 헤더가 없으면 기본값 사용"""
+        self.assertEqual(get_retry_after(make_rate_limit_error('7')), 7.0)
+        self.assertEqual(get_retry_after(make_rate_limit_error()), 1.0)
+
+    def test_ask_gpt_returns_429(self):
+        """호출 한도 초과 시 /ask_gpt는 429와 Retry-After로 응답"""
+        config = AppConfig(google_client_id='id', google_project_id='p', google_client_secret='s', openai_api_key='k')
+        with patch('app.start_token_refresher'):
+            client = create_app(config).test_client()
+        result = {'status': 'error', 'error_type': 'rate_limited', 'retry_after': 3, 'message': '요청이 많아 3초 후 다시 시도해주세요.'}
+        with patch('app.process_calendar_query', return_value=result):
+            response = client.post('/ask_gpt', json={'query': '오늘 일정', 'user_id': 'a@test.com'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '3')
+
+        with patch('app.stream_calendar_query', return_value=iter([('error', result)])):
+            response = client.post('/ask_gpt', json={'query': '오늘 일정', 'user_id': 'a@test.com'},
+                                   headers={'Accept': 'text/event-stream'})
+        self.assertEqual(response.status_code, 429)
+
+
+if __name__ == '__main__':
+    unittest.main()
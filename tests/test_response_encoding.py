@@ -0,0 +1,71 @@
+import gzip
+import json
+import datetime
+import unittest
+from unittest.mock import patch, MagicMock
+
+import app as app_module
+from response_encoding import OrjsonProvider
+
+
+def make_events(count):
+    return [
+        {'summary': f'회의 {i}', 'start': f'2024-03-20 {i % 24:02d}:00', 'is_all_day': False}
+        for i in range(count)
+    ]
+
+
+class TestResponseEncoding(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        with patch('app.start_token_refresher'):
+            self.app = app_module.create_app()
+        self.client = self.app.test_client()
+        self.url = '/calendar?start_date=2024-03-20T00:00:00&end_date=2024-03-21T00:00:00&user_id=a@test.com'
+
+    def get_calendar(self, events, headers=None):
+        with patch('app.get_request_calendar_service', return_value=MagicMock()), \
+             patch('app.route_calendar_service', return_value=events):
+            return self.client.get(self.url, headers=headers or {})
+
+    def test_orjson_provider(self):
+        """Flask 기본 provider와 같은 값으로 직렬화 (한글은 이스케이프하지 않음)"""
+        self.assertIsInstance(self.app.json, OrjsonProvider)
+        data = {'b': '한글', 'a': [1, 2.5, None], 'when': datetime.datetime(2024, 3, 20, 9, 0)}
+        with self.app.app_context():
+            body = self.app.json.response(data).get_data()
+        self.assertIn('한글'.encode('utf-8'), body)
+        self.assertEqual(json.loads(body), {'a': [1, 2.5, None], 'b': '한글', 'when': 'Wed, 20 Mar 2024 09:00:00 GMT'})
+
+    def test_gzip_large_response(self):
+        """임계값 이상 응답은 gzip 압축"""
+        events = make_events(100)
+        response = self.get_calendar(events, {'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(json.loads(gzip.decompress(response.get_data()))['events'], events)
+
+    def test_small_response_not_compressed(self):
+        """작은 응답이나 압축을 지원하지 않는 클라이언트에는 원문 전송"""
+        response = self.get_calendar(make_events(1), {'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = self.get_calendar(make_events(100))
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_etag_not_modified(self):
+        """일정이 바뀌지 않았으면 If-None-Match에 304 응답"""
+        events = make_events(3)
+        first = self.get_calendar(events)
+        etag = first.headers['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        second = self.get_calendar(events, {'If-None-Match': etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.get_data(), b'')
+
+        changed = self.get_calendar(make_events(4), {'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from unittest.mock import patch, MagicMock
+
+from service_cache import ServiceCache
+
+
+class TestServiceCache(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.cache = ServiceCache(max_size=2, ttl=60)
+
+    def test_hit_and_miss(self):
+        """히트/미스 카운터 테스트"""
+        self.assertIsNone(self.cache.get('google', 'a@test.com'))
+        service = MagicMock()
+        self.cache.put('google', 'a@test.com', service)
+        self.assertIs(self.cache.get('google', 'a@test.com'), service)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+
+    def test_lru_eviction(self):
+        """용량 초과 시 가장 오래 사용되지 않은 항목 제거 테스트"""
+        self.cache.put('google', 'a', 'service_a')
+        self.cache.put('google', 'b', 'service_b')
+        self.cache.get('google', 'a')
+        self.cache.put('google', 'c', 'service_c')
+
+        self.assertIsNone(self.cache.get('google', 'b'))
+        self.assertEqual(self.cache.get('google', 'a'), 'service_a')
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_ttl_expiry(self):
+        """TTL 만료 테스트"""
+        with patch('service_cache.time.monotonic', return_value=1000):
+            self.cache.put('google', 'a', 'service_a')
+        with patch('service_cache.time.monotonic', return_value=1061):
+            self.assertIsNone(self.cache.get('google', 'a'))
+
+    def test_invalid_credentials(self):
+        """자격 증명이 만료된 항목은 반환하지 않음"""
+        creds = MagicMock()
+        creds.valid = False
+        self.cache.put('google', 'a', 'service_a', creds)
+        self.assertIsNone(self.cache.get('google', 'a'))
+
+    def test_invalidate(self):
+        """토큰 갱신/로그아웃 시 항목 제거 테스트"""
+        self.cache.put('google', 'a', 'service_a')
+        self.cache.invalidate('google', 'a')
+        self.assertIsNone(self.cache.get('google', 'a'))
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
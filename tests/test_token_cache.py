@@ -0,0 +1,128 @@
+import json
+import time
+import datetime
+import unittest
+from unittest.mock import patch
+
+from auth_manager import AuthManager, EXPIRY_FORMAT
+from token_cache import TokenCache, TOKEN_INVALIDATION_CHANNEL
+
+try:
+    import fakeredis
+except ImportError:  # pub/sub 테스트에만 필요
+    fakeredis = None
+
+
+def make_tokens(token):
+    expiry = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+    return {
+        'token': token,
+        'refresh_token': 'refresh_token',
+        'client_id': 'test_client_id',
+        'client_secret': 'test_client_secret',
+        'expiry': expiry.strftime(EXPIRY_FORMAT)
+    }
+
+
+def wait_until(condition, timeout=3):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('시간 초과')
+        time.sleep(0.01)
+
+
+class TestTokenCache(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행 (구독 스레드 없이 구독된 상태로 가정)"""
+        self.cache = TokenCache(max_size=2, ttl=60, enabled=True)
+        self.start_patcher = patch.object(self.cache, 'start')
+        self.start_patcher.start()
+        self.cache._subscribed.set()
+
+    def tearDown(self):
+        self.start_patcher.stop()
+
+    def test_hit_returns_copy(self):
+        """저장한 토큰을 반환하고 반환값을 수정해도 캐시는 바뀌지 않음"""
+        _, generation = self.cache.get('google', 'a@test.com')
+        self.cache.put('google', 'a@test.com', {'token': 't1'}, generation)
+        tokens, _ = self.cache.get('google', 'a@test.com')
+        tokens['token'] = 'changed'
+        self.assertEqual(self.cache.get('google', 'a@test.com')[0], {'token': 't1'})
+        self.assertEqual(self.cache.stats()['hits'], 2)
+
+    def test_invalidated_while_loading(self):
+        """Redis에서 읽는 동안 무효화되면 읽은 (이전) 값을 저장하지 않음"""
+        _, generation = self.cache.get('google', 'a@test.com')
+        self.cache.invalidate('google', 'a@test.com')
+        self.cache.put('google', 'a@test.com', {'token': 'old'}, generation)
+        self.assertIsNone(self.cache.get('google', 'a@test.com')[0])
+
+    def test_bypass_when_not_subscribed(self):
+        """구독이 끊긴 동안에는 캐시를 사용하지 않음"""
+        self.cache._subscribed.clear()
+        tokens, generation = self.cache.get('google', 'a@test.com')
+        self.assertIsNone(generation)
+        self.cache.put('google', 'a@test.com', {'token': 't1'}, generation)
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.cache.stats()['bypassed'], 1)
+
+    def test_lru_eviction(self):
+        """용량을 넘으면 가장 오래 사용되지 않은 항목 제거"""
+        for user_id in ('a', 'b', 'c'):
+            _, generation = self.cache.get('google', user_id)
+            self.cache.put('google', user_id, {'token': user_id}, generation)
+        self.assertIsNone(self.cache.get('google', 'a')[0])
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+
+@unittest.skipIf(fakeredis is None, "fakeredis가 설치되지 않음")
+class TestTokenCacheInvalidation(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis = fakeredis.FakeRedis(decode_responses=True)
+        self.cache = TokenCache(ttl=60, enabled=True)
+        self.patchers = [
+            patch('auth_manager.redis_client', self.redis),
+            patch('auth_manager.token_cache', self.cache)
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        self.auth = AuthManager('google')
+        self.cache.start()
+        wait_until(lambda: self.cache.stats()['subscribed'])
+
+    def tearDown(self):
+        self.cache.stop(timeout=2)
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_hot_user_skips_redis(self):
+        """두 번째 조회부터는 Redis를 읽지 않음"""
+        self.auth.save_tokens('a@test.com', make_tokens('t1'))
+        self.assertEqual(self.auth.load_tokens('a@test.com')['token'], 't1')
+        with patch.object(self.redis, 'get', side_effect=AssertionError('Redis 조회')):
+            self.assertEqual(self.auth.load_tokens('a@test.com')['token'], 't1')
+
+    def test_other_instance_save_invalidates(self):
+        """다른 인스턴스가 토큰을 저장하고 발행하면 이 인스턴스의 캐시가 무효화됨"""
+        self.auth.save_tokens('a@test.com', make_tokens('t1'))
+        self.auth.load_tokens('a@test.com')
+        invalidations = self.cache.stats()['invalidations']
+
+        self.redis.set('tokens:google:a@test.com', json.dumps(make_tokens('t2')))
+        self.redis.publish(TOKEN_INVALIDATION_CHANNEL, 'google:a@test.com')
+        wait_until(lambda: self.cache.stats()['invalidations'] > invalidations)
+        self.assertEqual(self.auth.load_tokens('a@test.com')['token'], 't2')
+
+    def test_logout_removes_cached_tokens(self):
+        """로그아웃하면 캐시된 토큰도 사용하지 않음"""
+        self.auth.save_tokens('a@test.com', make_tokens('t1'))
+        self.auth.load_tokens('a@test.com')
+        self.auth.delete_tokens('a@test.com')
+        self.assertIsNone(self.auth.load_tokens('a@test.com'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import time
+import datetime
+
+from google.auth.exceptions import RefreshError
+
+from auth_manager import AuthManager, parse_expiry, EXPIRY_FORMAT
+from token_refresher import TokenRefresher
+
+TOKENS = {
+    'token': 'old_token',
+    'refresh_token': 'refresh_token',
+    'client_id': 'test_client_id',
+    'client_secret': 'test_client_secret',
+    'expiry': '2024-03-20T10:00:00Z'
+}
+
+
+class TestTokenRefresher(unittest.TestCase):
+    def setUp(self):
+        """각 테스트 전에 실행"""
+        self.redis_patcher = patch('auth_manager.redis_client')
+        self.mock_redis = self.redis_patcher.start()
+        self.mock_redis.incr.return_value = 1
+        self.refresher = TokenRefresher(lead=300, interval=1, batch_size=10, inactive=3600)
+        # 기본은 방금 사용한 사용자
+        self.mock_redis.zscore.side_effect = lambda key, user_id: self.last_used
+        self.last_used = time.time()
+
+    def tearDown(self):
+        self.redis_patcher.stop()
+
+    def test_parse_expiry(self):
+        """저장된 만료 시각 파싱 테스트"""
+        expiry = parse_expiry('2024-03-20T10:00:00.123456Z')
+        self.assertEqual(expiry, datetime.datetime(2024, 3, 20, 10, 0, tzinfo=datetime.timezone.utc))
+        self.assertIsNone(parse_expiry(None))
+
+    def test_save_tokens_schedules_refresh(self):
+        """save_tokens가 만료 시각을 정렬 집합에 기록"""
+        AuthManager('google').save_tokens('a@test.com', TOKENS)
+        pipe = self.mock_redis.pipeline.return_value
+        pipe.zadd.assert_called_once_with(
+            'token_expiry:google', {'a@test.com': parse_expiry(TOKENS['expiry']).timestamp()}
+        )
+
+    def test_run_once_refreshes_due_tokens(self):
+        """만료 임박 토큰 갱신 및 지연 기록"""
+        expires_at = parse_expiry(TOKENS['expiry']).timestamp()
+        self.mock_redis.zrangebyscore.return_value = [('a@test.com', expires_at)]
+        self.mock_redis.zrem.return_value = 1
+
+        with patch.object(AuthManager, 'load_tokens', return_value=dict(TOKENS)), \
+             patch.object(AuthManager, 'save_tokens') as mock_save, \
+             patch('token_refresher.Credentials.refresh') as mock_refresh:
+            self.last_used = expires_at - 300
+            handled = self.refresher.run_once(now=expires_at - 200)
+
+        self.assertEqual(handled, 1)
+        mock_refresh.assert_called_once()
+        mock_save.assert_called_once()
+        stats = self.refresher.stats()
+        self.assertEqual(stats['refreshed'], 1)
+        self.assertEqual(stats['last_lag_seconds'], 100)
+
+    def test_refreshes_before_google_auth_threshold(self):
+        """아직 유효하지만 lead 안에 만료되는 토큰도 갱신하고 새 만료 시각으로 다시 스케줄"""
+        now = time.time()
+        expiry = datetime.datetime.fromtimestamp(now + 280, datetime.timezone.utc)
+        tokens = dict(TOKENS, expiry=expiry.strftime(EXPIRY_FORMAT))
+        new_expiry = (expiry + datetime.timedelta(hours=1)).replace(tzinfo=None, microsecond=0)
+        self.mock_redis.zrangebyscore.return_value = [('a@test.com', expiry.timestamp())]
+        self.mock_redis.zrem.return_value = 1
+
+        def refresh(creds, request):
+            creds.token = 'new_token'
+            creds.expiry = new_expiry
+
+        with patch.object(AuthManager, 'load_tokens', return_value=tokens), \
+             patch.object(AuthManager, 'save_tokens') as mock_save, \
+             patch('token_refresher.Credentials.refresh', autospec=True, side_effect=refresh) as mock_refresh:
+            self.assertEqual(self.refresher.run_once(now=now), 1)
+
+        mock_refresh.assert_called_once()
+        mock_save.assert_called_once()
+        self.mock_redis.zadd.assert_called_once_with(
+            'token_expiry:google', {'a@test.com': new_expiry.replace(tzinfo=datetime.timezone.utc).timestamp()}
+        )
+
+    def test_inactive_user_dropped(self):
+        """오래 사용하지 않은 사용자(또는 기록 없음)는 갱신하지 않고 스케줄에 다시 넣지 않음"""
+        self.mock_redis.zrangebyscore.return_value = [('a@test.com', 1000)]
+        self.mock_redis.zrem.return_value = 1
+        for last_used in (1000 - 7200, None):
+            self.last_used = last_used
+            with patch.object(AuthManager, 'load_tokens') as mock_load:
+                self.assertEqual(self.refresher.run_once(now=1000), 1)
+                mock_load.assert_not_called()
+        self.mock_redis.zadd.assert_not_called()
+        self.assertEqual(self.refresher.stats()['dropped_inactive'], 2)
+
+    def test_touch_is_throttled(self):
+        """요청 경로의 사용 기록은 간격마다 한 번만 Redis에 씀"""
+        auth = AuthManager('google')
+        auth.touch('touch@test.com', now=5000)
+        auth.touch('touch@test.com', now=5001)
+        self.mock_redis.zadd.assert_called_once_with('token_last_used:google', {'touch@test.com': 5000})
+
+    def test_claimed_by_other_instance(self):
+        """다른 인스턴스가 먼저 꺼낸 토큰은 건너뜀"""
+        self.mock_redis.zrangebyscore.return_value = [('a@test.com', 0)]
+        self.mock_redis.zrem.return_value = 0
+        with patch.object(AuthManager, 'load_tokens') as mock_load:
+            self.assertEqual(self.refresher.run_once(now=1000), 0)
+            mock_load.assert_not_called()
+
+    def test_refresh_failure(self):
+        """갱신 실패 횟수 기록 (권한 철회 시 재스케줄하지 않음)"""
+        with patch.object(AuthManager, 'load_tokens', return_value=dict(TOKENS)), \
+             patch('token_refresher.Credentials.refresh', side_effect=RefreshError('invalid_grant')):
+            self.last_used = 900
+            self.assertFalse(self.refresher.refresh_user('a@test.com', 1000, now=1000))
+        self.assertEqual(self.refresher.stats()['failures'], 1)
+        self.mock_redis.zadd.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+import redis
+
+from service_cache import service_cache
+
+# 토큰 L1 캐시 설정 (환경 변수 또는 기본값 사용)
+TOKEN_CACHE_ENABLED = os.getenv('TOKEN_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+TOKEN_CACHE_MAX_SIZE = int(os.getenv('TOKEN_CACHE_MAX_SIZE', '1024'))
+# 무효화 메시지를 놓쳐도 이 시간 뒤에는 Redis에서 다시 읽음
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '60'))
+
+# save_tokens / delete_tokens가 "{platform}:{user_id}"를 발행하는 채널
+TOKEN_INVALIDATION_CHANNEL = 'tokens:invalidate'
+# 구독이 끊기면 다시 연결할 때까지의 최대 대기 시간 (초)
+TOKEN_CACHE_MAX_BACKOFF = 30
+
+
+class TokenCache:
+    """
+    (platform, user_id) 키 기반 디코딩된 토큰 LRU + TTL 캐시 (Redis 앞단)
+    여러 인스턴스 간 일관성은 Redis pub/sub 무효화 메시지로 유지하며,
+    구독이 연결되어 있을 때만 캐시를 사용함 (끊기면 항상 Redis에서 읽음)
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_MAX_SIZE, ttl=TOKEN_CACHE_TTL, enabled=TOKEN_CACHE_ENABLED):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # 무효화될 때마다 증가 (Redis에서 읽는 동안 무효화되면 읽은 값을 저장하지 않음)
+        self._generation = 0
+        self._subscribed = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._thread_pid = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.reconnects = 0
+
+    def get(self, platform: str, user_id: str):
+        """
+        (캐시된 토큰 dict 또는 None, 세대) 반환
+        구독 전이거나 꺼져 있으면 세대는 None (Redis에서 읽은 값을 저장하지 않음)
+        """
+        if not self.enabled:
+            return None, None
+        if not self._stop.is_set():
+            self.start()
+        key = (platform, user_id)
+        with self._lock:
+            if not self._subscribed.is_set():
+                self.bypassed += 1
+                return None, None
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None, self._generation
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # 호출한 쪽에서 수정해도 캐시된 값은 바뀌지 않도록 복사본 반환
+            return dict(entry[0]), self._generation
+
+    def put(self, platform: str, user_id: str, tokens: dict, generation):
+        """get에서 받은 세대 이후 무효화가 없었을 때만 저장"""
+        if generation is None or not tokens:
+            return
+        key = (platform, user_id)
+        with self._lock:
+            if generation != self._generation or not self._subscribed.is_set():
+                return
+            self._entries[key] = (dict(tokens), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, platform: str, user_id: str):
+        """토큰 저장/삭제 시 해당 사용자 항목 제거"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop((platform, user_id), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def handle_message(self, data: str):
+        """다른 인스턴스(또는 자신)가 발행한 무효화 메시지 처리"""
+        platform, _, user_id = data.partition(':')
+        if not user_id:
+            return
+        self.invalidate(platform, user_id)
+        # 토큰이 바뀌었으므로 이 인스턴스의 서비스 객체도 다시 만듦
+        service_cache.invalidate(platform, user_id)
+
+    def _listen_once(self):
+        """구독 연결 하나가 끊길 때까지 무효화 메시지 수신"""
+        import auth_manager
+        pubsub = auth_manager.get_redis_client().pubsub()
+        try:
+            pubsub.subscribe(TOKEN_INVALIDATION_CHANNEL)
+            # 구독 확인을 받은 뒤부터 발행된 메시지는 모두 받으므로 그때부터 캐시 사용
+            message = pubsub.get_message(timeout=5)
+            if not isinstance(message, dict) or message.get('type') != 'subscribe':
+                raise redis.ConnectionError('구독 확인 메시지를 받지 못함')
+            self.clear()
+            self._subscribed.set()
+            while not self._stop.is_set():
+                message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                if message and message.get('type') == 'message':
+                    self.handle_message(message['data'])
+        finally:
+            # 구독이 끊긴 동안의 메시지는 받을 수 없으므로 캐시를 비우고 사용 중지
+            self._subscribed.clear()
+            self.clear()
+            pubsub.close()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                self._listen_once()
+                backoff = 1
+            except Exception as e:
+                print(f"[CACHE ERROR] 토큰 무효화 구독 실패 ({backoff}초 후 재시도): {str(e)}")
+                with self._lock:
+                    self.reconnects += 1
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, TOKEN_CACHE_MAX_BACKOFF)
+
+    def start(self):
+        """무효화 구독 스레드 시작 (이미 실행 중이면 무시, fork된 워커에서는 새로 시작)"""
+        if self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._subscribed.clear()
+            self._entries.clear()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='token-cache-invalidation', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'subscribed': self._subscribed.is_set(),
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'bypassed': self.bypassed,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'reconnects': self.reconnects
+            }
+
+
+# 프로세스 전역 캐시
+token_cache = TokenCache()
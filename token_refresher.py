@@ -0,0 +1,168 @@
+import os
+import time
+import datetime
+import threading
+
+import redis
+from google.auth.exceptions import RefreshError
+from google.oauth2.credentials import Credentials
+
+import auth_manager
+from auth_manager import AuthManager
+from google_http import create_auth_request
+from metrics import record_upstream_error
+
+# 백그라운드 토큰 갱신 설정 (환경 변수 또는 기본값 사용)
+TOKEN_REFRESHER_ENABLED = os.getenv('TOKEN_REFRESHER_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# 만료 몇 초 전에 미리 갱신할지
+TOKEN_REFRESH_LEAD_SECONDS = float(os.getenv('TOKEN_REFRESH_LEAD_SECONDS', '300'))
+# 갱신 대상 확인 주기
+TOKEN_REFRESH_INTERVAL_SECONDS = float(os.getenv('TOKEN_REFRESH_INTERVAL_SECONDS', '30'))
+TOKEN_REFRESH_BATCH_SIZE = int(os.getenv('TOKEN_REFRESH_BATCH_SIZE', '50'))
+# 이 시간(초) 동안 사용하지 않은 사용자는 미리 갱신하지 않고 스케줄에서 제외 (다시 사용하면 요청 경로에서 갱신)
+TOKEN_REFRESH_INACTIVE_SECONDS = float(os.getenv('TOKEN_REFRESH_INACTIVE_SECONDS', str(7 * 24 * 3600)))
+
+
+class TokenRefresher:
+    """
+    만료가 임박한 토큰을 백그라운드에서 미리 갱신
+    AuthManager.save_tokens가 기록한 token_expiry:{platform} 정렬 집합을 주기적으로 확인함
+    """
+
+    def __init__(self, platform='google', lead=TOKEN_REFRESH_LEAD_SECONDS,
+                 interval=TOKEN_REFRESH_INTERVAL_SECONDS, batch_size=TOKEN_REFRESH_BATCH_SIZE,
+                 inactive=TOKEN_REFRESH_INACTIVE_SECONDS):
+        self.platform = platform
+        self.lead = lead
+        self.inactive = inactive
+        self.interval = interval
+        self.batch_size = batch_size
+        self.auth = AuthManager(platform)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._request = None
+        self.refreshed = 0
+        self.failures = 0
+        self.dropped_inactive = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_run_at = None
+
+    def run_once(self, now: float = None):
+        """갱신 시점이 된 토큰들을 갱신하고 처리한 개수 반환"""
+        now = now or time.time()
+        due = auth_manager.get_redis_client().zrangebyscore(
+            self.auth.expiry_key, '-inf', now + self.lead,
+            start=0, num=self.batch_size, withscores=True
+        )
+        handled = 0
+        for user_id, expires_at in due:
+            # 여러 인스턴스 중 정렬 집합에서 먼저 꺼낸 쪽만 갱신
+            if not auth_manager.get_redis_client().zrem(self.auth.expiry_key, user_id):
+                continue
+            self.refresh_user(user_id, expires_at, now)
+            handled += 1
+        with self._lock:
+            self.last_run_at = now
+        return handled
+
+    def refresh_user(self, user_id: str, expires_at: float, now: float = None):
+        """한 사용자의 토큰 갱신 후 save_tokens로 저장하고 다음 만료 시각을 다시 기록"""
+        now = now or time.time()
+        last_used = auth_manager.get_redis_client().zscore(self.auth.last_used_key, user_id)
+        if last_used is None or now - float(last_used) > self.inactive:
+            # 오래 사용하지 않은 사용자는 갱신 쿼터를 쓰지 않도록 스케줄에서 뺀 채로 둠
+            print(f"[TOKEN] 장기간 사용하지 않아 백그라운드 갱신 중단: user_id={user_id}")
+            with self._lock:
+                self.dropped_inactive += 1
+            return False
+        tokens = self.auth.load_tokens(user_id, use_cache=False)
+        if not tokens or not tokens.get('refresh_token'):
+            return False
+        creds = Credentials.from_authorized_user_info(tokens, self.auth.scopes)
+        try:
+            # 요청 경로의 갱신과 같은 single-flight 락을 사용 (save_tokens까지 수행)
+            # 아직 유효한 토큰도 lead 안에 만료되면 갱신 (google-auth의 만료 판단 기준보다 이르게 갱신하므로)
+            creds = self.auth.refresh_credentials(user_id, creds, self._get_request(), min_remaining=self.lead)
+        except RefreshError as e:
+            # 권한이 철회된 경우 등: 다시 로그인해야 하므로 스케줄에서 제외된 상태로 둠
+            print(f"[TOKEN REFRESH ERROR] 토큰 갱신 실패: user_id={user_id}, {str(e)}")
+            record_upstream_error('google_oauth', e)
+            self._record_failure()
+            return False
+        except Exception as e:
+            # 일시적인 오류: 다음 주기에 다시 시도하도록 원래 만료 시각으로 되돌림
+            print(f"[TOKEN REFRESH ERROR] 토큰 갱신 실패 (재시도 예정): user_id={user_id}, {str(e)}")
+            record_upstream_error('google_oauth', e)
+            auth_manager.get_redis_client().zadd(self.auth.expiry_key, {user_id: expires_at})
+            self._record_failure()
+            return False
+
+        # 다른 인스턴스가 먼저 갱신한 토큰을 재사용한 경우에도 스케줄에서 빠지지 않도록 다시 기록
+        if creds.expiry:
+            expiry = creds.expiry.replace(tzinfo=datetime.timezone.utc)
+            auth_manager.get_redis_client().zadd(self.auth.expiry_key, {user_id: expiry.timestamp()})
+
+        # 원래 갱신했어야 할 시점(만료 - lead)보다 얼마나 늦었는지
+        lag = max(0.0, now - (expires_at - self.lead))
+        with self._lock:
+            self.refreshed += 1
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+        return True
+
+    def _get_request(self):
+        if self._request is None:
+            self._request = create_auth_request()
+        return self._request
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except redis.RedisError as e:
+                print(f"[TOKEN REFRESH ERROR] Redis 오류: {str(e)}")
+            except Exception as e:
+                print(f"[TOKEN REFRESH ERROR] 갱신 루프 오류: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """데몬 스레드로 갱신 루프 시작 (이미 실행 중이면 무시)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"token-refresher-{self.platform}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def stats(self):
+        """갱신 지연 / 실패 횟수"""
+        with self._lock:
+            return {
+                'running': bool(self._thread and self._thread.is_alive()),
+                'refreshed': self.refreshed,
+                'failures': self.failures,
+                'dropped_inactive': self.dropped_inactive,
+                'last_lag_seconds': round(self.last_lag, 3),
+                'max_lag_seconds': round(self.max_lag, 3),
+                'last_run_at': self.last_run_at
+            }
+
+
+token_refresher = TokenRefresher()
+
+
+def start_token_refresher():
+    """설정에서 켜져 있으면 백그라운드 토큰 갱신 시작"""
+    if TOKEN_REFRESHER_ENABLED:
+        token_refresher.start()
+    return token_refresher
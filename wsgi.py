@@ -0,0 +1,11 @@
+import os
+
+from app import create_app
+
+# preload 시에는 마스터 프로세스가 이 모듈을 로드함
+# 마스터에서 스레드를 띄우면 fork 시점에 잡고 있던 Redis/HTTP 락이 워커에 복사되어 교착될 수 있으므로
+# 백그라운드 토큰 갱신은 워커의 post_fork(gunicorn.conf.py)에서만 시작
+GUNICORN_PRELOAD = os.getenv('GUNICORN_PRELOAD', 'false').lower() in ('1', 'true', 'yes')
+
+# gunicorn 진입점: gunicorn -c gunicorn.conf.py wsgi:app
+app = create_app(start_background=not GUNICORN_PRELOAD)